@@ -1,10 +1,14 @@
 from flask import Flask
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
-from config import DB_HOST, DB_NAME, DB_USER, DB_PASS, GOOGLE_CLIENT_ID, GOOGLE_CLIENT_SECRET, SECRET_KEY, ENV_TYPE
+from config import DB_HOST, DB_NAME, DB_USER, DB_PASS, GOOGLE_CLIENT_ID, GOOGLE_CLIENT_SECRET, SECRET_KEY, ENV_TYPE, RATELIMIT_STORAGE_URI, RATELIMIT_ENABLED
+from config import DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, FRAGMENT_CACHE_MAX_BYTES, FRAGMENT_CACHE_TTL, JSON_COMPRESS_MIN_SIZE
+from config import METRICS_DIR, METRICS_TOKEN, JOB_QUEUE_PATH, JOB_WORKERS, JOB_RESULT_TTL, DELTA_STATE_TTL, DASHBOARD_ASYNC_DAYS
+from config import STATEMENTS_MIN_PARALLEL
+from extensions import limiter, profiler, fragment_cache, assets, json_compressor, metrics, job_queue
 from models import db
 from routes import register_blueprints
+from commands import register_commands
 from routes.auth import init_oauth
+from services.metrics import install_default_collectors
 
 app = Flask(__name__)
 app.secret_key = SECRET_KEY
@@ -12,6 +16,13 @@ app.secret_key = SECRET_KEY
 # Database config
 app.config["SQLALCHEMY_DATABASE_URI"] = f"mysql+pymysql://{DB_USER}:{DB_PASS}@{DB_HOST}/{DB_NAME}"
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    'pool_size': DB_POOL_SIZE,
+    'max_overflow': DB_MAX_OVERFLOW,
+    'pool_timeout': DB_POOL_TIMEOUT,
+    'pool_recycle': 280,
+    'pool_pre_ping': True,
+}
 app.config['GOOGLE_CLIENT_ID'] = GOOGLE_CLIENT_ID
 app.config['GOOGLE_CLIENT_SECRET'] = GOOGLE_CLIENT_SECRET
 
@@ -21,18 +32,49 @@ app.config['SESSION_COOKIE_HTTPONLY'] = True
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
 app.config['PERMANENT_SESSION_LIFETIME'] = 3600
 
+# Rate limiting (shared across worker processes)
+app.config['RATELIMIT_STORAGE_URI'] = RATELIMIT_STORAGE_URI
+app.config['RATELIMIT_ENABLED'] = RATELIMIT_ENABLED
+
+# Rendered template fragments
+app.config['FRAGMENT_CACHE_MAX_BYTES'] = FRAGMENT_CACHE_MAX_BYTES
+app.config['FRAGMENT_CACHE_TTL'] = FRAGMENT_CACHE_TTL
+
+# Compression of dynamic JSON responses
+app.config['JSON_COMPRESS_MIN_SIZE'] = JSON_COMPRESS_MIN_SIZE
+
+# Metrics endpoint
+app.config['METRICS_DIR'] = METRICS_DIR
+app.config['METRICS_TOKEN'] = METRICS_TOKEN
+
+# Background jobs
+app.config['JOB_QUEUE_PATH'] = JOB_QUEUE_PATH
+app.config['JOB_WORKERS'] = JOB_WORKERS
+app.config['JOB_RESULT_TTL'] = JOB_RESULT_TTL
+app.config['DELTA_STATE_TTL'] = DELTA_STATE_TTL
+app.config['DASHBOARD_ASYNC_DAYS'] = DASHBOARD_ASYNC_DAYS
+
+# Investor statements
+app.config['STATEMENTS_MIN_PARALLEL'] = STATEMENTS_MIN_PARALLEL
+
 # Initialize extensions
 db.init_app(app)
-limiter = Limiter(
-    get_remote_address,
-    app=app,
-    default_limits=["200 per day", "50 per hour"],
-    storage_uri="memory://",
-)
+limiter.init_app(app)
+profiler.init_app(app)
+fragment_cache.init_app(app)
+assets.init_app(app)
+json_compressor.init_app(app)
+metrics.init_app(app)
+job_queue.init_app(app)
+install_default_collectors(metrics, app, db, fragment_cache, tables=(
+    'tbl_balances_history', 'tbl_coin_prices', 'tbl_coin_prices_archive', 'tbl_change_log',
+    'tbl_crypto_transactions', 'tbl_investor_transactions', 'tbl_investor_unit_ledger',
+))
 oauth = init_oauth(app)
 
-# Register blueprints
+# Register blueprints and CLI commands
 register_blueprints(app)
+register_commands(app)
 
 if __name__ == "__main__":
     app.run(debug=True if ENV_TYPE == "dev" else False)
\ No newline at end of file
@@ -0,0 +1,53 @@
+"""
+Values a synthetic multi-year ledger with the lot accounting engine, then
+replays it the way the dashboard does: reading the average cost after every
+transaction (which must stay O(1) per read for FIFO and LIFO as well).
+
+Usage: python benchmarks/bench_accounting.py [trades] [currencies]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.accounting import METHODS, LotBook, run_ledger, summarize
+
+
+def synthetic_ledger(trades: int, currencies: int, seed: int = 7) -> tuple[list, dict]:
+    rng = random.Random(seed)
+    prices = [rng.uniform(1, 50000) for _ in range(currencies)]
+    ledger = []
+    for _ in range(trades):
+        currency_id = rng.randrange(currencies)
+        prices[currency_id] *= rng.uniform(0.98, 1.02)
+        # Buys slightly dominate so positions keep a backlog of open lots
+        amount = rng.uniform(0.01, 2.0) * (1 if rng.random() < 0.55 else -1)
+        ledger.append((currency_id, amount, prices[currency_id]))
+    return ledger, dict(enumerate(prices))
+
+
+if __name__ == "__main__":
+    trades = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    currencies = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    ledger, last_prices = synthetic_ledger(trades, currencies)
+    for method in METHODS:
+        started = time.perf_counter()
+        books = run_ledger(ledger, method)
+        positions = summarize(books, last_prices)
+        elapsed = time.perf_counter() - started
+        realized = sum(p['realized_pnl'] for p in positions.values())
+        unrealized = sum(p['unrealized_pnl'] for p in positions.values())
+        print(f"{method:<8} {trades:,} trades in {elapsed * 1000:7.1f} ms  "
+              f"realized {realized:,.2f}  unrealized {unrealized:,.2f}")
+
+    for method in METHODS:
+        books = {}
+        started = time.perf_counter()
+        for currency_id, amount, price in ledger:
+            book = books.get(currency_id) or books.setdefault(currency_id, LotBook(method))
+            book.apply(amount, price)
+            book.average_cost
+        elapsed = time.perf_counter() - started
+        print(f"{method:<8} {trades:,} trades with average_cost after each in {elapsed * 1000:7.1f} ms")
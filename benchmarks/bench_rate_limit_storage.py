@@ -0,0 +1,39 @@
+"""
+Measures the per-request overhead of the rate limit storage backends.
+
+Every limited request performs one ``hit`` (an increment) per applicable limit,
+so the time of ``FixedWindowRateLimiter.hit`` is the cost added to a request.
+
+Usage: python benchmarks/bench_rate_limit_storage.py [iterations]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import FixedWindowRateLimiter
+
+import services.rate_limit_storage  # noqa: F401
+
+
+def bench(storage_uri: str, iterations: int) -> float:
+    limiter = FixedWindowRateLimiter(storage_from_string(storage_uri))
+    limits = [parse("200 per day"), parse("50 per hour"), parse("5 per minute")]
+    started = time.perf_counter()
+    for i in range(iterations):
+        key = f"10.0.0.{i % 250}"
+        for item in limits:
+            limiter.hit(item, key)
+    return (time.perf_counter() - started) / iterations
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    with tempfile.TemporaryDirectory() as tmp:
+        for uri in ("memory://", f"sqlite:///{os.path.join(tmp, 'ratelimit.db')}"):
+            per_request = bench(uri, iterations)
+            print(f"{uri.split(':')[0]:<8} {per_request * 1e6:8.1f} us/request (3 limits)")
@@ -0,0 +1,110 @@
+"""
+Python-side cost of the dashboard statements: Query builders rebuilt on every
+call versus the cached lambda statements of services/queries.py.
+
+Runs against an in-memory SQLite database with a handful of rows, so the time
+measured is almost all statement construction, cache key generation and
+result processing rather than the database itself.
+
+Usage: python benchmarks/bench_statements.py [iterations] [currencies]
+"""
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import Session
+
+from models import db
+from models.currency import CoinPrice, Currency
+from models.exchange import CryptoTransaction, ExchangeBalance
+from models.investor import InvestorTransaction
+from services import queries
+
+START, END = '2025-01-02', '2025-01-20'
+
+
+def seed(session: Session, currencies: int):
+    session.add_all([Currency(id=1, code='USD', name='Dollar')] +
+                    [Currency(id=i, code=f'C{i}', name=f'Coin {i}') for i in range(2, currencies + 2)])
+    for day in range(1, 29):
+        session.add(ExchangeBalance(balance=100 + day, update_datetime=datetime(2025, 1, day, 12)))
+        session.add(InvestorTransaction(cash_amount=10, transaction_type='dep_cash', effective_datetime=datetime(2025, 1, day)))
+        for currency_id in range(2, currencies + 2):
+            session.add(CoinPrice(coin_currency_id=currency_id, quote_currency_id=1, price=day, datetime_update=datetime(2025, 1, day, 10)))
+            session.add(CryptoTransaction(currency_id=currency_id, amount=1, price=day, effective_date=datetime(2025, 1, day)))
+    session.commit()
+
+
+def dashboard_request_with_builders(session: Session, currency_ids: list):
+    """The statements of one balance + transactions + crypto-variation request, built with Query."""
+    session.query(func.sum(ExchangeBalance.balance)).filter(func.date(ExchangeBalance.update_datetime) == START).scalar()
+    session.query(func.sum(ExchangeBalance.balance)).filter(func.date(ExchangeBalance.update_datetime) == END).scalar()
+    session.query(func.sum(InvestorTransaction.cash_amount)).filter(func.date(InvestorTransaction.effective_datetime) <= START).scalar()
+    session.query(func.sum(InvestorTransaction.cash_amount)).filter(func.date(InvestorTransaction.effective_datetime) <= END).scalar()
+    session.query(InvestorTransaction).filter(
+        func.date(InvestorTransaction.effective_datetime) >= START,
+        func.date(InvestorTransaction.effective_datetime) <= END,
+    ).all()
+    session.query(Currency).filter(Currency.code.notin_(['USD', 'BRL'])).all()
+    for currency_id in currency_ids:
+        session.query(func.sum(CryptoTransaction.amount)).filter(
+            func.date(CryptoTransaction.effective_date) < START, CryptoTransaction.currency_id == currency_id,
+        ).scalar()
+        session.query(CryptoTransaction.amount, CryptoTransaction.price).filter(
+            func.date(CryptoTransaction.effective_date) < START, CryptoTransaction.currency_id == currency_id,
+        ).order_by(CryptoTransaction.effective_date, CryptoTransaction.id).all()
+        for day in (START, END):
+            session.query(CoinPrice.price).filter(
+                CoinPrice.coin_currency_id == currency_id, func.date(CoinPrice.datetime_update) == day,
+            ).order_by(CoinPrice.datetime_update.desc()).limit(1).scalar()
+    session.query(CryptoTransaction).filter(
+        func.date(CryptoTransaction.effective_date) >= START,
+        func.date(CryptoTransaction.effective_date) <= END,
+        CryptoTransaction.currency_id.in_(currency_ids),
+    ).order_by(CryptoTransaction.effective_date, CryptoTransaction.id).all()
+
+
+def dashboard_request_with_lambdas(session: Session, currency_ids: list):
+    """The same statements from services/queries.py."""
+    session.scalar(queries.balance_sum_on(START))
+    session.scalar(queries.balance_sum_on(END))
+    session.scalar(queries.investor_cash_sum_until(START))
+    session.scalar(queries.investor_cash_sum_until(END))
+    session.scalars(queries.investor_transactions_between(START, END)).all()
+    session.scalars(queries.non_fiat_currencies()).all()
+    for currency_id in currency_ids:
+        session.scalar(queries.crypto_amount_before(currency_id, START))
+        session.execute(queries.crypto_trades_before(currency_id, START)).all()
+        for day in (START, END):
+            session.scalar(queries.coin_price(currency_id, target_date=day))
+    session.scalars(queries.crypto_transactions_between(currency_ids, START, END)).all()
+
+
+def measure(label: str, request, session: Session, currency_ids: list, iterations: int) -> float:
+    request(session, currency_ids)  # warm the compiled caches
+    statements = 7 + 4 * len(currency_ids)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        request(session, currency_ids)
+        session.expunge_all()
+    per_request = (time.perf_counter() - started) / iterations
+    print(f"{label:<10} {per_request * 1000:7.2f} ms per request  "
+          f"{per_request / statements * 1e6:6.1f} us per statement ({statements} statements)")
+    return per_request
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    currencies = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    engine = create_engine("sqlite://")
+    db.metadata.create_all(engine)
+    with Session(engine) as session:
+        seed(session, currencies)
+        currency_ids = list(range(2, currencies + 2))
+        builders = measure("Query", dashboard_request_with_builders, session, currency_ids, iterations)
+        lambdas = measure("lambda", dashboard_request_with_lambdas, session, currency_ids, iterations)
+    print(f"saved {(builders - lambdas) * 1000:.2f} ms per request ({(1 - lambdas / builders) * 100:.0f}%)")
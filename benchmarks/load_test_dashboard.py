@@ -0,0 +1,102 @@
+"""
+Load test for the dashboard JSON endpoints.
+
+Compares throughput and tail latency of one or more running deployments, e.g.
+sync against gevent workers on the same database:
+
+    export RATELIMIT_ENABLED=false
+    GUNICORN_WORKER_CLASS=sync   GUNICORN_BIND=127.0.0.1:8001 gunicorn -c gunicorn.conf.py app:app
+    GUNICORN_WORKER_CLASS=gevent GUNICORN_BIND=127.0.0.1:8002 gunicorn -c gunicorn.conf.py app:app
+    python benchmarks/load_test_dashboard.py http://127.0.0.1:8001 http://127.0.0.1:8002 --concurrency 32
+
+All requests come from one IP, so the servers must run with RATELIMIT_ENABLED=false:
+with the default "50 per hour" most of them would be answered 429 and the
+percentiles would measure the limiter. 429 responses are reported separately.
+
+An admin session cookie is signed locally with SECRET_KEY, so no Google login is needed.
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from flask import Flask
+from flask.sessions import SecureCookieSessionInterface
+
+ENDPOINTS = [
+    "/dashboard/api/balance",
+    "/dashboard/api/transactions",
+    "/dashboard/api/crypto-variation",
+]
+
+
+def admin_cookie(secret_key: str) -> str:
+    app = Flask(__name__)
+    app.secret_key = secret_key
+    serializer = SecureCookieSessionInterface().get_signing_serializer(app)
+    return serializer.dumps({"user": {"id": 0, "name": "load-test", "role": "admin"}, "_permanent": True})
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run(base_url: str, cookie: str, params: dict, concurrency: int, requests_per_endpoint: int):
+    local = threading.local()
+
+    def call(path):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+            session.cookies.set("session", cookie)
+        started = time.perf_counter()
+        try:
+            status = session.get(base_url + path, params=params, timeout=120).status_code
+        except requests.RequestException:
+            status = None
+        return path, time.perf_counter() - started, status
+
+    jobs = [path for path in ENDPOINTS for _ in range(requests_per_endpoint)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(call, jobs))
+    elapsed = time.perf_counter() - started
+
+    print(f"\n{base_url}: {len(results) / elapsed:.1f} req/s over {elapsed:.1f}s with {concurrency} clients")
+    print(f"{'endpoint':<36}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}{'429':>6}")
+    for path in ENDPOINTS:
+        latencies = [duration * 1000 for p, duration, status in results if p == path and status != 429]
+        errors = sum(1 for p, _, status in results if p == path and status not in (200, 429))
+        limited = sum(1 for p, _, status in results if p == path and status == 429)
+        if not latencies:
+            print(f"{path:<36}{'-':>10}{'-':>10}{'-':>10}{errors:>8}{limited:>6}")
+            continue
+        print(f"{path:<36}{statistics.median(latencies):>10.1f}{percentile(latencies, 95):>10.1f}"
+              f"{percentile(latencies, 99):>10.1f}{errors:>8}{limited:>6}")
+    if any(status == 429 for _, _, status in results):
+        print("Rate limited: restart the server with RATELIMIT_ENABLED=false")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base_urls", nargs="+")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=50, help="requests per endpoint")
+    parser.add_argument("--start-date")
+    parser.add_argument("--end-date")
+    parser.add_argument("--secret-key", default=os.getenv("SECRET_KEY"))
+    args = parser.parse_args()
+
+    if not args.secret_key:
+        sys.exit("SECRET_KEY is required to sign the admin session cookie")
+
+    params = {k: v for k, v in {"start_date": args.start_date, "end_date": args.end_date}.items() if v}
+    cookie = admin_cookie(args.secret_key)
+    for base_url in args.base_urls:
+        run(base_url.rstrip('/'), cookie, params, args.concurrency, args.requests)
@@ -0,0 +1,16 @@
+from commands.prices import prices_cli
+from commands.crypto import crypto_cli
+from commands.schema import schema_cli
+from commands.statements import statements_cli
+from commands.investors import investors_cli
+from commands.assets import assets_cli
+from commands.changes import changes_cli
+
+def register_commands(app):
+    app.cli.add_command(prices_cli)
+    app.cli.add_command(crypto_cli)
+    app.cli.add_command(schema_cli)
+    app.cli.add_command(statements_cli)
+    app.cli.add_command(investors_cli)
+    app.cli.add_command(assets_cli)
+    app.cli.add_command(changes_cli)
@@ -0,0 +1,21 @@
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from services.assets import brotli, build_assets, prune_assets
+
+assets_cli = AppGroup('assets', help='Static asset pipeline.')
+
+
+@assets_cli.command('build')
+@click.option('--no-minify', is_flag=True, help='Only fingerprint and compress the files.')
+@click.option('--prune', is_flag=True, help='Delete builds the new manifest no longer references.')
+def build(no_minify, prune):
+    """Minify, fingerprint and pre-compress static files into static/dist."""
+    manifest = build_assets(current_app.static_folder, minify=not no_minify)
+    for source, hashed in sorted(manifest.items()):
+        click.echo(f"{source} -> {hashed}")
+    if brotli is None:
+        click.echo("brotli is not installed, only .gz variants were written.")
+    if prune:
+        removed = prune_assets(current_app.static_folder, manifest)
+        click.echo(f"Removed {len(removed)} stale files.")
@@ -0,0 +1,21 @@
+import click
+from datetime import datetime, timedelta
+from flask.cli import AppGroup
+from models.change_log import prune_changes
+
+changes_cli = AppGroup('changes', help='Change log maintenance.')
+
+
+@changes_cli.command('prune')
+@click.option('--days', default=30, show_default=True, help='Keep the entries of this many days.')
+def prune(days):
+    """
+    Delete old change log entries.
+
+    Delta tokens and change log consumers whose cursor is older than the
+    pruned entries fall back to a full computation. Schedule it, e.g.:
+
+        15 4 * * * cd /srv/painel && flask --app app changes prune --days 30
+    """
+    deleted = prune_changes(datetime.now() - timedelta(days=days))
+    click.echo(f"Deleted {deleted} change log entries older than {days} days.")
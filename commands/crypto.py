@@ -0,0 +1,41 @@
+import os
+import click
+from flask.cli import AppGroup
+from sqlalchemy import select
+from models import db
+from models.exchange import CryptoTransaction, CryptoPosition
+from services.crypto_ledger import FORMATS, LedgerValidationError, parse_rows, validate_rows, ingest_transactions, rebuild_position, currency_ids_by_code
+
+crypto_cli = AppGroup('crypto', help='Crypto ledger maintenance.')
+
+
+@crypto_cli.command('ingest')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), help='Defaults to the file extension.')
+@click.option('--chunk-size', default=1000, show_default=True)
+def ingest(path, fmt, chunk_size):
+    """Import crypto transactions from a CSV or NDJSON file."""
+    if fmt is None:
+        fmt = 'ndjson' if os.path.splitext(path)[1] in ('.ndjson', '.jsonl') else 'csv'
+    with open(path, encoding='utf-8-sig') as f:
+        content = f.read()
+    try:
+        rows = validate_rows(parse_rows(content, fmt), currency_ids_by_code())
+    except LedgerValidationError as e:
+        for error in e.errors[:50]:
+            click.echo(f"line {error['line']}: {error['error']}", err=True)
+        raise click.ClickException(str(e))
+    result = ingest_transactions(rows, chunk_size=chunk_size)
+    click.echo(f"Imported {result['inserted']} transactions for {result['currencies']} currencies "
+               f"({len(result['rebuilt_currencies'])} rebuilt).")
+
+
+@crypto_cli.command('rebuild-positions')
+def rebuild_positions():
+    """Recompute every currency position from the full ledger."""
+    CryptoPosition.__table__.create(db.engine, checkfirst=True)
+    currency_ids = db.session.scalars(select(CryptoTransaction.currency_id).distinct()).all()
+    for currency_id in currency_ids:
+        rebuild_position(currency_id)
+    db.session.commit()
+    click.echo(f"Rebuilt {len(currency_ids)} positions.")
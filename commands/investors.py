@@ -0,0 +1,20 @@
+import click
+from flask.cli import AppGroup
+from sqlalchemy import select
+from models import db
+from models.investor import Investor, InvestorUnitLedger, InvestorUnits
+from services.unitization import rebuild_investor
+
+investors_cli = AppGroup('investors', help='Investor accounting.')
+
+
+@investors_cli.command('rebuild-units')
+def rebuild_units():
+    """Replay every investor transaction into the unit ledger."""
+    InvestorUnitLedger.__table__.create(db.engine, checkfirst=True)
+    InvestorUnits.__table__.create(db.engine, checkfirst=True)
+    investor_ids = db.session.scalars(select(Investor.id)).all()
+    for investor_id in investor_ids:
+        rebuild_investor(investor_id)
+    db.session.commit()
+    click.echo(f"Rebuilt unit ledgers of {len(investor_ids)} investors.")
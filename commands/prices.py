@@ -0,0 +1,72 @@
+import click
+from flask.cli import AppGroup
+from sqlalchemy import select, text
+from models import db
+from models.currency import CoinPrice, CoinLatestPrice, CoinPriceArchive, CoinPriceCompaction, refresh_latest_price
+from services.price_compaction import PriceCompactor
+
+prices_cli = AppGroup('prices', help='Coin price maintenance.')
+
+# Keeps tbl_coin_latest_prices current for rows written outside the app (loaders, imports)
+LATEST_PRICE_TRIGGER = """
+CREATE TRIGGER trg_coin_prices_latest AFTER INSERT ON tbl_coin_prices
+FOR EACH ROW
+INSERT INTO tbl_coin_latest_prices (coin_currency_id, quote_currency_id, price, coin_price_id, date_time_update)
+VALUES (NEW.coin_currency_id, NEW.quote_currency_id, NEW.price, NEW.id, NEW.date_time_update)
+ON DUPLICATE KEY UPDATE
+    price = IF(VALUES(date_time_update) >= date_time_update, VALUES(price), price),
+    coin_price_id = IF(VALUES(date_time_update) >= date_time_update, VALUES(coin_price_id), coin_price_id),
+    date_time_update = GREATEST(date_time_update, VALUES(date_time_update))
+"""
+
+
+@prices_cli.command('rebuild-latest')
+def rebuild_latest():
+    """Create tbl_coin_latest_prices if needed and fill it from the price history."""
+    CoinLatestPrice.__table__.create(db.engine, checkfirst=True)
+    pairs = db.session.execute(
+        select(CoinPrice.coin_currency_id, CoinPrice.quote_currency_id).group_by(
+            CoinPrice.coin_currency_id, CoinPrice.quote_currency_id
+        )
+    ).all()
+    connection = db.session.connection()
+    for coin_currency_id, quote_currency_id in pairs:
+        refresh_latest_price(connection, coin_currency_id, quote_currency_id)
+    db.session.commit()
+    click.echo(f"Latest prices rebuilt for {len(pairs)} pairs.")
+
+
+@prices_cli.command('install-latest-trigger')
+def install_latest_trigger():
+    """Install a MySQL trigger that maintains latest prices for inserts made outside the app."""
+    if db.engine.dialect.name != 'mysql':
+        raise click.ClickException("The latest price trigger is only available on MySQL.")
+    db.session.execute(text("DROP TRIGGER IF EXISTS trg_coin_prices_latest"))
+    db.session.execute(text(LATEST_PRICE_TRIGGER))
+    db.session.commit()
+    click.echo("Trigger trg_coin_prices_latest installed.")
+
+
+@prices_cli.command('compact')
+@click.option('--raw-days', default=7, show_default=True, help='Days kept at full resolution.')
+@click.option('--hourly-days', default=90, show_default=True, help='Days kept at hourly resolution, older days keep daily closes.')
+@click.option('--batch-size', default=2000, show_default=True, help='Rows archived and deleted per transaction.')
+@click.option('--max-days', type=int, help='Stop after compacting this many days (for bounded scheduled runs); already compacted days do not count.')
+@click.option('--parquet-dir', type=click.Path(file_okay=False), help='Also write archived rows as Parquet files (needs pandas and pyarrow).')
+@click.option('--rescan', is_flag=True, help='Start again from the oldest tick, e.g. after back-filling old prices.')
+def compact(raw_days, hourly_days, batch_size, max_days, parquet_dir, rescan):
+    """
+    Downsample old intraday coin prices and archive the raw ticks.
+
+    Safe to re-run and to schedule, e.g. nightly from cron:
+
+        30 3 * * * cd /srv/painel && flask --app app prices compact --max-days 60
+    """
+    CoinPriceArchive.__table__.create(db.engine, checkfirst=True)
+    CoinPriceCompaction.__table__.create(db.engine, checkfirst=True)
+    try:
+        compactor = PriceCompactor(raw_days=raw_days, hourly_days=hourly_days, batch_size=batch_size, parquet_dir=parquet_dir)
+    except (ValueError, ImportError) as e:
+        raise click.ClickException(str(e))
+    stats = compactor.run(max_days=max_days, log=click.echo, rescan=rescan)
+    click.echo(f"Compacted {stats['days']} days ({stats['scanned']} scanned), archived {stats['archived']} ticks.")
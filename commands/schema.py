@@ -0,0 +1,15 @@
+import click
+from flask.cli import AppGroup
+from sqlalchemy import inspect
+from models import db
+
+schema_cli = AppGroup('schema', help='Database schema maintenance.')
+
+
+@schema_cli.command('create')
+def create():
+    """Create any table declared in models that does not exist yet (existing tables are left untouched)."""
+    existing = set(inspect(db.engine).get_table_names())
+    db.create_all()
+    created = sorted(set(inspect(db.engine).get_table_names()) - existing)
+    click.echo(f"Created tables: {', '.join(created)}" if created else "All tables already exist.")
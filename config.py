@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -10,4 +11,52 @@ DB_PASS = os.getenv("DB_PASS")
 GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
 GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
 SECRET_KEY = os.getenv("SECRET_KEY")
-ENV_TYPE = os.getenv("ENV_TYPE", "dev")
\ No newline at end of file
+ENV_TYPE = os.getenv("ENV_TYPE", "dev")
+RATELIMIT_STORAGE_URI = os.getenv(
+    "RATELIMIT_STORAGE_URI",
+    "sqlite:///" + os.path.join(tempfile.gettempdir(), "painel-ratelimit.db"),
+)
+# RATELIMIT_ENABLED=false turns every limit off, e.g. for benchmarks/load_test_dashboard.py
+RATELIMIT_ENABLED = os.getenv("RATELIMIT_ENABLED", "true").lower() not in ("0", "false", "no")
+
+# Deployment: "sync" or "gevent" gunicorn workers (see gunicorn.conf.py)
+GUNICORN_WORKER_CLASS = os.getenv("GUNICORN_WORKER_CLASS", "sync")
+GUNICORN_WORKERS = int(os.getenv("GUNICORN_WORKERS", "2"))
+GUNICORN_WORKER_CONNECTIONS = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "100"))
+
+# Connection pool per worker process. A sync worker serves one request at a time,
+# a gevent worker up to GUNICORN_WORKER_CONNECTIONS, each holding one connection
+# while it runs. Keep GUNICORN_WORKERS * (DB_POOL_SIZE + DB_MAX_OVERFLOW) below
+# the MySQL max_connections.
+DB_POOL_SIZE = int(os.getenv(
+    "DB_POOL_SIZE",
+    str(min(GUNICORN_WORKER_CONNECTIONS, 20)) if GUNICORN_WORKER_CLASS == "gevent" else "2",
+))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+# Template fragment cache, per worker process
+FRAGMENT_CACHE_MAX_BYTES = int(os.getenv("FRAGMENT_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+FRAGMENT_CACHE_TTL = int(os.getenv("FRAGMENT_CACHE_TTL", "300"))
+
+# JSON responses at least this large are gzipped when the client accepts it
+JSON_COMPRESS_MIN_SIZE = int(os.getenv("JSON_COMPRESS_MIN_SIZE", "1024"))
+
+# /metrics: every worker writes its samples to METRICS_DIR, a scrape merges them.
+# Scrapers authenticate with "Authorization: Bearer <METRICS_TOKEN>" (or an admin session).
+METRICS_DIR = os.getenv("METRICS_DIR", os.path.join(tempfile.gettempdir(), "painel-metrics"))
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+# Background jobs (heavy dashboard ranges): a SQLite queue shared by the worker
+# processes of the host, JOB_WORKERS threads per process, results kept JOB_RESULT_TTL seconds.
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", os.path.join(tempfile.gettempdir(), "painel-jobs.db"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "1"))
+JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL", "600"))
+# Dashboard delta states too large for a URL are kept in the same file DELTA_STATE_TTL seconds
+DELTA_STATE_TTL = int(os.getenv("DELTA_STATE_TTL", "86400"))
+
+# Dashboard ranges longer than this many days are computed as jobs
+DASHBOARD_ASYNC_DAYS = int(os.getenv("DASHBOARD_ASYNC_DAYS", "90"))
+
+# Investor statements use a process pool from this many investors on
+STATEMENTS_MIN_PARALLEL = int(os.getenv("STATEMENTS_MIN_PARALLEL", "200"))
\ No newline at end of file
@@ -0,0 +1,36 @@
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
+from services.profiler import RequestProfiler
+from services.fragment_cache import FragmentCache
+from services.assets import AssetManifest
+from services.compression import JsonCompressor
+from services.metrics import MetricsRegistry
+from services.job_queue import JobQueue
+
+# Registers the "sqlite://" storage scheme with limits
+import services.rate_limit_storage  # noqa: F401
+
+# Single limiter shared by the app and every blueprint. Storage is configured
+# through RATELIMIT_STORAGE_URI when the app calls limiter.init_app().
+limiter = Limiter(
+    get_remote_address,
+    default_limits=["200 per day", "50 per hour"],
+)
+
+# Opt-in per-request profiler, results are kept per worker process.
+profiler = RequestProfiler()
+
+# Rendered template fragments, one LRU per worker process.
+fragment_cache = FragmentCache()
+
+# Fingerprinted static files built by `flask assets build`.
+assets = AssetManifest()
+
+# Gzip for large JSON responses.
+json_compressor = JsonCompressor()
+
+# Prometheus metrics, merged across worker processes through METRICS_DIR.
+metrics = MetricsRegistry()
+
+# Background jobs shared by the worker processes through a SQLite file.
+job_queue = JobQueue()
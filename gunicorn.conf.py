@@ -0,0 +1,65 @@
+"""
+Gunicorn settings.
+
+    gunicorn -c gunicorn.conf.py app:app
+
+GUNICORN_WORKER_CLASS=sync   one request per worker process (default)
+GUNICORN_WORKER_CLASS=gevent cooperative workers: while a request waits on
+                             MySQL or on Google OAuth, the worker serves others
+
+Under gevent the worker monkey-patches the standard library before the app is
+imported (preload_app stays off for that reason). PyMySQL is pure Python, so it
+becomes cooperative through the patched socket module, and SQLAlchemy's
+QueuePool waits on patched threading primitives. Pool sizing lives in config.py.
+
+Patched threading also turns the background job threads (services/job_queue.py)
+into greenlets of the worker's hub. Their database calls still yield, but the
+Python part of a job (the crypto variation loop) does not: while it runs, the
+worker serves no other request. Under gevent keep JOB_WORKERS low and
+DASHBOARD_ASYNC_DAYS high, or serve the dashboard from sync workers.
+
+The SQLite stores (rate limit counters, job queue) keep one connection per OS
+thread (services/shared_files.py), so all greenlets of a worker share one
+instead of opening a connection per request. Their calls are not cooperative:
+while another process holds the write lock, a call waits (up to 5 s) with the
+whole worker blocked. Write transactions are a few statements long, so the
+waits are short.
+
+The request profiler's stack sampler sees OS threads, not greenlets: under
+gevent "X-Profile: sample" falls back to cProfile.
+"""
+import os
+from config import GUNICORN_WORKER_CLASS, GUNICORN_WORKERS, GUNICORN_WORKER_CONNECTIONS, METRICS_DIR
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = GUNICORN_WORKERS
+worker_class = GUNICORN_WORKER_CLASS
+worker_connections = GUNICORN_WORKER_CONNECTIONS
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = 30
+keepalive = 5
+
+# Patching must happen in the worker before app.py (and PyMySQL/SQLAlchemy) is imported
+preload_app = False
+
+
+def on_starting(server):
+    # Counters of a previous run would otherwise be summed into this one
+    from services.metrics import clear_directory
+    clear_directory(METRICS_DIR)
+
+
+def child_exit(server, worker):
+    # Keep the exited worker's counters before a new worker reuses its pid
+    from services.metrics import retire_snapshot
+    retire_snapshot(METRICS_DIR, worker.pid)
+
+
+def post_worker_init(worker):
+    if worker_class != "gevent":
+        return
+    from gevent import monkey
+    for module in ("socket", "ssl", "threading", "select"):
+        if not monkey.is_module_patched(module):
+            raise RuntimeError(f"gevent worker started without patching '{module}'; database calls would block the worker")
+    worker.log.info("gevent worker ready with %s connections", worker_connections)
@@ -3,7 +3,8 @@ from flask_sqlalchemy import SQLAlchemy
 db = SQLAlchemy()
 
 from models.user import User
-from models.investor import Investor, InvestorTransaction
-from models.currency import Currency, CoinPrice
-from models.exchange import Exchange, Strategy, ExchangeBalance
-from models.instrument import InstrumentClosingPrice
\ No newline at end of file
+from models.investor import Investor, InvestorTransaction, InvestorUnitLedger, InvestorUnits
+from models.currency import Currency, CoinPrice, CoinLatestPrice, CoinPriceArchive
+from models.exchange import Exchange, Strategy, ExchangeBalance, CryptoTransaction, CryptoPosition
+from models.instrument import InstrumentClosingPrice
+from models.change_log import ChangeLog
\ No newline at end of file
@@ -0,0 +1,209 @@
+from datetime import datetime, date
+from sqlalchemy import event, insert, delete, update, select, inspect, func, or_
+from sqlalchemy.orm import Session
+from models import db
+from models.exchange import Exchange, Strategy, ExchangeBalance, CryptoTransaction
+from models.currency import Currency, CoinPrice
+from models.investor import Investor, InvestorTransaction
+from models.instrument import InstrumentClosingPrice
+
+class ChangeLog(db.Model):
+    """
+    Append-only record of writes to the tables derived data is built from. The id is the cursor.
+
+    Entries are written when the transaction commits, while it holds the lock
+    on ChangeLogState: ids are then handed out in commit order, and a reader
+    that saw an id has seen every smaller one.
+    """
+    __tablename__ = "tbl_change_log"
+
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True, autoincrement=True)
+    table_name = db.Column(db.String(64), nullable=False, index=True)
+    row_id = db.Column(db.Integer)
+    operation = db.Column(db.Enum('insert', 'update', 'delete', name='change_operation'), nullable=False)
+    affected_date = db.Column(db.Date)
+    changed_at = db.Column(db.DateTime, nullable=False)
+
+
+class ChangeLogState(db.Model):
+    """Single row locked by writers of the change log; pruned_through is the last id pruned."""
+    __tablename__ = "tbl_change_log_state"
+
+    id = db.Column(db.Integer, primary_key=True)
+    pruned_through = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), nullable=False, default=0)
+
+
+# Tracked models and the attribute holding the business date of each row.
+# Reference tables have no business date, their entries only bump the table version.
+TRACKED_DATES = {
+    ExchangeBalance: 'update_datetime',
+    CoinPrice: 'datetime_update',
+    InvestorTransaction: 'effective_datetime',
+    CryptoTransaction: 'effective_date',
+    InstrumentClosingPrice: 'closing_date',
+    Investor: None,
+    Exchange: None,
+    Strategy: None,
+    Currency: None,
+}
+
+
+# Entries flushed or recorded in the current transaction, written on commit
+_PENDING = 'change_log_pending'
+
+
+def _load_previous_date(target, value, oldvalue, initiator):
+    return value
+
+
+# Load the stored date before it is overwritten, even when the attribute was
+# expired (e.g. after a commit), so an update can log the date the row left.
+for _model, _date_attr in TRACKED_DATES.items():
+    if _date_attr:
+        event.listen(getattr(_model, _date_attr), 'set', _load_previous_date, active_history=True, retval=True)
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str) and value:
+        try:
+            return datetime.fromisoformat(value.strip()).date()
+        except ValueError:
+            return None
+    return None
+
+
+def _entry(obj, operation: str, now: datetime):
+    date_attr = TRACKED_DATES[type(obj)]
+    affected = _as_date(getattr(obj, date_attr)) if date_attr else None
+    if date_attr and operation == 'update':
+        # A row moved to another date affects both; recompute from the earliest
+        previous = [_as_date(value) for value in inspect(obj).attrs[date_attr].history.deleted]
+        affected = min([d for d in previous + [affected] if d is not None], default=None)
+    return {
+        'table_name': obj.__tablename__,
+        'row_id': obj.id,
+        'operation': operation,
+        'affected_date': affected,
+        'changed_at': now,
+    }
+
+
+@event.listens_for(Session, "after_flush")
+def _record_flushed_changes(session, flush_context):
+    now = datetime.now()
+    entries = []
+    for obj in session.new:
+        if type(obj) in TRACKED_DATES:
+            entries.append(_entry(obj, 'insert', now))
+    for obj in session.dirty:
+        if type(obj) in TRACKED_DATES and session.is_modified(obj, include_collections=False):
+            entries.append(_entry(obj, 'update', now))
+    for obj in session.deleted:
+        if type(obj) in TRACKED_DATES:
+            entries.append(_entry(obj, 'delete', now))
+    if entries:
+        session.info.setdefault(_PENDING, []).extend(entries)
+
+
+def record_changes(table_name: str, operation: str, changes: list):
+    """
+    Log writes made with bulk statements, which bypass the flush hook.
+    changes: list of (row_id or None, affected date) pairs.
+    The entries are written when the session commits.
+    """
+    now = datetime.now()
+    db.session.info.setdefault(_PENDING, []).extend(
+        {'table_name': table_name, 'row_id': row_id, 'operation': operation,
+         'affected_date': _as_date(affected), 'changed_at': now}
+        for row_id, affected in changes
+    )
+
+
+def _lock_state(connection):
+    """Lock the state row until the transaction ends, creating it on first use."""
+    state = ChangeLogState.__table__
+    query = select(state.c.id).where(state.c.id == 1).with_for_update()
+    if connection.execute(query).first() is None:
+        connection.execute(
+            insert(state).values(id=1, pruned_through=0)
+            .prefix_with('IGNORE', dialect='mysql').prefix_with('OR IGNORE', dialect='sqlite')
+        )
+        connection.execute(query)
+
+
+@event.listens_for(Session, "before_commit")
+def _write_pending_changes(session):
+    # The commit's own flush would come after this hook: flush first
+    session.flush()
+    entries = session.info.pop(_PENDING, None)
+    if entries:
+        connection = session.connection()
+        # Last lock the transaction takes, and held only for the insert and the commit
+        _lock_state(connection)
+        connection.execute(insert(ChangeLog.__table__), entries)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending_changes(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(_PENDING, None)
+
+
+def pruned_through() -> int:
+    """Last id removed by prune_changes; cursors before it can no longer be checked."""
+    return db.session.scalar(select(ChangeLogState.pruned_through).where(ChangeLogState.id == 1)) or 0
+
+
+def prune_changes(before: datetime) -> int:
+    """Delete the entries recorded before a date, returns how many were removed."""
+    last = db.session.scalar(select(func.max(ChangeLog.id)).where(ChangeLog.changed_at < before))
+    if last is None:
+        return 0
+    _lock_state(db.session.connection())
+    deleted = db.session.execute(delete(ChangeLog).where(ChangeLog.id <= last)).rowcount
+    db.session.execute(
+        update(ChangeLogState).where(ChangeLogState.id == 1, ChangeLogState.pruned_through < last)
+        .values(pruned_through=last)
+    )
+    db.session.commit()
+    return deleted
+
+
+def changes_since(cursor: int = 0, tables: list = None, limit: int = 1000) -> tuple:
+    """Return (changes, next_cursor) for entries with id greater than cursor, oldest first."""
+    query = select(ChangeLog).where(ChangeLog.id > cursor).order_by(ChangeLog.id).limit(limit)
+    if tables:
+        query = query.where(ChangeLog.table_name.in_(tables))
+    changes = db.session.scalars(query).all()
+    next_cursor = changes[-1].id if changes else cursor
+    return changes, next_cursor
+
+
+def latest_cursor() -> int:
+    return db.session.query(func.max(ChangeLog.id)).scalar() or 0
+
+
+def table_versions() -> dict:
+    """Latest change log id per table, a version number that moves on every write."""
+    rows = db.session.execute(
+        select(ChangeLog.table_name, func.max(ChangeLog.id)).group_by(ChangeLog.table_name)
+    ).all()
+    return {table_name: version for table_name, version in rows}
+
+
+def changed_since(cursor: int, tables: list, until_date=None) -> bool:
+    """
+    True when an entry after cursor touches one of the tables on or before
+    until_date. Entries without a date (reference tables) always count, and so
+    does a cursor older than the pruned entries.
+    """
+    if cursor < pruned_through():
+        return True
+    query = select(ChangeLog.id).where(ChangeLog.id > cursor, ChangeLog.table_name.in_(tables))
+    if until_date is not None:
+        query = query.where(or_(ChangeLog.affected_date.is_(None), ChangeLog.affected_date <= _as_date(until_date)))
+    return db.session.scalar(query.limit(1)) is not None
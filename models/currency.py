@@ -1,4 +1,6 @@
 from models import db
+from sqlalchemy import event, select, delete, case, inspect
+from sqlalchemy.dialects import mysql, sqlite
 
 class Currency(db.Model):
     __tablename__ = "tbl_currencies"
@@ -16,4 +18,114 @@ class CoinPrice(db.Model):
     price = db.Column(db.Float, nullable=False)
     datetime_update = db.Column("date_time_update", db.DateTime, nullable=False)
     coin_currency = db.relationship('Currency', foreign_keys=[coin_currency_id])
-    quote_currency = db.relationship('Currency', foreign_keys=[quote_currency_id])
\ No newline at end of file
+    quote_currency = db.relationship('Currency', foreign_keys=[quote_currency_id])
+
+class CoinLatestPrice(db.Model):
+    """Most recent CoinPrice per coin and quote currency, kept in sync on every write."""
+    __tablename__ = "tbl_coin_latest_prices"
+
+    coin_currency_id = db.Column(db.Integer, db.ForeignKey('tbl_currencies.id'), primary_key=True)
+    quote_currency_id = db.Column(db.Integer, db.ForeignKey('tbl_currencies.id'), primary_key=True)
+    price = db.Column(db.Float, nullable=False)
+    datetime_update = db.Column("date_time_update", db.DateTime, nullable=False)
+    coin_price_id = db.Column(db.Integer)
+    coin_currency = db.relationship('Currency', foreign_keys=[coin_currency_id])
+    quote_currency = db.relationship('Currency', foreign_keys=[quote_currency_id])
+
+class CoinPriceArchive(db.Model):
+    """Raw ticks removed from tbl_coin_prices by the compaction job."""
+    __tablename__ = "tbl_coin_prices_archive"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    coin_currency_id = db.Column(db.Integer)
+    quote_currency_id = db.Column(db.Integer)
+    price = db.Column(db.Float, nullable=False)
+    datetime_update = db.Column("date_time_update", db.DateTime, nullable=False)
+    archived_at = db.Column(db.DateTime, nullable=False)
+
+class CoinPriceCompaction(db.Model):
+    """Progress of the price compaction per tier: days before compacted_until are done."""
+    __tablename__ = "tbl_coin_price_compaction"
+
+    tier = db.Column(db.String(10), primary_key=True)
+    compacted_until = db.Column(db.DateTime, nullable=False)
+
+
+def upsert_latest_price(connection, values: dict, only_if_newer: bool = True):
+    """
+    Insert or update one row of tbl_coin_latest_prices.
+    With only_if_newer the existing row is kept when it is more recent than values.
+    """
+    table = CoinLatestPrice.__table__
+    if connection.dialect.name == 'mysql':
+        stmt = mysql.insert(table).values(**values)
+        newer = stmt.inserted.date_time_update >= table.c.date_time_update
+        # MySQL applies assignments left to right, so the date must be compared before it is overwritten
+        assignments = [
+            (column, case((newer, stmt.inserted[column]), else_=table.c[column]) if only_if_newer else stmt.inserted[column])
+            for column in ('price', 'coin_price_id', 'date_time_update')
+        ]
+        stmt = stmt.on_duplicate_key_update(assignments)
+    else:
+        stmt = sqlite.insert(table).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['coin_currency_id', 'quote_currency_id'],
+            set_={column: stmt.excluded[column] for column in ('price', 'coin_price_id', 'date_time_update')},
+            where=(stmt.excluded.date_time_update >= table.c.date_time_update) if only_if_newer else None,
+        )
+    connection.execute(stmt)
+
+
+def refresh_latest_price(connection, coin_currency_id: int, quote_currency_id: int):
+    """Recompute the latest price of one pair from the full history."""
+    history = CoinPrice.__table__
+    latest = connection.execute(
+        select(history.c.id, history.c.price, history.c.date_time_update)
+        .where(history.c.coin_currency_id == coin_currency_id, history.c.quote_currency_id == quote_currency_id)
+        .order_by(history.c.date_time_update.desc())
+        .limit(1)
+    ).first()
+    if latest is None:
+        table = CoinLatestPrice.__table__
+        connection.execute(delete(table).where(
+            table.c.coin_currency_id == coin_currency_id, table.c.quote_currency_id == quote_currency_id
+        ))
+        return
+    upsert_latest_price(connection, {
+        'coin_currency_id': coin_currency_id,
+        'quote_currency_id': quote_currency_id,
+        'price': latest.price,
+        'date_time_update': latest.date_time_update,
+        'coin_price_id': latest.id,
+    }, only_if_newer=False)
+
+
+@event.listens_for(CoinPrice, "after_insert")
+def _coin_price_inserted(mapper, connection, target):
+    upsert_latest_price(connection, {
+        'coin_currency_id': target.coin_currency_id,
+        'quote_currency_id': target.quote_currency_id,
+        'price': target.price,
+        'date_time_update': target.datetime_update,
+        'coin_price_id': target.id,
+    })
+
+
+@event.listens_for(CoinPrice, "after_update")
+def _coin_price_updated(mapper, connection, target):
+    # An edit can move a price back in time or to another pair, so rebuild every pair it touched
+    state = inspect(target)
+    pairs = {(target.coin_currency_id, target.quote_currency_id)}
+    coin_history = state.attrs.coin_currency_id.history
+    quote_history = state.attrs.quote_currency_id.history
+    if coin_history.deleted or quote_history.deleted:
+        old_coin = coin_history.deleted[0] if coin_history.deleted else target.coin_currency_id
+        old_quote = quote_history.deleted[0] if quote_history.deleted else target.quote_currency_id
+        pairs.add((old_coin, old_quote))
+    for coin_currency_id, quote_currency_id in pairs:
+        refresh_latest_price(connection, coin_currency_id, quote_currency_id)
+
+
+@event.listens_for(CoinPrice, "after_delete")
+def _coin_price_deleted(mapper, connection, target):
+    refresh_latest_price(connection, target.coin_currency_id, target.quote_currency_id)
@@ -38,3 +38,14 @@ class CryptoTransaction(db.Model):
     update_datetime = db.Column(db.DateTime)
     investor = db.relationship('Investor', foreign_keys=[investor_id])
     currency = db.relationship('Currency', foreign_keys=[currency_id])
+
+class CryptoPosition(db.Model):
+    """Running average-cost state per currency, maintained by the crypto ledger ingestion."""
+    __tablename__="tbl_crypto_positions"
+    currency_id = db.Column(db.Integer, db.ForeignKey('tbl_currencies.id'), primary_key=True)
+    amount = db.Column(db.Float, nullable=False, default=0.0)
+    cost_basis = db.Column(db.Float, nullable=False, default=0.0)
+    average_cost = db.Column(db.Float, nullable=False, default=0.0)
+    last_effective_date = db.Column(db.DateTime)
+    update_datetime = db.Column(db.DateTime)
+    currency = db.relationship('Currency', foreign_keys=[currency_id])
@@ -22,4 +22,31 @@ class InvestorTransaction(db.Model):
     kind_currency_id = db.Column(db.Integer, db.ForeignKey('tbl_currencies.id'))
     investor = db.relationship('Investor', backref=db.backref('transactions', lazy=True))
     cash_currency = db.relationship('Currency', foreign_keys=[cash_currency_id])
-    kind_currency = db.relationship('Currency', foreign_keys=[kind_currency_id])
\ No newline at end of file
+    kind_currency = db.relationship('Currency', foreign_keys=[kind_currency_id])
+
+class InvestorUnitLedger(db.Model):
+    """Units issued or redeemed by each investor transaction, with the running state after it."""
+    __tablename__ = "tbl_investor_unit_ledger"
+
+    transaction_id = db.Column(db.Integer, db.ForeignKey('tbl_investor_transactions.id', ondelete='CASCADE'), primary_key=True)
+    investor_id = db.Column(db.Integer, db.ForeignKey('tbl_investors.id'), index=True)
+    effective_datetime = db.Column(db.DateTime)
+    flow = db.Column(db.Float, nullable=False)
+    nav = db.Column(db.Float)
+    units = db.Column(db.Float, nullable=False)
+    units_after = db.Column(db.Float, nullable=False)
+    twr_factor_after = db.Column(db.Float, nullable=False)
+
+
+class InvestorUnits(db.Model):
+    """Current unit balance of an investor, kept in step with the unit ledger."""
+    __tablename__ = "tbl_investor_units"
+
+    investor_id = db.Column(db.Integer, db.ForeignKey('tbl_investors.id'), primary_key=True)
+    units = db.Column(db.Float, nullable=False, default=0.0)
+    net_flow = db.Column(db.Float, nullable=False, default=0.0)
+    twr_factor = db.Column(db.Float, nullable=False, default=1.0)
+    last_nav = db.Column(db.Float)
+    last_effective_datetime = db.Column(db.DateTime)
+    update_datetime = db.Column(db.DateTime)
+    investor = db.relationship('Investor', foreign_keys=[investor_id])
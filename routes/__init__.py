@@ -5,6 +5,10 @@ from routes.exchange import exchange_bp
 from routes.currency import currency_bp
 from routes.dashboard import dashboard_bp
 from routes.instrument import instrument_bp
+from routes.admin import admin_bp
+from routes.crypto import crypto_bp
+from routes.assets import assets_bp
+from routes.metrics import metrics_bp
 
 def register_blueprints(app):
     app.register_blueprint(auth_bp)
@@ -13,4 +17,8 @@ def register_blueprints(app):
     app.register_blueprint(exchange_bp)
     app.register_blueprint(currency_bp)
     app.register_blueprint(dashboard_bp)
-    app.register_blueprint(instrument_bp)
\ No newline at end of file
+    app.register_blueprint(instrument_bp)
+    app.register_blueprint(admin_bp)
+    app.register_blueprint(crypto_bp)
+    app.register_blueprint(assets_bp)
+    app.register_blueprint(metrics_bp)
\ No newline at end of file
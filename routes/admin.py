@@ -0,0 +1,75 @@
+from flask import Blueprint, render_template, abort, Response, request, jsonify
+from decorators.auth import login_required, admin_required
+from extensions import profiler, fragment_cache
+from models.change_log import changes_since, pruned_through
+
+admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
+
+# Request profiles (per worker process)
+
+@admin_bp.route('/profiles', methods=['GET'])
+@login_required
+@admin_required
+def list_profiles():
+    profiles = list(reversed(profiler.profiles))
+    return render_template('admin/profiles.html', profiles=profiles)
+
+@admin_bp.route('/profiles/<int:profile_id>', methods=['GET'])
+@login_required
+@admin_required
+def show_profile(profile_id):
+    profile = profiler.get(profile_id)
+    if profile is None:
+        abort(404)
+    return render_template('admin/profile_detail.html', profile=profile)
+
+@admin_bp.route('/profiles/<int:profile_id>/collapsed', methods=['GET'])
+@login_required
+@admin_required
+def collapsed_profile(profile_id):
+    """Collapsed stacks, ready for flamegraph.pl or speedscope"""
+    profile = profiler.get(profile_id)
+    if profile is None:
+        abort(404)
+    return Response(profile['collapsed'], mimetype='text/plain')
+
+
+# Change log consumer API
+
+@admin_bp.route('/api/changes', methods=['GET'])
+@login_required
+@admin_required
+def api_changes():
+    """
+    Changes recorded after ?since=<cursor>, optionally filtered by ?tables=a,b.
+    A cursor below pruned_through has missed pruned entries: resync from scratch.
+    """
+    since = request.args.get('since', 0, type=int)
+    limit = min(request.args.get('limit', 1000, type=int), 10000)
+    tables = [name for name in request.args.get('tables', '').split(',') if name]
+    changes, next_cursor = changes_since(since, tables=tables, limit=limit)
+    return jsonify({
+        'success': True,
+        'data': {
+            'changes': [{
+                'id': change.id,
+                'table_name': change.table_name,
+                'row_id': change.row_id,
+                'operation': change.operation,
+                'affected_date': change.affected_date.strftime('%Y-%m-%d') if change.affected_date else None,
+                'changed_at': str(change.changed_at),
+            } for change in changes],
+            'next_cursor': next_cursor,
+            'has_more': len(changes) == limit,
+            'pruned_through': pruned_through(),
+        }
+    })
+
+# Template fragment cache (per worker process)
+
+@admin_bp.route('/api/fragment-cache', methods=['GET'])
+@login_required
+@admin_required
+def api_fragment_cache():
+    """Entries, size and per-route hits, misses and render time saved"""
+    return jsonify({'success': True, 'data': fragment_cache.stats()})
@@ -0,0 +1,33 @@
+import mimetypes
+import os
+from flask import Blueprint, abort, request, send_from_directory
+from extensions import assets, limiter
+
+assets_bp = Blueprint('assets', __name__, url_prefix='/assets')
+
+# Fingerprinted names change with the content, so they can be cached forever
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+@assets_bp.route('/<path:filename>', methods=['GET'])
+# A page load fetches several assets; they must not use up the default limits
+@limiter.exempt
+def serve_asset(filename):
+    """Serve a file from `flask assets build`, pre-compressed when the client accepts it"""
+    if not assets.is_built(filename):
+        abort(404)
+
+    served_name, encoding = filename, None
+    for candidate, suffix in ENCODINGS:
+        if request.accept_encodings.quality(candidate) > 0 and os.path.exists(os.path.join(assets.dist_folder, filename + suffix)):
+            served_name, encoding = filename + suffix, candidate
+            break
+
+    # The type of the original file, not of its .gz/.br variant
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    response = send_from_directory(assets.dist_folder, served_name, mimetype=mimetype, max_age=31536000)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
@@ -0,0 +1,61 @@
+from flask import Blueprint, request, jsonify
+from models import db
+from models.exchange import CryptoPosition
+from decorators.auth import login_required, admin_required
+from extensions import limiter
+from services.crypto_ledger import FORMATS, LedgerValidationError, parse_rows, validate_rows, ingest_transactions, currency_ids_by_code
+
+crypto_bp = Blueprint('crypto', __name__, url_prefix='/crypto')
+
+@crypto_bp.route('/transactions/import', methods=['POST'])
+@login_required
+@admin_required
+@limiter.limit("10 per minute")
+def import_transactions():
+    """
+    Import a batch of crypto transactions.
+    Accepts an uploaded 'file' or the raw request body, as CSV or NDJSON
+    (?format=csv|ndjson, otherwise guessed from the file name or content type).
+    """
+    upload = request.files.get('file')
+    if upload:
+        content = upload.read().decode('utf-8-sig')
+        filename = upload.filename or ''
+    else:
+        content = request.get_data(as_text=True)
+        filename = ''
+
+    fmt = request.args.get('format')
+    if not fmt:
+        ndjson = filename.endswith(('.ndjson', '.jsonl')) or 'ndjson' in (request.content_type or '')
+        fmt = 'ndjson' if ndjson else 'csv'
+    if fmt not in FORMATS:
+        return jsonify({'success': False, 'error': f"Unsupported format '{fmt}'"}), 400
+
+    try:
+        rows = validate_rows(parse_rows(content, fmt), currency_ids_by_code())
+    except LedgerValidationError as e:
+        return jsonify({'success': False, 'error': str(e), 'errors': e.errors[:100]}), 400
+    if not rows:
+        return jsonify({'success': False, 'error': 'No transactions to import'}), 400
+
+    try:
+        result = ingest_transactions(rows)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+    return jsonify({'success': True, 'data': result})
+
+@crypto_bp.route('/positions', methods=['GET'])
+@login_required
+@admin_required
+def list_positions():
+    positions = CryptoPosition.query.all()
+    return jsonify({'success': True, 'data': [{
+        'currency_id': position.currency_id,
+        'currency_code': position.currency.code if position.currency else None,
+        'amount': position.amount,
+        'cost_basis': position.cost_basis,
+        'average_cost': position.average_cost,
+        'last_effective_date': str(position.last_effective_date) if position.last_effective_date else None,
+    } for position in positions]})
@@ -1,14 +1,14 @@
 from flask import Blueprint, render_template, request, redirect, url_for, session
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
 from models import db
 from models.currency import Currency, CoinPrice
 from decorators.auth import login_required, admin_required
+from extensions import limiter
 from datetime import datetime
 from sqlalchemy import func
+from services import queries
+from services.queries import Deferred
 
 currency_bp = Blueprint('currency', __name__, url_prefix='/currency')
-limiter = Limiter(key_func=get_remote_address)
 
 # Currency CRUD Operations
 
@@ -62,13 +62,11 @@ def delete_currency(currency_id):
 @login_required
 @admin_required
 def list_coin_prices():
-    query = CoinPrice.query
-
+    start_dt = end_dt = None
     start_date = request.args.get('start_date')
     if start_date:
         try:
             start_dt = datetime.strptime(start_date, '%Y-%m-%d')
-            query = query.filter(func.date(CoinPrice.datetime_update) >= start_dt)
         except ValueError:
             pass
 
@@ -76,19 +74,12 @@ def list_coin_prices():
     if end_date:
         try:
             end_dt = datetime.strptime(end_date, '%Y-%m-%d')
-            query = query.filter(func.date(CoinPrice.datetime_update) <= end_dt)
         except ValueError:
             pass
 
-    coin_prices = query.order_by(CoinPrice.datetime_update.desc())
-
     limit = request.args.get('limit', type=int)
-    if limit is not None:
-        coin_prices = coin_prices.limit(limit)
-    else:
-        coin_prices = coin_prices.limit(50)
+    coin_prices = Deferred(queries.coin_price_listing(start_dt, end_dt, limit if limit is not None else 50))
 
-    coin_prices = coin_prices.all()
     return render_template('currency/prices.html', coin_prices=coin_prices, start_date=start_date, end_date=end_date, limit=limit)
 
 @currency_bp.route('/price/edit/<int:price_id>', methods=['GET'])
@@ -1,16 +1,26 @@
 from decorators.auth import login_required, admin_required
+from extensions import metrics, limiter, job_queue
 from flask import Blueprint, render_template, request, jsonify, current_app
 from models import db
 from models.exchange import ExchangeBalance, CryptoTransaction
 from models.investor import InvestorTransaction
-from models.currency import CoinPrice, Currency
-from sqlalchemy import func
+from models.currency import CoinPrice, Currency, CoinLatestPrice
+from sqlalchemy import func, select
+from services.accounting import LotBook, METHODS, AVERAGE
+from services.delta_tokens import issue_token, load_previous
+from models.change_log import latest_cursor, changed_since
+from services import queries
 from datetime import datetime, timedelta
 from sqlalchemy import and_
 import requests
 
 dashboard_bp = Blueprint('dashboard', __name__, url_prefix='/dashboard')
 
+# Tables each dashboard calculation reads, for delta token invalidation
+BALANCE_TABLES = ['tbl_balances_history']
+TRANSACTION_TABLES = ['tbl_investor_transactions', 'tbl_investors', 'tbl_currencies']
+CRYPTO_TABLES = ['tbl_crypto_transactions', 'tbl_coin_prices', 'tbl_currencies']
+
 @dashboard_bp.route('/', methods=['GET'])
 @login_required
 @admin_required
@@ -35,9 +45,18 @@ def api_balance():
         start_date = request.args.get('start_date', datetime.now().replace(day=1).strftime('%Y-%m-%d'))
         end_date = request.args.get('end_date', (datetime.now()-timedelta(days=1)).strftime('%Y-%m-%d'))
         
-        data = calculate_balance_difference(start_date=start_date, end_date=end_date)[0].json
+        # Delta mode: extend a range computed earlier to a later end date
+        cursor = latest_cursor()
+        previous = load_previous(request.args.get('token'), 'balance', start_date, end_date,
+                                 request.args.get('previous_end_date'), BALANCE_TABLES)
+
+        data = calculate_balance_difference(start_date=start_date, end_date=end_date, previous=previous)[0].json
+        data['is_delta'] = previous is not None
+        data['delta_token'] = issue_token('balance', start_date, end_date, cursor,
+                                          {'start_balance_sum': data['start_balance_sum']})
         return jsonify({'success': True, 'data': data})
     except Exception as e:
+        metrics.dashboard_errors.inc(endpoint=request.endpoint)
         return jsonify({'success': False, 'error': str(e), 'data': None}), 500
 
 
@@ -50,9 +69,15 @@ def api_transactions():
         start_date = request.args.get('start_date', datetime.now().replace(day=1).strftime('%Y-%m-%d'))
         end_date = request.args.get('end_date', (datetime.now()-timedelta(days=1)).strftime('%Y-%m-%d'))
         
+        cursor = latest_cursor()
+        previous = load_previous(request.args.get('token'), 'transactions', start_date, end_date,
+                                 request.args.get('previous_end_date'), TRANSACTION_TABLES)
+
+        # In delta mode only the transactions of the added days are listed
         transactions_diff, investor_transactions, _ = calculate_investor_transactions(
             start_date=start_date, 
-            end_date=end_date
+            end_date=end_date,
+            previous=previous
         )
         transactions_data = transactions_diff.json
         
@@ -72,8 +97,14 @@ def api_transactions():
             })
         
         transactions_data['investor_transactions'] = serialized_transactions
+        transactions_data['is_delta'] = previous is not None
+        transactions_data['delta_token'] = issue_token('transactions', start_date, end_date, cursor, {
+            'start_transactions_sum': transactions_data['start_transactions_sum'],
+            'end_transactions_sum': transactions_data['end_transactions_sum'],
+        })
         return jsonify({'success': True, 'data': transactions_data})
     except Exception as e:
+        metrics.dashboard_errors.inc(endpoint=request.endpoint)
         return jsonify({'success': False, 'error': str(e), 'data': None}), 500
 
 
@@ -85,27 +116,170 @@ def api_crypto_variation():
     try:
         start_date = request.args.get('start_date', datetime.now().replace(day=1).strftime('%Y-%m-%d'))
         end_date = request.args.get('end_date', (datetime.now()-timedelta(days=1)).strftime('%Y-%m-%d'))
+        method = request.args.get('method', AVERAGE)
+        if method not in METHODS:
+            return jsonify({'success': False, 'error': f"Unknown cost method '{method}'", 'data': None}), 400
         
-        data = calculate_crypto_variation(start_date=start_date, end_date=end_date)[0].json
+        cursor = latest_cursor()
+        previous = load_previous(request.args.get('token'), 'crypto', start_date, end_date,
+                                 request.args.get('previous_end_date'), CRYPTO_TABLES, method=method)
+
+        # Long ranges computed from scratch run as a shared background job (async=1 clients only)
+        if previous is None and request.args.get('async') == '1' and _range_days(start_date, end_date) > current_app.config['DASHBOARD_ASYNC_DAYS']:
+            job = job_queue.submit('crypto-variation', {'start_date': start_date, 'end_date': end_date, 'method': method},
+                                   version=cursor, fresh=lambda job: not changed_since(job['version'], CRYPTO_TABLES, end_date))
+            return jsonify({'success': True, 'data': {'job': _job_status(job)}}), 202
+
+        response, states = calculate_crypto_variation(start_date=start_date, end_date=end_date, method=method, previous=previous)
+        data = response.json
+        data['is_delta'] = previous is not None
+        data['delta_token'] = issue_token('crypto', start_date, end_date, cursor, {'currencies': states}, method=method)
         
         return jsonify({'success': True, 'data': data})
     except Exception as e:
+        metrics.dashboard_errors.inc(endpoint=request.endpoint)
         return jsonify({'success': False, 'error': str(e), 'data': None}), 500
 
-def calculate_investor_transactions(start_date: str, end_date: str):
+@dashboard_bp.route('/api/jobs/<job_id>', methods=['GET'])
+@login_required
+@admin_required
+@limiter.exempt
+def api_job(job_id):
+    """Progress of a background calculation, with its result once done (polled by the dashboard)"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Unknown job', 'data': None}), 404
+    return jsonify({'success': True, 'data': _job_status(job)})
+
+def _job_status(job: dict) -> dict:
+    return {
+        'id': job['id'],
+        'kind': job['kind'],
+        'status': job['status'],
+        'progress': job['progress'],
+        'message': job['message'],
+        'error': job['error'],
+        'result': job['result'],
+    }
 
-    start_transactions_sum = db.session.query(func.sum(InvestorTransaction.cash_amount)).filter(
-        func.date(InvestorTransaction.effective_datetime) <= start_date
-    ).scalar() or 0.0
-    
-    end_transactions_sum = db.session.query(func.sum(InvestorTransaction.cash_amount)).filter(
-        func.date(InvestorTransaction.effective_datetime) <= end_date
-    ).scalar() or 0.0
+def _range_days(start_date: str, end_date: str) -> int:
+    return (datetime.strptime(end_date, '%Y-%m-%d') - datetime.strptime(start_date, '%Y-%m-%d')).days
+
+@job_queue.handler('crypto-variation')
+def crypto_variation_job(params: dict, progress) -> dict:
+    """The full-range response of /api/crypto-variation, computed by a job worker"""
+    cursor = latest_cursor()
+    response, states = calculate_crypto_variation(progress=progress, **params)
+    data = response.json
+    data['is_delta'] = False
+    data['delta_token'] = issue_token('crypto', params['start_date'], params['end_date'], cursor,
+                                      {'currencies': states}, method=params['method'])
+    return data
+
+@dashboard_bp.route('/api/valuation', methods=['GET'])
+@login_required
+@admin_required
+def api_valuation():
+    """Value current crypto holdings and exchange balances at the latest prices"""
+    try:
+        quote_code = request.args.get('quote', 'USD')
+        data = calculate_valuation(quote_code=quote_code)
+        if data is None:
+            return jsonify({'success': False, 'error': f'Unknown quote currency {quote_code}', 'data': None}), 400
+        return jsonify({'success': True, 'data': data})
+    except Exception as e:
+        metrics.dashboard_errors.inc(endpoint=request.endpoint)
+        return jsonify({'success': False, 'error': str(e), 'data': None}), 500
+
+def calculate_valuation(quote_code: str = 'USD'):
+    """
+    Value the live book against tbl_coin_latest_prices.
+    Uses one aggregate query per source and never scans the price history.
+    """
+    currencies = {currency.id: currency.code for currency in db.session.query(Currency).all()}
+    quote_id = next((currency_id for currency_id, code in currencies.items() if code == quote_code), None)
+    if quote_id is None:
+        return None
 
-    transactions = db.session.query(InvestorTransaction).filter(
-        func.date(InvestorTransaction.effective_datetime) >= start_date,
-        func.date(InvestorTransaction.effective_datetime) <= end_date
+    latest_prices = dict(db.session.execute(
+        select(CoinLatestPrice.coin_currency_id, CoinLatestPrice.price).where(
+            CoinLatestPrice.quote_currency_id == quote_id
+        )
+    ).all())
+    latest_prices[quote_id] = 1.0
+
+    holdings = db.session.execute(
+        select(CryptoTransaction.currency_id, func.sum(CryptoTransaction.amount)).group_by(CryptoTransaction.currency_id)
     ).all()
+
+    # Exchange balances as of the most recent day that has any balance
+    latest_balance_datetime = db.session.query(func.max(ExchangeBalance.update_datetime)).scalar()
+    balances = []
+    balance_date = None
+    if latest_balance_datetime is not None:
+        balance_date = latest_balance_datetime.date()
+        balances = db.session.execute(
+            select(ExchangeBalance.currency_id, func.sum(ExchangeBalance.balance))
+            .where(ExchangeBalance.update_datetime >= datetime.combine(balance_date, datetime.min.time()))
+            .group_by(ExchangeBalance.currency_id)
+        ).all()
+
+    def value_positions(rows):
+        positions = []
+        total = 0.0
+        for currency_id, amount in rows:
+            amount = float(amount or 0.0)
+            if amount == 0:
+                continue
+            price = latest_prices.get(currency_id)
+            value = amount * price if price is not None else None
+            total += value or 0.0
+            positions.append({
+                'currency_id': currency_id,
+                'currency_code': currencies.get(currency_id),
+                'amount': amount,
+                'price': price,
+                'value': value,
+            })
+        return positions, total
+
+    crypto_positions, crypto_total = value_positions(holdings)
+    balance_positions, balance_total = value_positions(balances)
+
+    return {
+        'quote_currency': quote_code,
+        'crypto': {'positions': crypto_positions, 'total_value': crypto_total},
+        'balances': {
+            'date': balance_date.strftime('%Y-%m-%d') if balance_date else None,
+            'positions': balance_positions,
+            'total_value': balance_total,
+        },
+        'total_value': crypto_total + balance_total,
+        'missing_prices': sorted({
+            position['currency_code'] for position in crypto_positions + balance_positions if position['price'] is None
+        }),
+    }
+
+def calculate_investor_transactions(start_date: str, end_date: str, previous: dict = None):
+    """
+    previous: state of the same range ending on previous['end_date'] (delta mode).
+    Only the days after it are read and only their transactions are returned.
+    """
+
+    if previous is None:
+        start_transactions_sum = db.session.scalar(queries.investor_cash_sum_until(start_date)) or 0.0
+        
+        end_transactions_sum = db.session.scalar(queries.investor_cash_sum_until(end_date)) or 0.0
+        
+        transactions_from = start_date
+    else:
+        start_transactions_sum = previous['start_transactions_sum']
+        end_transactions_sum = previous['end_transactions_sum'] + (
+            db.session.scalar(queries.investor_cash_sum_between(previous['end_date'], end_date)) or 0.0
+        )
+        transactions_from = (datetime.strptime(previous['end_date'], '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+
+    transactions = db.session.scalars(queries.investor_transactions_between(transactions_from, end_date)).all()
     
     transactions_difference = end_transactions_sum - start_transactions_sum
    
@@ -117,15 +291,14 @@ def calculate_investor_transactions(start_date: str, end_date: str):
         'transactions_difference': float(transactions_difference)
     }), transactions, 200
     
-def calculate_balance_difference(start_date: str, end_date: str):
+def calculate_balance_difference(start_date: str, end_date: str, previous: dict = None):
 
-    start_balance_sum = db.session.query(func.sum(ExchangeBalance.balance)).filter(
-        func.date(ExchangeBalance.update_datetime) == start_date
-    ).scalar() or 0.0
+    if previous is not None:
+        start_balance_sum = previous['start_balance_sum']
+    else:
+        start_balance_sum = db.session.scalar(queries.balance_sum_on(start_date)) or 0.0
     
-    end_balance_sum = db.session.query(func.sum(ExchangeBalance.balance)).filter(
-        func.date(ExchangeBalance.update_datetime) == end_date
-    ).scalar() or 0.0
+    end_balance_sum = db.session.scalar(queries.balance_sum_on(end_date)) or 0.0
     
     balance_difference = end_balance_sum - start_balance_sum
     
@@ -160,171 +333,172 @@ def _get_coin_price(currency_id: int, target_date: str = None, max_date: str = N
     if cache_key in price_cache:
         return price_cache[cache_key]
     
-    query = db.session.query(CoinPrice.price).filter(
-        CoinPrice.coin_currency_id == currency_id
-    )
-    
-    if target_date:
-        query = query.filter(func.date(CoinPrice.datetime_update) == target_date)
-    elif max_date:
-        query = query.filter(func.date(CoinPrice.datetime_update) <= max_date)
-    
-    if order_desc:
-        query = query.order_by(CoinPrice.datetime_update.desc()).limit(1)
-    
-    result = query.scalar()
+    result = db.session.scalar(queries.coin_price(currency_id, target_date, max_date, order_desc))
     price = float(result) if result else 0.0
     price_cache[cache_key] = price
     return price
 
 
-def _calculate_initial_state(currency_id: int, start_date: str, price_cache: dict = None) -> tuple:
+def _calculate_initial_state(currency_id: int, start_date: str, price_cache: dict = None, method: str = AVERAGE) -> LotBook:
     """
-    Calculate holdings amount and cost basis before start_date using average cost method.
+    Build the position held before start_date with the given cost method.
     
     Returns:
-        Tuple of (amounts_before, cost_basis_before)
+        LotBook with the amount, cost basis and realized P&L before start_date
     """
     
-    total_amount = db.session.query(func.sum(CryptoTransaction.amount)).filter(
-        func.date(CryptoTransaction.effective_date) < start_date,
-        CryptoTransaction.currency_id == currency_id
-    ).scalar() or 0.0
+    total_amount = db.session.scalar(queries.crypto_amount_before(currency_id, start_date)) or 0.0
     
-    cost_basis = 0.0
-    amount = 0.0
+    book = LotBook(method)
 
     if total_amount > 0:
-        transactions_before = db.session.query(CryptoTransaction).filter(
-            func.date(CryptoTransaction.effective_date) < start_date,
-            CryptoTransaction.currency_id == currency_id
-        ).order_by(CryptoTransaction.effective_date).all()
+        transactions_before = db.session.execute(queries.crypto_trades_before(currency_id, start_date)).all()
         
-        for tx in transactions_before:
-            if tx.amount > 0:
-                # Buy: update cost basis
-                cost_basis += tx.amount * tx.price
-                amount += tx.amount
-            else:
-                # Sell: reduce cost basis proportionally
-                if amount > 0:
-                    cost_basis = cost_basis * (1 + tx.amount / amount)
-                    amount += tx.amount
-                    if amount <= 0:
-                        cost_basis = 0.0
-                        amount = 0.0
+        for amount, price in transactions_before:
+            book.apply(amount, price)
     
-    return amount, cost_basis
+    return book
+
+
+def _crypto_initial_state(currency: Currency, start_date: str, price_cache: dict, method: str) -> dict:
+    """Running state of one currency at start_date, before any transaction of the period."""
+    book = _calculate_initial_state(currency.id, start_date, price_cache, method)
+    start_price = _get_coin_price(currency.id, target_date=start_date, price_cache=price_cache)
+    amount = book.amount
+    return {
+        'currency_id': currency.id,
+        'currency_code': currency.code,
+        'amount_before': amount,
+        'realized_before': book.realized,
+        'transaction_count': 0,
+        'total_held': amount,
+        'avg_price': start_price if amount > 0 else 0.0,
+        # Variation at an end price p is p * variation_amount - variation_cost:
+        # holdings before the period count from the start price, later ones from their transaction price
+        'variation_amount': amount,
+        'variation_cost': amount * start_price,
+        'book': book,
+    }
 
 
-def calculate_crypto_variation(start_date: str, end_date: str):
+def _apply_crypto_transactions(state: dict, transactions, start_date: str) -> list:
+    """Add the transactions of the period to the state. Returns their holdings details, without end prices."""
+    book = state['book']
+    holdings = []
+    for tx in transactions:
+        tx_date_str = tx.effective_date.strftime('%Y-%m-%d') if hasattr(tx.effective_date, 'strftime') else str(tx.effective_date)
+        
+        # Update holdings, cost basis and average price
+        state['total_held'] += tx.amount
+        state['transaction_count'] += 1
+        book.apply(tx.amount, tx.price)
+        state['avg_price'] = book.average_cost
+        
+        # Variation of this transaction runs from its own price to the end price
+        if state['total_held'] > 0:
+            state['variation_amount'] += float(tx.amount)
+            state['variation_cost'] += float(tx.amount) * float(tx.price)
+            holdings.append({
+                'transaction_date': tx_date_str,
+                'amount': float(tx.amount),
+                'transaction_price': float(tx.price),
+                'measurement_start': max(start_date, tx_date_str),
+                'price_at_measurement_start': float(tx.price),
+                'avg_price_after_tx': float(state['avg_price'])
+            })
+    return holdings
+
+
+def calculate_crypto_variation(start_date: str, end_date: str, method: str = AVERAGE, previous: dict = None, progress=None):
     """
     Calculate the value variation of crypto holdings between two dates.
-    Accounts for additions and removals using average cost method.
+    Accounts for additions and removals, and splits realized from unrealized
+    P&L using the given cost method (fifo, lifo or average).
     Optimized with price caching to reduce DB queries.
+    
+    previous: per-currency states of the same range ending on previous['end_date']
+    (delta mode). Only transactions after that day are read, and holdings_details
+    lists only them.
+    
+    progress: optional fn(done, total, message), called once per currency step
+    when the calculation runs as a background job.
+    
+    Returns (response, states) where states is the serializable state at end_date.
     """
     
     # Initialize price cache for this entire calculation
     price_cache = {}
     
-    currencies = db.session.query(Currency).filter(
-        Currency.code.notin_(['USD', 'BRL'])  # Filter fiat currencies at DB level
+    if previous is None:
+        currencies = db.session.scalars(queries.non_fiat_currencies()).all()
+        states = []
+        for currency in currencies:
+            if progress:
+                progress(len(states), 2 * len(currencies), f'Holdings of {currency.code} on {start_date}')
+            states.append(_crypto_initial_state(currency, start_date, price_cache, method))
+        transactions_from = start_date
+    else:
+        states = [dict(state, book=LotBook.from_state(state['book'])) for state in previous['currencies']]
+        transactions_from = (datetime.strptime(previous['end_date'], '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+    
+    # Transactions of the (added) days for every currency in one query
+    transactions_by_currency = {}
+    currency_ids = [state['currency_id'] for state in states]
+    transactions_in_period = db.session.scalars(
+        queries.crypto_transactions_between(currency_ids, transactions_from, end_date)
     ).all()
+    for tx in transactions_in_period:
+        transactions_by_currency.setdefault(tx.currency_id, []).append(tx)
     
     variations_by_currency = []
     total_variation = 0.0
+    total_realized = 0.0
+    total_unrealized = 0.0
     
-    for currency in currencies:
-        # Fetch data for this currency
-        transactions_in_period = db.session.query(CryptoTransaction).filter(
-            func.date(CryptoTransaction.effective_date) >= start_date,
-            func.date(CryptoTransaction.effective_date) <= end_date,
-            CryptoTransaction.currency_id == currency.id
-        ).all()
-        
-        # Calculate initial state before start_date
-        amounts_before_start_date, cost_basis_before = _calculate_initial_state(
-            currency.id, start_date, price_cache
-        )
-        
-        # Get prices for the period with caching
-        start_price_previous = _get_coin_price(currency.id, target_date=start_date, price_cache=price_cache)
-        end_price = _get_coin_price(currency.id, target_date=end_date, price_cache=price_cache)
+    steps_before = len(states) if previous is None else 0
+    for step, state in enumerate(states):
+        if progress:
+            progress(steps_before + step, steps_before + len(states), f"Variation of {state['currency_code']}")
+        holdings_data = _apply_crypto_transactions(state, transactions_by_currency.get(state['currency_id'], []), start_date)
         
         # Skip if no holdings before and no transactions during period
-        if amounts_before_start_date == 0 and len(transactions_in_period) == 0:
+        if state['amount_before'] == 0 and state['transaction_count'] == 0:
             continue
         
-        # Calculate variation on holdings that existed before the period
-        variation_previous = float(amounts_before_start_date) * (float(end_price) - float(start_price_previous))
-            
-        # Process transactions during the period
-        currency_total_variation = variation_previous
-        holdings_data = []
-        total_held = amounts_before_start_date
-        current_avg_price = start_price_previous if amounts_before_start_date > 0 else 0.0
-        current_cost_basis = cost_basis_before if amounts_before_start_date > 0 else 0.0
-        
-        for tx in transactions_in_period:
-            tx_date_str = tx.effective_date.strftime('%Y-%m-%d') if hasattr(tx.effective_date, 'strftime') else str(tx.effective_date)
-            
-            # Update holdings and average price
-            total_held += tx.amount
-            
-            if tx.amount > 0:
-                # Buy: update average price and cost basis
-                new_total_amount = amounts_before_start_date + total_held
-                current_cost_basis += tx.amount * tx.price
-                current_avg_price = current_cost_basis / new_total_amount if new_total_amount > 0 else 0.0
-            else:
-                # Sell: reduce cost basis proportionally, reset if holdings reach zero
-                if total_held <= 0:
-                    current_avg_price = 0.0
-                    current_cost_basis = 0.0
-                else:
-                    current_cost_basis = current_cost_basis * (1 + tx.amount / (amounts_before_start_date + total_held - tx.amount))
-                
-            # Calculate variation for this transaction
-            measurement_start = max(start_date, tx_date_str)
-            
-            if measurement_start <= end_date and total_held > 0:
-                # Get price at measurement start with caching
-                price_at_measurement_start = (
-                    _get_coin_price(currency.id, max_date=measurement_start, order_desc=True, price_cache=price_cache)
-                    if measurement_start < start_date
-                    else tx.price
-                )
-                
-                # Calculate variation: amount × (end_price - price_when_held)
-                tx_variation = float(tx.amount) * (float(end_price) - float(price_at_measurement_start))
-                currency_total_variation += tx_variation
-                
-                holdings_data.append({
-                    'transaction_date': tx_date_str,
-                    'amount': float(tx.amount),
-                    'transaction_price': float(tx.price),
-                    'measurement_start': measurement_start,
-                    'price_at_measurement_start': float(price_at_measurement_start),
-                    'price_at_end': float(end_price),
-                    'variation': tx_variation,
-                    'avg_price_after_tx': float(current_avg_price)
-                })
+        end_price = _get_coin_price(state['currency_id'], target_date=end_date, price_cache=price_cache)
+        for holding in holdings_data:
+            holding['price_at_end'] = float(end_price)
+            holding['variation'] = holding['amount'] * (float(end_price) - holding['price_at_measurement_start'])
         
+        book = state['book']
+        currency_total_variation = float(end_price) * state['variation_amount'] - state['variation_cost']
         total_variation += currency_total_variation
+        realized_pnl = book.realized - state['realized_before']
+        unrealized_pnl = book.unrealized(float(end_price))
+        total_realized += realized_pnl
+        total_unrealized += unrealized_pnl
         
         variations_by_currency.append({
-            'currency_id': currency.id,
-            'currency_code': currency.code,
-            'amount': float(total_held),
-            'start_price': float(current_avg_price),
+            'currency_id': state['currency_id'],
+            'currency_code': state['currency_code'],
+            'amount': float(state['total_held']),
+            'start_price': float(state['avg_price']),
             'end_price': float(end_price),
             'variation': currency_total_variation,
+            'cost_basis': book.cost_basis,
+            'average_cost': book.average_cost,
+            'realized_pnl': realized_pnl,
+            'unrealized_pnl': unrealized_pnl,
             'holdings_details': holdings_data
         })
     
+    serialized_states = [dict(state, book=state['book'].to_state()) for state in states]
     return jsonify({
         'start_date': start_date,
         'end_date': end_date,
+        'cost_method': method,
         'total_variation': float(total_variation),
+        'total_realized_pnl': total_realized,
+        'total_unrealized_pnl': total_unrealized,
         'variations_by_currency': variations_by_currency
-    }), 200
\ No newline at end of file
+    }), serialized_states
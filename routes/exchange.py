@@ -1,28 +1,31 @@
-from flask import Blueprint, render_template, request, redirect, url_for, session
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
+from flask import Blueprint, render_template, request, redirect, url_for, session, jsonify
 from models import db
 from models.exchange import ExchangeBalance, Exchange, Strategy
 from models.currency import Currency
+from models.change_log import record_changes
+from services import queries
+from services.queries import Deferred
+from services.balance_cube import DIMENSIONS as CUBE_DIMENSIONS, MEASURES as CUBE_MEASURES, cube_cache
 from decorators.auth import login_required, admin_required
-from datetime import datetime
-from sqlalchemy import select, func
+from extensions import limiter
+from datetime import datetime, timedelta
+from sqlalchemy import select, func, update, case, and_, or_
+from sqlalchemy.orm import joinedload
 
 exchange_bp = Blueprint('exchange', __name__, url_prefix='/exchange')
-limiter = Limiter(key_func=get_remote_address)
 
 @exchange_bp.route('/balances', methods=['GET'])
 @login_required
 @admin_required
 def list_balances():
-    exchanges = Exchange.query.order_by(Exchange.name).all()
-    query = ExchangeBalance.query
+    # Queries are passed unevaluated, cached fragments skip them entirely
+    exchanges = Deferred(queries.exchanges_by_name())
 
+    start_dt = end_dt = None
     start_date = request.args.get('start_date')
     if start_date:
         try:
             start_dt = datetime.strptime(start_date, '%Y-%m-%d')
-            query = query.filter(func.date(ExchangeBalance.update_datetime) >= start_dt)
         except ValueError:
             pass
 
@@ -30,19 +33,13 @@ def list_balances():
     if end_date:
         try:
             end_dt = datetime.strptime(end_date, '%Y-%m-%d')
-            query = query.filter(func.date(ExchangeBalance.update_datetime) <= end_dt)
         except ValueError:
             pass
 
     exchange_id = request.args.get('exchange_id', type=int)
-    if exchange_id:
-        query = query.filter(ExchangeBalance.exchange_id == exchange_id)
     limit = request.args.get('limit', type=int)
     
-    if limit is not None:
-        balances = query.order_by(func.date(ExchangeBalance.update_datetime).desc()).limit(limit)
-    else:
-        balances = query.order_by(func.date(ExchangeBalance.update_datetime).desc()).limit(50)
+    balances = Deferred(queries.balance_listing(start_dt, end_dt, exchange_id, limit if limit is not None else 50))
 
     return render_template('exchange/balances.html', exchanges=exchanges, balances=balances, start_date=start_date, end_date=end_date, limit=limit)
 
@@ -79,13 +76,103 @@ def update_balance(balance_id):
                             exchange_id=exchange_id or '', 
                             limit=limit or ''))
 
+@exchange_bp.route('/balances/batch', methods=['GET'])
+@login_required
+@admin_required
+def batch_edit_balances():
+    exchanges = Exchange.query.order_by(Exchange.name).all()
+    date = request.args.get('date')
+    exchange_id = request.args.get('exchange_id', type=int)
+    balances = []
+
+    if date:
+        try:
+            day_start = datetime.strptime(date, '%Y-%m-%d')
+        except ValueError:
+            day_start = None
+        if day_start:
+            # Range filter instead of func.date() so the update_datetime index can be used
+            query = ExchangeBalance.query.options(
+                joinedload(ExchangeBalance.exchange),
+                joinedload(ExchangeBalance.strategy),
+                joinedload(ExchangeBalance.currency),
+            ).filter(
+                ExchangeBalance.update_datetime >= day_start,
+                ExchangeBalance.update_datetime < day_start + timedelta(days=1),
+            )
+            if exchange_id:
+                query = query.filter(ExchangeBalance.exchange_id == exchange_id)
+            balances = query.order_by(ExchangeBalance.exchange_id, ExchangeBalance.strategy_id, ExchangeBalance.id).all()
+
+    return render_template('exchange/batch_edit.html', exchanges=exchanges, balances=balances, date=date, exchange_id=exchange_id)
+
+@exchange_bp.route('/balances/batch', methods=['POST'])
+@login_required
+@admin_required
+def batch_update_balances():
+    """
+    Apply a list of edited balance rows in one UPDATE statement and one transaction.
+    Each row carries the update_datetime it was loaded with; if any row no longer
+    matches it (edited by someone else in the meantime) nothing is written.
+    """
+    rows = (request.get_json(silent=True) or {}).get('rows') or []
+    if not rows:
+        return jsonify({'success': False, 'error': 'No rows to update'}), 400
+
+    changes = {}
+    try:
+        for row in rows:
+            changes[int(row['id'])] = {
+                'balance': float(row['balance']),
+                'update_datetime': datetime.fromisoformat(row['update_datetime']),
+                'expected_update_datetime': datetime.fromisoformat(row['expected_update_datetime']),
+            }
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': f'Invalid row: {e}'}), 400
+
+    stmt = (
+        update(ExchangeBalance)
+        .where(or_(*[
+            and_(ExchangeBalance.id == balance_id, ExchangeBalance.update_datetime == change['expected_update_datetime'])
+            for balance_id, change in changes.items()
+        ]))
+        .values(
+            balance=case({balance_id: change['balance'] for balance_id, change in changes.items()}, value=ExchangeBalance.id),
+            update_datetime=case({balance_id: change['update_datetime'] for balance_id, change in changes.items()}, value=ExchangeBalance.id),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    result = db.session.execute(stmt)
+
+    if result.rowcount != len(changes):
+        db.session.rollback()
+        current = dict(db.session.execute(
+            select(ExchangeBalance.id, ExchangeBalance.update_datetime).where(ExchangeBalance.id.in_(changes.keys()))
+        ).all())
+        conflicts = [
+            balance_id for balance_id, change in changes.items()
+            if current.get(balance_id) != change['expected_update_datetime']
+        ]
+        return jsonify({
+            'success': False,
+            'error': 'Some rows were changed or removed since they were loaded',
+            'conflicts': conflicts,
+        }), 409
+
+    record_changes(ExchangeBalance.__tablename__, 'update', [
+        (balance_id, min(change['expected_update_datetime'], change['update_datetime']))
+        for balance_id, change in changes.items()
+    ])
+    db.session.commit()
+    return jsonify({'success': True, 'updated': result.rowcount})
+
 @exchange_bp.route('/balance/new', methods=['GET'])
 @login_required
 @admin_required
 def new_balance():
-    exchanges = Exchange.query.order_by(Exchange.name).all()
-    strategies = Strategy.query.order_by(Strategy.name).all()
-    currencies = Currency.query.order_by(Currency.code).all()
+    exchanges = Exchange.query.order_by(Exchange.name)
+    strategies = Strategy.query.order_by(Strategy.name)
+    currencies = Currency.query.order_by(Currency.code)
     return render_template('exchange/new_balance.html', exchanges=exchanges, strategies=strategies, currencies=currencies)
 
 @exchange_bp.route('/balance/create', methods=['POST'])
@@ -137,4 +224,52 @@ def get_consolidated_balances():
         query = query.limit(100)
 
     results = db.session.execute(query).fetchall()
-    return render_template('exchange/consolidated.html', results=results, start_date=start_date, end_date=end_date, limit=limit)
\ No newline at end of file
+    return render_template('exchange/consolidated.html', results=results, start_date=start_date, end_date=end_date, limit=limit)
+
+
+@exchange_bp.route('/api/balances/cube', methods=['GET'])
+@login_required
+@admin_required
+def api_balance_cube():
+    """
+    Balance change between two days broken down by exchange, strategy and currency.
+    ?by=exchange,currency rolls up to those dimensions (none: fund total),
+    ?exchange_id=1,2&strategy_id=&currency_id= slice, and
+    ?pivot=exchange,currency&measure=balance_difference returns a matrix.
+    """
+    start_date = request.args.get('start_date', datetime.now().replace(day=1).strftime('%Y-%m-%d'))
+    end_date = request.args.get('end_date', (datetime.now()-timedelta(days=1)).strftime('%Y-%m-%d'))
+    try:
+        datetime.strptime(start_date, '%Y-%m-%d')
+        datetime.strptime(end_date, '%Y-%m-%d')
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Dates must be YYYY-MM-DD', 'data': None}), 400
+
+    filters = {}
+    for dimension in CUBE_DIMENSIONS:
+        ids = request.args.get(f'{dimension}_id', '')
+        if ids:
+            try:
+                filters[dimension] = [int(value) for value in ids.split(',')]
+            except ValueError:
+                return jsonify({'success': False, 'error': f'Invalid {dimension}_id', 'data': None}), 400
+
+    pivot = [name for name in request.args.get('pivot', '').split(',') if name]
+    by = [name for name in request.args.get('by', '').split(',') if name]
+    measure = request.args.get('measure', 'balance_difference')
+    unknown = [name for name in pivot + by if name not in CUBE_DIMENSIONS]
+    if unknown:
+        return jsonify({'success': False, 'error': f"Unknown dimension '{unknown[0]}', expected one of {', '.join(CUBE_DIMENSIONS)}", 'data': None}), 400
+    if pivot and (len(pivot) != 2 or pivot[0] == pivot[1]):
+        return jsonify({'success': False, 'error': 'pivot needs two different dimensions', 'data': None}), 400
+    if len(set(by)) != len(by):
+        return jsonify({'success': False, 'error': 'by lists a dimension more than once', 'data': None}), 400
+    if measure not in CUBE_MEASURES:
+        return jsonify({'success': False, 'error': f"Unknown measure '{measure}'", 'data': None}), 400
+
+    cube = cube_cache.get()
+    if pivot:
+        data = cube.pivot(start_date, end_date, pivot[0], pivot[1], measure=measure, filters=filters)
+    else:
+        data = cube.query(start_date, end_date, by=by, filters=filters)
+    return jsonify({'success': True, 'data': data})
@@ -1,14 +1,14 @@
 from flask import Blueprint, render_template, request, redirect, url_for, session
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
 from models import db
 from models.instrument import InstrumentClosingPrice
 from decorators.auth import login_required, admin_required
+from extensions import limiter
 from datetime import datetime
 from sqlalchemy import func
+from services import queries
+from services.queries import Deferred
 
 instrument_bp = Blueprint('instrument', __name__, url_prefix='/instrument')
-limiter = Limiter(key_func=get_remote_address)
 
 # Instrument Closing Prices
 
@@ -16,13 +16,11 @@ limiter = Limiter(key_func=get_remote_address)
 @login_required
 @admin_required
 def list_instrument_closing_prices():
-    query = InstrumentClosingPrice.query
-
+    start_dt = end_dt = None
     start_date = request.args.get('start_date')
     if start_date:
         try:
             start_dt = datetime.strptime(start_date, '%Y-%m-%d')
-            query = query.filter(InstrumentClosingPrice.closing_date >= start_dt)
         except ValueError:
             pass
 
@@ -30,25 +28,14 @@ def list_instrument_closing_prices():
     if end_date:
         try:
             end_dt = datetime.strptime(end_date, '%Y-%m-%d')
-            query = query.filter(InstrumentClosingPrice.closing_date <= end_dt)
         except ValueError:
             pass
     
     instrument = request.args.get('instrument')
-    if instrument:
-        try:
-            query = query.filter(InstrumentClosingPrice.instrument.ilike(f"%{instrument}%"))
-        except ValueError:
-            pass
 
-    instrument_closing_prices = query.order_by(InstrumentClosingPrice.closing_date.desc())
     limit = request.args.get('limit', type=int)
-    if limit is not None:
-        instrument_closing_prices = instrument_closing_prices.limit(limit)
-    else:
-        instrument_closing_prices = instrument_closing_prices.limit(50)
+    instrument_closing_prices = Deferred(queries.closing_price_listing(start_dt, end_dt, instrument, limit if limit is not None else 50))
 
-    instrument_closing_prices = instrument_closing_prices.all()
     return render_template('instrument/closing_prices.html', instrument_closing_prices=instrument_closing_prices, start_date=start_date, end_date=end_date, limit=limit)
 
 @instrument_bp.route('/closing_price/edit/<int:closing_price_id>', methods=['GET'])
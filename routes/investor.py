@@ -1,15 +1,17 @@
-from flask import Blueprint, render_template, request, redirect, url_for, session
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
+from flask import Blueprint, render_template, request, redirect, url_for, session, send_file, abort, jsonify
 from models import db
-from models.investor import Investor, InvestorTransaction
+from models.investor import Investor, InvestorTransaction, InvestorUnits
 from models.currency import Currency
 from decorators.auth import login_required, admin_required
-from datetime import datetime
+from extensions import limiter
+from services.statements import FORMATS as STATEMENT_FORMATS, generate_statements
+from services import unitization
+from datetime import datetime, timedelta
 from sqlalchemy import func
+import io
+import zipfile
 
 investor_bp = Blueprint('investor', __name__, url_prefix='/investor')
-limiter = Limiter(key_func=get_remote_address)
 
 @investor_bp.route('/', methods=['GET'])
 @login_required
@@ -52,6 +54,7 @@ def update_investor(investor_id):
 @admin_required
 def delete_investor(investor_id):
     investor = Investor.query.get_or_404(investor_id)
+    unitization.remove_investor(investor_id)
     db.session.delete(investor)
     db.session.commit()
     return redirect(url_for('investor.list_investors'))
@@ -83,6 +86,8 @@ def create_transaction():
         kind_currency_id=kind_currency_id
     )
     db.session.add(new_transaction)
+    db.session.flush()
+    unitization.record_transaction(new_transaction)
     db.session.commit()
     return redirect(url_for('investor.list_transactions'))
 
@@ -108,6 +113,7 @@ def edit_transaction(transaction_id):
 @admin_required
 def update_transaction(transaction_id):
     transaction = InvestorTransaction.query.get_or_404(transaction_id)
+    previous_investor_id = transaction.investor_id
     transaction.effective_datetime = request.form['effective_datetime']
     transaction.received_datetime = request.form['received_datetime']
     transaction.transaction_type = request.form['transaction_type']
@@ -117,6 +123,7 @@ def update_transaction(transaction_id):
     transaction.investor_id = request.form.get('investor_id', type=int)
     transaction.cash_currency_id = request.form.get('cash_currency_id', type=int)
     transaction.kind_currency_id = request.form.get('kind_currency_id', type=int)
+    unitization.update_transaction(transaction, previous_investor_id)
     db.session.commit()
     return redirect(url_for('investor.list_transactions'))
 
@@ -157,6 +164,51 @@ def list_transactions():
 @admin_required
 def delete_transaction(transaction_id):
     transaction = InvestorTransaction.query.get_or_404(transaction_id)
+    unitization.remove_transaction(transaction)
     db.session.delete(transaction)
     db.session.commit()
-    return redirect(url_for('investor.list_transactions'))
\ No newline at end of file
+    return redirect(url_for('investor.list_transactions'))
+
+@investor_bp.route('/statements', methods=['GET'])
+@login_required
+@admin_required
+@limiter.limit("5 per minute")
+def download_statements():
+    """Statements of every investor for a period, as a zip of CSV, HTML or PDF files"""
+    today = datetime.now()
+    start_date = request.args.get('start_date') or (today.replace(day=1) - timedelta(days=1)).replace(day=1).strftime('%Y-%m-%d')
+    end_date = request.args.get('end_date') or (today.replace(day=1) - timedelta(days=1)).strftime('%Y-%m-%d')
+    fmt = request.args.get('format', 'pdf')
+    if fmt not in STATEMENT_FORMATS:
+        abort(400)
+    try:
+        datetime.strptime(start_date, '%Y-%m-%d')
+        datetime.strptime(end_date, '%Y-%m-%d')
+    except ValueError:
+        abort(400)
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for filename, content in generate_statements(start_date, end_date, fmt=fmt):
+            archive.writestr(filename, content)
+    buffer.seek(0)
+    return send_file(buffer, mimetype='application/zip', as_attachment=True,
+                     download_name=f"statements_{start_date}_{end_date}_{fmt}.zip")
+
+
+@investor_bp.route('/api/units', methods=['GET'])
+@login_required
+@admin_required
+def api_units():
+    """Units, current value and time-weighted return of every investor, from the unit ledger"""
+    fund = unitization.fund_nav()
+    positions = [unitization.investor_position(summary, fund) for summary in InvestorUnits.query.all()]
+    return jsonify({'success': True, 'data': {'fund': fund, 'investors': positions}})
+
+@investor_bp.route('/api/units/<int:investor_id>', methods=['GET'])
+@login_required
+@admin_required
+def api_investor_units(investor_id):
+    summary = InvestorUnits.query.get_or_404(investor_id)
+    fund = unitization.fund_nav()
+    return jsonify({'success': True, 'data': {'fund': fund, 'investor': unitization.investor_position(summary, fund)}})
@@ -0,0 +1,22 @@
+import hmac
+from flask import Blueprint, Response, current_app, request, session
+from extensions import limiter, metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+EXPOSITION_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+def _authorized() -> bool:
+    token = current_app.config.get('METRICS_TOKEN')
+    header = request.headers.get('Authorization', '')
+    if token and header.startswith('Bearer '):
+        return hmac.compare_digest(header[len('Bearer '):].encode(), token.encode())
+    return session.get('user', {}).get('role') == 'admin'
+
+@metrics_bp.route('/metrics', methods=['GET'])
+@limiter.exempt
+def metrics_endpoint():
+    """Prometheus text exposition of every worker's metrics"""
+    if not _authorized():
+        return Response('Unauthorized\n', status=401, mimetype='text/plain', headers={'WWW-Authenticate': 'Bearer'})
+    return Response(metrics.render(), content_type=EXPOSITION_CONTENT_TYPE)
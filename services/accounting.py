@@ -0,0 +1,201 @@
+from array import array
+
+FIFO = 'fifo'
+LIFO = 'lifo'
+AVERAGE = 'average'
+METHODS = (FIFO, LIFO, AVERAGE)
+
+
+class LotBook:
+    """
+    Open position of one currency under a cost method.
+
+    FIFO and LIFO keep open lots in two parallel ``array('d')`` buffers
+    (amounts, prices). FIFO consumes from a moving head index that is compacted
+    once half the buffer is spent; LIFO consumes from the tail. The average
+    method keeps only the running amount and cost basis. Every method keeps the
+    cost basis as a running total, so ``cost_basis`` and ``average_cost`` are
+    O(1) and can be read after each transaction.
+
+    Sells larger than the open position close it and the excess is counted in
+    ``unmatched_amount`` (same rule as the average-cost logic of the dashboard).
+    """
+
+    __slots__ = ('method', 'amounts', 'prices', 'head', '_amount', '_cost_basis', 'realized', 'unmatched_amount')
+
+    def __init__(self, method: str = FIFO):
+        if method not in METHODS:
+            raise ValueError(f"Unknown cost method '{method}', expected one of {', '.join(METHODS)}")
+        self.method = method
+        self.amounts = array('d')
+        self.prices = array('d')
+        self.head = 0
+        self._amount = 0.0
+        self._cost_basis = 0.0
+        self.realized = 0.0
+        self.unmatched_amount = 0.0
+
+    @classmethod
+    def from_average(cls, amount: float, cost_basis: float) -> 'LotBook':
+        """Restore an average-cost book from a stored (amount, cost_basis) state."""
+        book = cls(AVERAGE)
+        book._amount = amount
+        book._cost_basis = cost_basis
+        return book
+
+    def to_state(self) -> dict:
+        """JSON-serializable snapshot, open lots only."""
+        return {
+            'method': self.method,
+            'amount': self._amount,
+            'cost_basis': self._cost_basis,
+            'realized': self.realized,
+            'unmatched_amount': self.unmatched_amount,
+            'lots': [[self.amounts[i], self.prices[i]] for i in range(self.head, len(self.amounts))],
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> 'LotBook':
+        book = cls(state['method'])
+        book._amount = state['amount']
+        book._cost_basis = state['cost_basis']
+        book.realized = state['realized']
+        book.unmatched_amount = state['unmatched_amount']
+        for amount, price in state['lots']:
+            book.amounts.append(amount)
+            book.prices.append(price)
+        if book.method != AVERAGE:
+            # The lots are authoritative (states saved before the running total was kept have 0 here)
+            book._cost_basis = sum(amount * price for amount, price in state['lots'])
+        return book
+
+    @property
+    def amount(self) -> float:
+        return self._amount
+
+    @property
+    def cost_basis(self) -> float:
+        return self._cost_basis
+
+    @property
+    def average_cost(self) -> float:
+        return self.cost_basis / self._amount if self._amount > 0 else 0.0
+
+    def unrealized(self, price: float) -> float:
+        return self._amount * price - self.cost_basis
+
+    def apply(self, amount: float, price: float) -> float:
+        """Apply a signed transaction (positive buys, negative sells). Returns the realized P&L."""
+        if amount > 0:
+            self.buy(amount, price)
+            return 0.0
+        if amount < 0:
+            return self.sell(-amount, price)
+        return 0.0
+
+    def buy(self, amount: float, price: float) -> None:
+        self._amount += amount
+        self._cost_basis += amount * price
+        if self.method != AVERAGE:
+            self.amounts.append(amount)
+            self.prices.append(price)
+
+    def sell(self, amount: float, price: float) -> float:
+        if self._amount <= 0:
+            self.unmatched_amount += amount
+            return 0.0
+        matched = min(amount, self._amount)
+        self.unmatched_amount += amount - matched
+
+        if self.method == AVERAGE:
+            cost = self._cost_basis * matched / self._amount
+        elif self.method == FIFO:
+            cost = self._consume_head(matched)
+        else:
+            cost = self._consume_tail(matched)
+        self._cost_basis -= cost
+
+        self._amount -= matched
+        if self._amount <= 1e-12:
+            self._close()
+        pnl = matched * price - cost
+        self.realized += pnl
+        return pnl
+
+    def _consume_head(self, remaining: float) -> float:
+        amounts, prices = self.amounts, self.prices
+        head = self.head
+        cost = 0.0
+        while remaining > 0 and head < len(amounts):
+            lot = amounts[head]
+            if lot <= remaining:
+                cost += lot * prices[head]
+                remaining -= lot
+                head += 1
+            else:
+                cost += remaining * prices[head]
+                amounts[head] = lot - remaining
+                remaining = 0.0
+        if head > 1024 and head * 2 > len(amounts):
+            del amounts[:head]
+            del prices[:head]
+            head = 0
+        self.head = head
+        return cost
+
+    def _consume_tail(self, remaining: float) -> float:
+        amounts, prices = self.amounts, self.prices
+        cost = 0.0
+        while remaining > 0 and len(amounts) > self.head:
+            lot = amounts[-1]
+            if lot <= remaining:
+                cost += lot * prices[-1]
+                remaining -= lot
+                amounts.pop()
+                prices.pop()
+            else:
+                cost += remaining * prices[-1]
+                amounts[-1] = lot - remaining
+                remaining = 0.0
+        return cost
+
+    def _close(self) -> None:
+        self._amount = 0.0
+        self._cost_basis = 0.0
+        self.amounts = array('d')
+        self.prices = array('d')
+        self.head = 0
+
+
+def run_ledger(transactions, method: str = FIFO, books: dict = None) -> dict:
+    """
+    Process a stream of (currency_id, amount, price) sorted by effective date in
+    one linear pass. Returns {currency_id: LotBook}; pass ``books`` to continue
+    from an earlier state.
+    """
+    if books is None:
+        books = {}
+    for currency_id, amount, price in transactions:
+        book = books.get(currency_id)
+        if book is None:
+            book = books[currency_id] = LotBook(method)
+        if amount > 0:
+            book.buy(amount, price)
+        elif amount < 0:
+            book.sell(-amount, price)
+    return books
+
+
+def summarize(books: dict, prices: dict) -> dict:
+    """Realized and unrealized P&L per currency at the given prices ({currency_id: price})."""
+    positions = {}
+    for currency_id, book in books.items():
+        price = prices.get(currency_id)
+        positions[currency_id] = {
+            'amount': book.amount,
+            'cost_basis': book.cost_basis,
+            'average_cost': book.average_cost,
+            'realized_pnl': book.realized,
+            'unrealized_pnl': book.unrealized(price) if price is not None else None,
+        }
+    return positions
@@ -0,0 +1,207 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+from flask import url_for
+
+try:
+    import brotli
+except ImportError:  # optional, only .gz variants are written without it
+    brotli = None
+
+ASSET_FILES = ('dashboard-async.js', 'script.js', 'styles.css')
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+
+# Keywords after which a "/" starts a regular expression rather than a division
+_REGEX_KEYWORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete', 'void', 'throw', 'yield', 'await'}
+_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+
+
+def minify_css(text: str) -> str:
+    text = re.sub(r'/\*.*?\*/', '', text, flags=re.S)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\s*([{};:,>])\s*', r'\1', text)
+    return text.replace(';}', '}').strip()
+
+
+def _regex_allowed(out: list) -> bool:
+    code = ''.join(out[-40:]).rstrip()
+    if not code:
+        return True
+    if code[-1] in _REGEX_PRECEDERS:
+        return True
+    word = re.search(r'[A-Za-z_$][\w$]*$', code)
+    return bool(word) and word.group() in _REGEX_KEYWORDS
+
+
+def minify_js(text: str) -> str:
+    """
+    Conservative minifier: drops comments and indentation and collapses runs of
+    whitespace, leaving strings, template literals and regular expressions as
+    they are. Line breaks are kept so automatic semicolon insertion is unchanged.
+    """
+    out = []
+    i, n = 0, len(text)
+    # Brace depth inside each open ${...} of a template literal
+    template_stack = []
+    while i < n:
+        c = text[i]
+        nxt = text[i + 1] if i + 1 < n else ''
+        if c == '/' and nxt == '/':
+            while i < n and text[i] != '\n':
+                i += 1
+            continue
+        if c == '/' and nxt == '*':
+            end = text.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+            out.append(' ')
+            continue
+        if c in '"\'' or (c == '/' and _regex_allowed(out)):
+            start = i
+            i += 1
+            in_class = False
+            while i < n:
+                ch = text[i]
+                if ch == '\\':
+                    i += 2
+                    continue
+                if c == '/' and ch == '[':
+                    in_class = True
+                elif c == '/' and ch == ']':
+                    in_class = False
+                elif ch == c and not in_class:
+                    break
+                elif ch == '\n':
+                    break
+                i += 1
+            i += 1
+            out.append(text[start:i])
+            continue
+        if c == '`' or (c == '}' and template_stack and template_stack[-1] == 0):
+            if c == '}':
+                template_stack.pop()
+            start = i
+            i += 1
+            while i < n:
+                ch = text[i]
+                if ch == '\\':
+                    i += 2
+                    continue
+                if ch == '`':
+                    i += 1
+                    break
+                if ch == '$' and i + 1 < n and text[i + 1] == '{':
+                    i += 2
+                    template_stack.append(0)
+                    break
+                i += 1
+            out.append(text[start:i])
+            continue
+        if c in ' \t\r':
+            if out and out[-1][-1:] not in (' ', '\n'):
+                out.append(' ')
+            i += 1
+            continue
+        if template_stack:
+            if c == '{':
+                template_stack[-1] += 1
+            elif c == '}':
+                template_stack[-1] -= 1
+        out.append(c)
+        i += 1
+
+    lines = []
+    for line in ''.join(out).split('\n'):
+        line = line.strip()
+        if line:
+            lines.append(line)
+    return '\n'.join(lines) + '\n'
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+def build_assets(static_folder: str, files=ASSET_FILES, minify: bool = True) -> dict:
+    """
+    Write minified, content-hashed copies of the static files to static/dist,
+    with .gz (and .br when brotli is installed) variants and a manifest
+    mapping each source name to its hashed name.
+    """
+    dist = os.path.join(static_folder, DIST_DIR)
+    os.makedirs(dist, exist_ok=True)
+    manifest = {}
+    for filename in files:
+        with open(os.path.join(static_folder, filename), encoding='utf-8') as source:
+            text = source.read()
+        base, ext = os.path.splitext(filename)
+        if minify and ext in MINIFIERS:
+            text = MINIFIERS[ext](text)
+        data = text.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        hashed = f"{base}.{digest}{ext}"
+        path = os.path.join(dist, hashed)
+        with open(path, 'wb') as output:
+            output.write(data)
+        with open(path + '.gz', 'wb') as output:
+            output.write(gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            with open(path + '.br', 'wb') as output:
+                output.write(brotli.compress(data, quality=11))
+        manifest[filename] = hashed
+
+    with open(os.path.join(dist, MANIFEST_NAME), 'w', encoding='utf-8') as output:
+        json.dump(manifest, output, indent=2, sort_keys=True)
+    return manifest
+
+
+def prune_assets(static_folder: str, manifest: dict) -> list:
+    """Remove built files that the manifest no longer references."""
+    dist = os.path.join(static_folder, DIST_DIR)
+    keep = set(manifest.values())
+    removed = []
+    for name in os.listdir(dist):
+        if name == MANIFEST_NAME:
+            continue
+        if name.removesuffix('.gz').removesuffix('.br') not in keep:
+            os.remove(os.path.join(dist, name))
+            removed.append(name)
+    return removed
+
+
+class AssetManifest:
+    """
+    Resolves static file names to their fingerprinted build output.
+
+    Templates call ``asset_url('script.js')``. Without a build (development)
+    it falls back to the plain static URL.
+    """
+
+    def __init__(self, app=None):
+        self.manifest = None
+        self.dist_folder = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.dist_folder = os.path.join(app.static_folder, DIST_DIR)
+        app.jinja_env.globals['asset_url'] = self.asset_url
+
+    def load(self) -> dict:
+        if self.manifest is None:
+            try:
+                with open(os.path.join(self.dist_folder, MANIFEST_NAME), encoding='utf-8') as source:
+                    self.manifest = json.load(source)
+            except FileNotFoundError:
+                self.manifest = {}
+        return self.manifest
+
+    def is_built(self, hashed_name: str) -> bool:
+        return hashed_name in self.load().values()
+
+    def asset_url(self, filename: str) -> str:
+        hashed = self.load().get(filename)
+        if hashed is None:
+            return url_for('static', filename=filename)
+        return url_for('assets.serve_asset', filename=hashed)
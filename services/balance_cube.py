@@ -0,0 +1,209 @@
+import threading
+import time
+from datetime import date, datetime
+import numpy as np
+from sqlalchemy import select
+from models import db
+from models.exchange import Exchange, Strategy, ExchangeBalance
+from models.currency import Currency
+from models.change_log import table_versions
+
+DIMENSIONS = ('exchange', 'strategy', 'currency')
+MEASURES = ('start_balance_sum', 'end_balance_sum', 'balance_difference')
+CUBE_TABLES = ('tbl_balances_history', 'tbl_exchanges', 'tbl_strategies', 'tbl_currencies')
+
+
+def _ordinal(value) -> int:
+    if isinstance(value, datetime):
+        return value.date().toordinal()
+    if isinstance(value, date):
+        return value.toordinal()
+    return datetime.strptime(str(value)[:10], '%Y-%m-%d').date().toordinal()
+
+
+class BalanceCube:
+    """
+    Daily balances by exchange, strategy and currency in columnar NumPy arrays.
+
+    Cells are summed per (day, exchange, strategy, currency) at load time, the
+    same way the dashboard sums every balance row of a day. Rows are sorted by
+    day so a day is a contiguous slice found with a binary search; queries then
+    aggregate that slice with ``np.bincount`` over the requested dimensions.
+    """
+
+    def __init__(self, rows, labels: dict):
+        """
+        rows: iterable of (day ordinal, exchange_id, strategy_id, currency_id, balance)
+        labels: {dimension: {id: name}}
+
+        A NULL id is stored as 0 (database ids start at 1) and reported as None.
+        """
+        rows = list(rows)
+        raw = {
+            'day': np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows)),
+            'exchange': np.fromiter((row[1] or 0 for row in rows), dtype=np.int64, count=len(rows)),
+            'strategy': np.fromiter((row[2] or 0 for row in rows), dtype=np.int64, count=len(rows)),
+            'currency': np.fromiter((row[3] or 0 for row in rows), dtype=np.int64, count=len(rows)),
+        }
+        values = np.fromiter((row[4] or 0.0 for row in rows), dtype=np.float64, count=len(rows))
+
+        # Dense 0..n-1 codes per dimension; ids holds the database id of each code
+        self.ids = {}
+        codes = {}
+        for dimension in DIMENSIONS:
+            self.ids[dimension], codes[dimension] = np.unique(raw[dimension], return_inverse=True)
+        self.labels = labels
+        self.sizes = {dimension: max(len(self.ids[dimension]), 1) for dimension in DIMENSIONS}
+
+        # One cell per (day, exchange, strategy, currency), sorted by day
+        cell = raw['day']
+        for dimension in DIMENSIONS:
+            cell = cell * self.sizes[dimension] + codes[dimension]
+        cells, inverse = np.unique(cell, return_inverse=True)
+        self.values = np.bincount(inverse, weights=values, minlength=len(cells))
+        self.columns = {}
+        for dimension in reversed(DIMENSIONS):
+            self.columns[dimension] = cells % self.sizes[dimension]
+            cells = cells // self.sizes[dimension]
+        self.days = cells
+        self.row_count = len(rows)
+
+    def __len__(self):
+        return len(self.values)
+
+    def _day_slice(self, day: int) -> slice:
+        return slice(np.searchsorted(self.days, day, 'left'), np.searchsorted(self.days, day, 'right'))
+
+    def _codes(self, dimension: str, selected_ids) -> np.ndarray:
+        return np.flatnonzero(np.isin(self.ids[dimension], list(selected_ids)))
+
+    def _aggregate(self, day: int, by: list, filters: dict):
+        """Sums and row presence of one day over the ``by`` dimensions."""
+        part = self._day_slice(day)
+        values = self.values[part]
+        mask = np.ones(len(values), dtype=bool)
+        for dimension, selected_ids in filters.items():
+            mask &= np.isin(self.columns[dimension][part], self._codes(dimension, selected_ids))
+
+        group = np.zeros(len(values), dtype=np.int64)
+        size = 1
+        for dimension in by:
+            group = group * self.sizes[dimension] + self.columns[dimension][part]
+            size *= self.sizes[dimension]
+        sums = np.bincount(group[mask], weights=values[mask], minlength=size)
+        present = np.bincount(group[mask], minlength=size) > 0
+        return sums, present
+
+    def _label(self, dimension: str, code: int) -> dict:
+        entity_id = int(self.ids[dimension][code]) or None
+        return {'id': entity_id, 'name': self.labels[dimension].get(entity_id)}
+
+    def query(self, start_date, end_date, by=(), filters=None) -> dict:
+        """
+        Roll-up of the balance change between two days.
+
+        by: dimensions to keep (none gives the fund total)
+        filters: slice, {dimension: ids to keep}
+        """
+        filters = filters or {}
+        by = list(by)
+        start_sums, start_present = self._aggregate(_ordinal(start_date), by, filters)
+        end_sums, end_present = self._aggregate(_ordinal(end_date), by, filters)
+        groups = np.flatnonzero(start_present | end_present)
+
+        shape = [self.sizes[dimension] for dimension in by]
+        rows = []
+        for group in groups:
+            row = {}
+            if by:
+                for dimension, code in zip(by, np.unravel_index(group, shape)):
+                    row[dimension] = self._label(dimension, code)
+            row.update({
+                'start_balance_sum': float(start_sums[group]),
+                'end_balance_sum': float(end_sums[group]),
+                'balance_difference': float(end_sums[group] - start_sums[group]),
+            })
+            rows.append(row)
+
+        start_total, end_total = float(start_sums.sum()), float(end_sums.sum())
+        return {
+            'start_date': str(start_date),
+            'end_date': str(end_date),
+            'by': by,
+            'rows': rows,
+            'total': {
+                'start_balance_sum': start_total,
+                'end_balance_sum': end_total,
+                'balance_difference': end_total - start_total,
+            },
+        }
+
+    def pivot(self, start_date, end_date, row_dimension: str, column_dimension: str,
+              measure: str = 'balance_difference', filters=None) -> dict:
+        """Two dimensions as a matrix of one measure, rows and columns without data left out."""
+        filters = filters or {}
+        by = [row_dimension, column_dimension]
+        start_sums, start_present = self._aggregate(_ordinal(start_date), by, filters)
+        end_sums, end_present = self._aggregate(_ordinal(end_date), by, filters)
+        shape = (self.sizes[row_dimension], self.sizes[column_dimension])
+        matrix = {
+            'start_balance_sum': start_sums,
+            'end_balance_sum': end_sums,
+            'balance_difference': end_sums - start_sums,
+        }[measure].reshape(shape)
+        present = (start_present | end_present).reshape(shape)
+        row_codes = np.flatnonzero(present.any(axis=1))
+        column_codes = np.flatnonzero(present.any(axis=0))
+        matrix = matrix[np.ix_(row_codes, column_codes)]
+        return {
+            'start_date': str(start_date),
+            'end_date': str(end_date),
+            'measure': measure,
+            'rows': [self._label(row_dimension, code) for code in row_codes],
+            'columns': [self._label(column_dimension, code) for code in column_codes],
+            'values': matrix.tolist(),
+            'row_totals': matrix.sum(axis=1).tolist(),
+            'column_totals': matrix.sum(axis=0).tolist(),
+        }
+
+
+def load_cube() -> BalanceCube:
+    rows = db.session.execute(select(
+        ExchangeBalance.update_datetime, ExchangeBalance.exchange_id, ExchangeBalance.strategy_id,
+        ExchangeBalance.currency_id, ExchangeBalance.balance,
+    ).where(ExchangeBalance.update_datetime.is_not(None))).all()
+    labels = {
+        'exchange': dict(db.session.execute(select(Exchange.id, Exchange.name)).all()),
+        'strategy': dict(db.session.execute(select(Strategy.id, Strategy.name)).all()),
+        'currency': dict(db.session.execute(select(Currency.id, Currency.code)).all()),
+    }
+    return BalanceCube(((_ordinal(row[0]), row[1], row[2], row[3], row[4]) for row in rows), labels)
+
+
+class CubeCache:
+    """
+    The cube of the current data version, per worker process. A write logged in
+    the change log to balances or to the reference tables triggers a reload on
+    the next query; ``max_age`` bounds staleness from writes made outside the app.
+    """
+
+    def __init__(self, max_age: float = 300.0):
+        self.max_age = max_age
+        self._cube = None
+        self._version = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> BalanceCube:
+        versions = table_versions()
+        version = tuple(versions.get(table, 0) for table in CUBE_TABLES)
+        with self._lock:
+            if (self._cube is None or version != self._version
+                    or time.monotonic() - self._loaded_at > self.max_age):
+                self._cube = load_cube()
+                self._version = version
+                self._loaded_at = time.monotonic()
+            return self._cube
+
+
+cube_cache = CubeCache()
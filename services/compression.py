@@ -0,0 +1,38 @@
+import gzip
+from flask import request
+
+
+class JsonCompressor:
+    """
+    Gzips JSON responses larger than ``min_size`` bytes for clients that accept it.
+
+    Smaller bodies are sent as they are, the few bytes saved do not pay for the
+    compression time.
+    """
+
+    def __init__(self, app=None, min_size: int = 1024, level: int = 6):
+        self.min_size = min_size
+        self.level = level
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.min_size = app.config.get('JSON_COMPRESS_MIN_SIZE', self.min_size)
+        self.level = app.config.get('JSON_COMPRESS_LEVEL', self.level)
+        app.after_request(self._compress)
+
+    def _compress(self, response):
+        if (response.mimetype != 'application/json'
+                or response.direct_passthrough
+                or response.is_streamed
+                or 'Content-Encoding' in response.headers
+                or response.status_code < 200 or response.status_code >= 300
+                or request.accept_encodings.quality('gzip') <= 0):
+            return response
+        body = response.get_data()
+        if len(body) < self.min_size:
+            return response
+        response.set_data(gzip.compress(body, compresslevel=self.level))
+        response.headers['Content-Encoding'] = 'gzip'
+        response.vary.add('Accept-Encoding')
+        return response
@@ -0,0 +1,182 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from sqlalchemy import select, insert, func
+from models import db
+from models.currency import Currency
+from models.exchange import CryptoTransaction, CryptoPosition
+from models.change_log import record_changes
+from services.accounting import LotBook, AVERAGE
+
+FORMATS = ('csv', 'ndjson')
+
+
+class LedgerValidationError(ValueError):
+    def __init__(self, errors: list):
+        super().__init__(f"{len(errors)} invalid rows")
+        self.errors = errors
+
+
+def parse_rows(content: str, fmt: str) -> list:
+    """Parse a CSV (with header) or NDJSON document into a list of raw dicts."""
+    if fmt == 'csv':
+        return list(csv.DictReader(io.StringIO(content)))
+    if fmt == 'ndjson':
+        rows = []
+        for line_number, line in enumerate(content.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                raise LedgerValidationError([{'line': line_number, 'error': f'Invalid JSON: {e.msg}'}])
+        return rows
+    raise ValueError(f"Unsupported format '{fmt}', expected one of {', '.join(FORMATS)}")
+
+
+def _parse_datetime(value) -> datetime:
+    """ISO 8601; a value with a UTC offset is converted to naive UTC like the stored dates."""
+    parsed = datetime.fromisoformat(str(value).strip())
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def validate_rows(raw_rows: list, currency_ids_by_code: dict) -> list:
+    """
+    Turn raw rows into CryptoTransaction column dicts.
+    Rows reference a currency either by 'currency' (code) or 'currency_id'.
+    Raises LedgerValidationError listing every invalid row.
+    """
+    known_ids = set(currency_ids_by_code.values())
+    rows = []
+    errors = []
+    now = datetime.now()
+
+    for line_number, raw in enumerate(raw_rows, start=1):
+        try:
+            if raw.get('currency'):
+                currency_id = currency_ids_by_code.get(str(raw['currency']).strip().upper())
+                if currency_id is None:
+                    raise ValueError(f"unknown currency '{raw['currency']}'")
+            else:
+                currency_id = int(raw['currency_id'])
+                if currency_id not in known_ids:
+                    raise ValueError(f"unknown currency_id {currency_id}")
+            amount = float(raw['amount'])
+            if amount == 0:
+                raise ValueError("amount must not be zero")
+            rows.append({
+                'effective_date': _parse_datetime(raw['effective_date']),
+                'currency_id': currency_id,
+                'amount': amount,
+                'price': float(raw['price']),
+                'investor_id': int(raw['investor_id']) if raw.get('investor_id') not in (None, '') else None,
+                'update_datetime': now,
+            })
+        except KeyError as e:
+            errors.append({'line': line_number, 'error': f"missing field {e.args[0]}"})
+        except (TypeError, ValueError) as e:
+            errors.append({'line': line_number, 'error': str(e)})
+
+    if errors:
+        raise LedgerValidationError(errors)
+    return rows
+
+
+def _store_position(position: CryptoPosition, book: LotBook, last_effective_date):
+    position.amount = book.amount
+    position.cost_basis = book.cost_basis
+    position.average_cost = book.average_cost
+    position.last_effective_date = last_effective_date
+    position.update_datetime = datetime.now()
+
+
+def rebuild_position(currency_id: int) -> CryptoPosition:
+    """Replay the full ledger of one currency."""
+    position = db.session.get(CryptoPosition, currency_id, with_for_update=True) or CryptoPosition(currency_id=currency_id)
+    db.session.add(position)
+    book = LotBook(AVERAGE)
+    last_effective_date = None
+    history = db.session.execute(
+        select(CryptoTransaction.amount, CryptoTransaction.price, CryptoTransaction.effective_date)
+        .where(CryptoTransaction.currency_id == currency_id)
+        .order_by(CryptoTransaction.effective_date, CryptoTransaction.id)
+    )
+    for tx_amount, tx_price, effective_date in history:
+        book.apply(tx_amount, tx_price)
+        last_effective_date = effective_date
+    _store_position(position, book, last_effective_date)
+    return position
+
+
+def _has_prior_history(currency_id: int, batch_size: int) -> bool:
+    count = db.session.scalar(
+        select(func.count(CryptoTransaction.id)).where(CryptoTransaction.currency_id == currency_id)
+    )
+    return count > batch_size
+
+
+def ingest_transactions(rows: list, chunk_size: int = 1000) -> dict:
+    """
+    Insert validated rows in chunks and bring the affected positions up to date.
+
+    Rows dated on or after a currency's last_effective_date are applied to its
+    stored state in O(batch). If any row is back-dated, that currency alone is
+    rebuilt from its full history. Everything is committed in one transaction.
+
+    The positions are locked first, so a concurrent import of the same
+    currencies waits and then starts from the state this one stored.
+    """
+    rows_by_currency = {}
+    for row in rows:
+        rows_by_currency.setdefault(row['currency_id'], []).append(row)
+
+    positions = {
+        position.currency_id: position
+        for position in db.session.scalars(
+            select(CryptoPosition)
+            .where(CryptoPosition.currency_id.in_(rows_by_currency.keys()))
+            .order_by(CryptoPosition.currency_id)
+            .with_for_update()
+        )
+    }
+
+    for start in range(0, len(rows), chunk_size):
+        db.session.execute(insert(CryptoTransaction), rows[start:start + chunk_size])
+    record_changes(CryptoTransaction.__tablename__, 'insert', [(None, row['effective_date']) for row in rows])
+
+    rebuilt = []
+    for currency_id, currency_rows in rows_by_currency.items():
+        # Stable sort keeps file order for rows on the same date, matching insertion (id) order
+        currency_rows.sort(key=lambda row: row['effective_date'])
+        position = positions.get(currency_id)
+        if position is None:
+            # No stored state yet: seed it by replay if the ledger already had rows for this currency
+            needs_rebuild = _has_prior_history(currency_id, len(currency_rows))
+        else:
+            needs_rebuild = (
+                position.last_effective_date is not None
+                and currency_rows[0]['effective_date'] < position.last_effective_date
+            )
+
+        if needs_rebuild:
+            rebuild_position(currency_id)
+            rebuilt.append(currency_id)
+            continue
+
+        if position is None:
+            position = CryptoPosition(currency_id=currency_id, amount=0.0, cost_basis=0.0)
+            db.session.add(position)
+        book = LotBook.from_average(position.amount or 0.0, position.cost_basis or 0.0)
+        for row in currency_rows:
+            book.apply(row['amount'], row['price'])
+        _store_position(position, book, currency_rows[-1]['effective_date'])
+
+    db.session.commit()
+    return {'inserted': len(rows), 'currencies': len(rows_by_currency), 'rebuilt_currencies': rebuilt}
+
+
+def currency_ids_by_code() -> dict:
+    return {code.upper(): currency_id for currency_id, code in db.session.execute(select(Currency.id, Currency.code))}
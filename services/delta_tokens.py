@@ -0,0 +1,69 @@
+import sqlite3
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeSerializer
+from extensions import job_queue
+from models.change_log import changed_since
+
+# Tokens travel in the query string; a bigger state is kept in the job queue
+# file and the token only carries its id.
+TOKEN_MAX_LENGTH = 3000
+
+
+def _serializer() -> URLSafeSerializer:
+    return URLSafeSerializer(current_app.secret_key, salt='dashboard-delta')
+
+
+def issue_token(kind: str, start_date: str, end_date: str, cursor: int, state: dict, **params) -> str:
+    """
+    Sign the state of a computed range. cursor is the change log position read
+    before the computation started.
+    """
+    payload = {
+        'kind': kind,
+        'start_date': start_date,
+        'end_date': end_date,
+        'cursor': cursor,
+        'params': params,
+    }
+    token = _serializer().dumps(dict(payload, state=state))
+    if len(token) <= TOKEN_MAX_LENGTH:
+        return token
+    try:
+        state_id = job_queue.put_state(state)
+    except sqlite3.Error:
+        current_app.logger.warning("No delta token for %s %s..%s: the %d byte state could not be stored",
+                                   kind, start_date, end_date, len(token), exc_info=True)
+        return None
+    return _serializer().dumps(dict(payload, state_id=state_id))
+
+
+def load_previous(token: str, kind: str, start_date: str, end_date: str, previous_end_date: str, tables: list, **params):
+    """
+    State of [start_date, previous_end_date] when it can be extended to end_date,
+    otherwise None and the caller computes the whole range.
+
+    The token is rejected when it is for another range or parameters, or when
+    the change log shows a write to the tables on or before previous_end_date
+    since it was issued: those days would have to be recomputed.
+    """
+    if not token or not previous_end_date or previous_end_date >= end_date:
+        return None
+    try:
+        payload = _serializer().loads(token)
+    except BadSignature:
+        return None
+    if (payload.get('kind') != kind
+            or payload.get('start_date') != start_date
+            or payload.get('end_date') != previous_end_date
+            or payload.get('params') != params):
+        return None
+    if changed_since(payload['cursor'], tables, previous_end_date):
+        return None
+    state = payload.get('state')
+    if 'state_id' in payload:
+        state = job_queue.get_state(payload['state_id'])
+        if state is None:
+            current_app.logger.info("Delta state %s of %s %s..%s expired, computing the whole range",
+                                    payload['state_id'], kind, start_date, previous_end_date)
+            return None
+    return dict(state, end_date=previous_end_date)
@@ -0,0 +1,121 @@
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from flask import g, request
+from jinja2 import pass_context
+from markupsafe import Markup
+
+
+class FragmentCache:
+    """
+    Per-worker LRU of rendered template fragments.
+
+    Templates wrap a block in a call block::
+
+        {% call cache_fragment('balances_rows', ['tbl_balances_history'], start_date, end_date) %}
+            ...
+        {% endcall %}
+
+    The key is the template, the fragment name, the extra arguments and the
+    change log version of every listed table, so any write to one of those tables makes the next
+    render miss. Writes that bypass the change log (another service inserting
+    rows directly) are picked up when the entry expires after ``ttl`` seconds.
+
+    The cache is bounded by the total size of the stored fragments. Hits record
+    the render time of the fragment they replaced, per endpoint.
+    """
+
+    def __init__(self, app=None, max_bytes: int = 16 * 1024 * 1024, ttl: float = 300.0):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.enabled = True
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.route_stats = defaultdict(lambda: {'hits': 0, 'misses': 0, 'render_ms': 0.0, 'saved_ms': 0.0})
+        self.evictions = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.max_bytes = app.config.get('FRAGMENT_CACHE_MAX_BYTES', self.max_bytes)
+        self.ttl = app.config.get('FRAGMENT_CACHE_TTL', self.ttl)
+        self.enabled = app.config.get('FRAGMENT_CACHE_ENABLED', self.enabled)
+        app.jinja_env.globals['cache_fragment'] = self.cache_fragment
+
+    @staticmethod
+    def _versions(tables) -> tuple:
+        if not tables:
+            return ()
+        # One change log query per request, shared by every fragment on the page
+        from models.change_log import table_versions
+        versions = g.get('_fragment_versions')
+        if versions is None:
+            versions = g._fragment_versions = table_versions()
+        return tuple(versions.get(table, 0) for table in tables)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[2] < time.monotonic():
+                self._discard(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, html: str, render_seconds: float):
+        size = len(html)
+        if size > self.max_bytes // 4:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._discard(key)
+            self._entries[key] = (html, render_seconds, time.monotonic() + self.ttl)
+            self._size += size
+            while self._size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+                self.evictions += 1
+
+    def _discard(self, key):
+        html = self._entries.pop(key)[0]
+        self._size -= len(html)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    @pass_context
+    def cache_fragment(self, context, name: str, tables=(), *vary, caller=None):
+        if not self.enabled:
+            return Markup(caller())
+        # Fragment names only need to be unique within a template
+        key = (context.name, name, tuple(tables), self._versions(tables), vary)
+        stats = self.route_stats[request.endpoint or name]
+        entry = self.get(key)
+        if entry is not None:
+            stats['hits'] += 1
+            stats['saved_ms'] += entry[1] * 1000
+            return Markup(entry[0])
+
+        started = time.perf_counter()
+        html = str(caller())
+        elapsed = time.perf_counter() - started
+        stats['misses'] += 1
+        stats['render_ms'] += elapsed * 1000
+        self.set(key, html, elapsed)
+        return Markup(html)
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = len(self._entries), self._size
+        return {
+            'entries': entries,
+            'bytes': size,
+            'max_bytes': self.max_bytes,
+            'evictions': self.evictions,
+            'routes': {endpoint: dict(values) for endpoint, values in self.route_stats.items()},
+        }
@@ -0,0 +1,265 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from services.shared_files import SQLiteConnections, is_alive
+
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+
+
+def job_key(kind: str, params: dict) -> str:
+    return kind + ':' + json.dumps(params, sort_keys=True)
+
+
+class JobQueue:
+    """
+    Background jobs shared by every worker process on the host, without a broker.
+
+    Jobs live in a SQLite file (WAL mode), like the rate limit counters. Each
+    process that submits or polls a job starts ``workers`` threads; they claim
+    the oldest queued job in a ``BEGIN IMMEDIATE`` transaction, call the handler
+    registered for its kind inside an app context and store the JSON result.
+
+    Submitting a job while one with the same kind and parameters is queued or
+    running returns that job, so concurrent requests share one computation. A
+    finished job is returned again for ``result_ttl`` seconds if the caller's
+    ``fresh`` check accepts it. Jobs left running by a process that died are
+    queued again.
+
+    The same file keeps small JSON states for ``state_ttl`` seconds, so that
+    any worker process can read a value another one stored (dashboard delta
+    states too large for a URL).
+    """
+
+    def __init__(self, app=None, workers: int = 1, result_ttl: float = 600.0,
+                 poll_interval: float = 0.5, cleanup_interval: float = 60.0, state_ttl: float = 86400.0):
+        self.handlers = {}
+        self.app = None
+        self.path = None
+        self.workers = workers
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        self.cleanup_interval = cleanup_interval
+        self.state_ttl = state_ttl
+        self._connections = None
+        self._wake = threading.Event()
+        self._workers_pid = None
+        self._start_lock = threading.Lock()
+        self._next_cleanup = 0.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.path = app.config['JOB_QUEUE_PATH']
+        self._connections = SQLiteConnections(self.path, row_factory=sqlite3.Row)
+        self.workers = app.config.get('JOB_WORKERS', self.workers)
+        self.result_ttl = app.config.get('JOB_RESULT_TTL', self.result_ttl)
+        self.state_ttl = app.config.get('DELTA_STATE_TTL', self.state_ttl)
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, key TEXT NOT NULL, kind TEXT NOT NULL, params TEXT NOT NULL, "
+            "version INTEGER, status TEXT NOT NULL, progress REAL NOT NULL DEFAULT 0, message TEXT, "
+            "result TEXT, error TEXT, pid INTEGER, created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+        )
+        # At most one active job per key: the dedupe is enforced by the database
+        conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS jobs_active_key ON jobs (key) "
+            "WHERE status IN ('queued', 'running')"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS states (id TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+
+    def handler(self, kind: str):
+        """Register ``fn(params, progress)`` for a job kind; progress(done, total, message)."""
+        def register(fn):
+            self.handlers[kind] = fn
+            return fn
+        return register
+
+    def _connection(self) -> sqlite3.Connection:
+        return self._connections.get()
+
+    @staticmethod
+    def _as_dict(row) -> dict:
+        job = dict(row)
+        job['params'] = json.loads(job['params'])
+        job['result'] = json.loads(job['result']) if job['result'] is not None else None
+        return job
+
+    # Submission and status
+
+    def submit(self, kind: str, params: dict, version: int = None, fresh=None) -> dict:
+        """
+        Queue a job, or return the identical job already queued or running.
+
+        version: opaque value stored with the job (e.g. the change log cursor)
+        fresh: fn(job) deciding whether a finished job may be returned instead
+        """
+        if kind not in self.handlers:
+            raise LookupError(f"No handler for job kind '{kind}'")
+        key = job_key(kind, params)
+        conn = self._connection()
+        now = time.time()
+
+        if fresh is not None:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE key = ? AND status = ? AND finished_at > ? "
+                "ORDER BY finished_at DESC LIMIT 1",
+                (key, DONE, now - self.result_ttl),
+            ).fetchone()
+            if row is not None and fresh(self._as_dict(row)):
+                return self._as_dict(row)
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE key = ? AND status IN (?, ?)", (key, QUEUED, RUNNING)
+            ).fetchone()
+            if row is None:
+                job_id = uuid.uuid4().hex
+                conn.execute(
+                    "INSERT INTO jobs (id, key, kind, params, version, status, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (job_id, key, kind, json.dumps(params), version, QUEUED, now),
+                )
+                self._maybe_cleanup(conn, now)
+                row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        self._ensure_workers()
+        self._wake.set()
+        return self._as_dict(row)
+
+    def get(self, job_id: str):
+        row = self._connection().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        # The process that queued the job may be gone; make sure this one works the queue
+        if row['status'] in (QUEUED, RUNNING):
+            self._ensure_workers()
+        return self._as_dict(row)
+
+    def _maybe_cleanup(self, conn: sqlite3.Connection, now: float):
+        if now < self._next_cleanup:
+            return
+        self._next_cleanup = now + self.cleanup_interval
+        conn.execute(
+            "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at <= ?", (DONE, FAILED, now - self.result_ttl)
+        )
+        conn.execute("DELETE FROM states WHERE created_at <= ?", (now - self.state_ttl,))
+        # Jobs of processes that died while running them
+        for row in conn.execute("SELECT id, pid FROM jobs WHERE status = ?", (RUNNING,)).fetchall():
+            if row['pid'] != os.getpid() and not is_alive(row['pid']):
+                conn.execute(
+                    "UPDATE jobs SET status = ?, pid = NULL, started_at = NULL, progress = 0, message = NULL, error = NULL "
+                    "WHERE id = ?",
+                    (QUEUED, row['id']),
+                )
+
+    # Stored states
+
+    def put_state(self, value) -> str:
+        """Keep a JSON-serializable value for state_ttl seconds and return its id."""
+        state_id = uuid.uuid4().hex
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO states (id, value, created_at) VALUES (?, ?, ?)", (state_id, json.dumps(value), now)
+            )
+            self._maybe_cleanup(conn, now)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return state_id
+
+    def get_state(self, state_id: str):
+        """The value stored under state_id, None once it expired."""
+        row = self._connection().execute(
+            "SELECT value FROM states WHERE id = ? AND created_at > ?", (state_id, time.time() - self.state_ttl)
+        ).fetchone()
+        return json.loads(row['value']) if row is not None else None
+
+    # Workers
+
+    def _ensure_workers(self):
+        # Threads do not survive fork: start them per worker process, lazily
+        if self._workers_pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._workers_pid == os.getpid():
+                return
+            self._workers_pid = os.getpid()
+            for number in range(self.workers):
+                threading.Thread(target=self._work, name=f'job-worker-{number}', daemon=True).start()
+
+    def _work(self):
+        while True:
+            try:
+                job = self._claim()
+            except sqlite3.Error:
+                job = None
+            if job is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+            try:
+                self._run(job)
+            except Exception:
+                # Recording the outcome failed (e.g. the jobs file stayed locked); keep the thread serving jobs
+                self.app.logger.exception("Job %s (%s) could not be recorded", job['id'], job['kind'])
+
+    def _claim(self):
+        conn = self._connection()
+        now = time.time()
+        # Cheap read first: idle workers should not take the write lock on every poll
+        if now < self._next_cleanup and conn.execute(
+            "SELECT 1 FROM jobs WHERE status = ? LIMIT 1", (QUEUED,)
+        ).fetchone() is None:
+            return None
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._maybe_cleanup(conn, now)
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, pid = ?, started_at = ? WHERE id = ?",
+                    (RUNNING, os.getpid(), now, row['id']),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return self._as_dict(row) if row is not None else None
+
+    def _update(self, job_id: str, **fields):
+        assignments = ', '.join(f"{name} = ?" for name in fields)
+        self._connection().execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def _run(self, job: dict):
+        def progress(done: float, total: float = None, message: str = None):
+            fraction = done / total if total else done
+            self._update(job['id'], progress=min(max(fraction, 0.0), 1.0), message=message)
+
+        try:
+            with self.app.app_context():
+                result = self.handlers[job['kind']](job['params'], progress)
+            self._update(job['id'], status=DONE, progress=1.0, message=None,
+                         result=json.dumps(result), finished_at=time.time())
+        except Exception as e:
+            self.app.logger.exception("Job %s (%s) failed", job['id'], job['kind'])
+            self._update(job['id'], status=FAILED, error=str(e), finished_at=time.time())
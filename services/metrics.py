@@ -0,0 +1,350 @@
+import json
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from flask import g, request
+from sqlalchemy import bindparam, event, func, inspect, select, table, text
+from sqlalchemy.pool import Pool
+from services.shared_files import is_alive
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SNAPSHOT_PREFIX = "metrics-"
+# Counters and histograms of exited workers, summed into one snapshot
+RETIRED_SNAPSHOT = SNAPSHOT_PREFIX + "retired.json"
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    def __init__(self, registry, name: str, help_text: str, kind: str, labelnames=(), buckets=None, mode: str = 'sum'):
+        self.registry = registry
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) if buckets else None
+        # How gauges of several processes combine: 'sum', 'max', 'all' (one series
+        # per pid) or 'local' (only the scraping process, never written to disk)
+        self.mode = mode
+        self.values = {}
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def set(self, value: float, **labels):
+        with self.registry.lock:
+            self.values[self._key(labels)] = float(value)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            state = self.values.get(key)
+            if state is None:
+                # Per-bucket (non-cumulative) counts, then sum and count
+                state = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            state[bisect_left(self.buckets, value)] += 1
+            state[-2] += value
+            state[-1] += 1
+
+
+class MetricsRegistry:
+    """
+    Counters, gauges and histograms shared by every worker process.
+
+    Each process keeps its samples in memory and a background thread writes a
+    snapshot to ``METRICS_DIR/metrics-<pid>.json`` every ``flush_interval``
+    seconds. A scrape reads every snapshot and merges them: counters and
+    histograms are summed (also from workers that have exited, so totals do not
+    go backwards); gauges only come from live processes. When a worker exits,
+    the gunicorn master folds its snapshot into ``metrics-retired.json`` before
+    a new worker can be given the same pid.
+
+    Collectors registered with ``add_collector`` run before each snapshot and
+    set values that are sampled rather than counted (pool gauges, cache stats);
+    ``scrape_only`` collectors run in the scraping process only.
+    """
+
+    def __init__(self, app=None, flush_interval: float = 1.0):
+        self.metrics = {}
+        self.collectors = []
+        self.scrape_collectors = []
+        self.lock = threading.RLock()
+        self.directory = None
+        self.flush_interval = flush_interval
+        self._flusher_pid = None
+
+        self.request_latency = self.histogram('http_request_duration_seconds', 'Request latency by endpoint.', ('endpoint', 'method'))
+        self.requests = self.counter('http_requests_total', 'Requests by endpoint and status code.', ('endpoint', 'method', 'status'))
+        self.dashboard_errors = self.counter('dashboard_api_errors_total', 'Exceptions caught by the dashboard JSON APIs.', ('endpoint',))
+        if app is not None:
+            self.init_app(app)
+
+    def counter(self, name: str, help_text: str, labelnames=()) -> Metric:
+        return self._register(Metric(self, name, help_text, 'counter', labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames=(), mode: str = 'sum') -> Metric:
+        return self._register(Metric(self, name, help_text, 'gauge', labelnames, mode=mode))
+
+    def histogram(self, name: str, help_text: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> Metric:
+        return self._register(Metric(self, name, help_text, 'histogram', labelnames, buckets=buckets))
+
+    def _register(self, metric: Metric) -> Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def add_collector(self, collector, scrape_only: bool = False):
+        (self.scrape_collectors if scrape_only else self.collectors).append(collector)
+
+    def init_app(self, app):
+        self.directory = app.config.get('METRICS_DIR')
+        self.flush_interval = app.config.get('METRICS_FLUSH_INTERVAL', self.flush_interval)
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+        app.before_request(self._start_timer)
+        app.after_request(self._record_status)
+        app.teardown_request(self._record_request)
+
+    # Request instrumentation
+
+    def _start_timer(self):
+        g._metrics_started = time.perf_counter()
+        self._ensure_flusher()
+
+    def _record_request(self, error=None):
+        started = g.pop('_metrics_started', None)
+        if started is None:
+            return
+        endpoint = request.endpoint or 'unmatched'
+        self.request_latency.observe(time.perf_counter() - started, endpoint=endpoint, method=request.method)
+        status = 500 if error is not None else g.pop('_metrics_status', 200)
+        self.requests.inc(endpoint=endpoint, method=request.method, status=status)
+
+    def _record_status(self, response):
+        g._metrics_status = response.status_code
+        return response
+
+    # Multiprocess snapshots
+
+    def _ensure_flusher(self):
+        # Threads do not survive fork: start one per worker process, lazily
+        if not self.directory or self._flusher_pid == os.getpid():
+            return
+        self._flusher_pid = os.getpid()
+        threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True).start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                pass
+
+    def snapshot(self, local: bool = False) -> dict:
+        for collector in self.collectors + (self.scrape_collectors if local else []):
+            collector(self)
+        with self.lock:
+            return {
+                name: [[list(key), value] for key, value in metric.values.items()]
+                for name, metric in self.metrics.items()
+                if local or metric.mode != 'local'
+            }
+
+    def flush(self):
+        if not self.directory:
+            return
+        _write_snapshot(os.path.join(self.directory, f"{SNAPSHOT_PREFIX}{os.getpid()}.json"), self.snapshot())
+
+    def _snapshots(self):
+        """(pid, alive, snapshot) of every process, this one read from memory (pid None: retired workers)."""
+        own_pid = os.getpid()
+        yield own_pid, True, self.snapshot(local=True)
+        if not self.directory:
+            return
+        for name in os.listdir(self.directory):
+            if not name.startswith(SNAPSHOT_PREFIX) or not name.endswith('.json'):
+                continue
+            pid = None if name == RETIRED_SNAPSHOT else int(name[len(SNAPSHOT_PREFIX):-len('.json')])
+            if pid == own_pid:
+                continue
+            snapshot = _read_snapshot(os.path.join(self.directory, name))
+            if snapshot is None:
+                continue
+            yield pid, pid is not None and is_alive(pid), snapshot
+
+    # Exposition
+
+    def render(self) -> str:
+        merged = {name: {} for name in self.metrics}
+        for pid, alive, snapshot in self._snapshots():
+            for name, samples in snapshot.items():
+                metric = self.metrics.get(name)
+                if metric is None:
+                    continue
+                if metric.kind == 'gauge' and not alive:
+                    continue
+                series = merged[name]
+                for key, value in samples:
+                    key = tuple(key)
+                    if metric.kind == 'gauge' and metric.mode == 'all':
+                        key = key + (str(pid),)
+                    if key not in series:
+                        series[key] = list(value) if isinstance(value, list) else value
+                    elif metric.kind == 'histogram':
+                        series[key] = [a + b for a, b in zip(series[key], value)]
+                    elif metric.kind == 'gauge' and metric.mode == 'max':
+                        series[key] = max(series[key], value)
+                    else:
+                        series[key] = series[key] + value
+
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            labelnames = metric.labelnames + (('pid',) if metric.kind == 'gauge' and metric.mode == 'all' else ())
+            for key, value in sorted(merged[name].items()):
+                labels = dict(zip(labelnames, key))
+                if metric.kind != 'histogram':
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(metric.buckets + (math.inf,), value[:-2]):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(dict(labels, le=_format_value(bound)))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(value[-2])}")
+                lines.append(f"{name}_count{_format_labels(labels)} {value[-1]}")
+        return '\n'.join(lines) + '\n'
+
+
+def _read_snapshot(path: str):
+    try:
+        with open(path, encoding='utf-8') as source:
+            return json.load(source)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_snapshot(path: str, snapshot: dict):
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as output:
+        json.dump(snapshot, output)
+    os.replace(tmp, path)
+
+
+def retire_snapshot(directory: str, pid: int):
+    """
+    Sum the snapshot of an exited worker into the retired snapshot and remove it
+    (called by the gunicorn master). Its gauges are summed too but, like those
+    of any dead process, never rendered.
+    """
+    if not directory:
+        return
+    path = os.path.join(directory, f"{SNAPSHOT_PREFIX}{pid}.json")
+    snapshot = _read_snapshot(path)
+    if snapshot is None:
+        return
+    retired_path = os.path.join(directory, RETIRED_SNAPSHOT)
+    retired = {name: {tuple(key): value for key, value in samples}
+               for name, samples in (_read_snapshot(retired_path) or {}).items()}
+    for name, samples in snapshot.items():
+        series = retired.setdefault(name, {})
+        for key, value in samples:
+            key = tuple(key)
+            if key not in series:
+                series[key] = value
+            elif isinstance(value, list):
+                series[key] = [a + b for a, b in zip(series[key], value)]
+            else:
+                series[key] = series[key] + value
+    _write_snapshot(retired_path, {name: [[list(key), value] for key, value in series.items()]
+                                   for name, series in retired.items()})
+    os.remove(path)
+
+
+def clear_directory(directory: str):
+    """Drop snapshots of a previous server run (called by the gunicorn master on start)."""
+    if not directory or not os.path.isdir(directory):
+        return
+    for name in os.listdir(directory):
+        if name.startswith(SNAPSHOT_PREFIX):
+            os.remove(os.path.join(directory, name))
+
+
+def install_default_collectors(registry: MetricsRegistry, app, db, fragment_cache, tables=(), row_count_max_age: float = 60.0):
+    """Connection pool, fragment cache and table size metrics."""
+    checkouts = registry.counter('db_pool_checkouts_total', 'Connections checked out of the pool.')
+    checked_out = registry.gauge('db_pool_checked_out', 'Connections currently in use.')
+    overflow = registry.gauge('db_pool_overflow', 'Connections open beyond pool_size.')
+    capacity = registry.gauge('db_pool_capacity', 'pool_size + max_overflow, the most connections a worker can hold.')
+    event.listen(Pool, 'checkout', lambda *args: checkouts.inc())
+
+    def pool_collector(registry):
+        with app.app_context():
+            pool = db.engine.pool
+        if hasattr(pool, 'checkedout'):
+            checked_out.set(pool.checkedout())
+            overflow.set(max(pool.overflow(), 0))
+            capacity.set(pool.size() + max(getattr(pool, '_max_overflow', 0), 0))
+
+    hits = registry.counter('fragment_cache_hits_total', 'Template fragments served from the cache.', ('endpoint',))
+    misses = registry.counter('fragment_cache_misses_total', 'Template fragments rendered.', ('endpoint',))
+    saved = registry.counter('fragment_cache_saved_seconds_total', 'Render time avoided by cache hits.', ('endpoint',))
+    entries = registry.gauge('fragment_cache_entries', 'Fragments held by the caches of live workers.')
+    size = registry.gauge('fragment_cache_bytes', 'Size of the fragments held by live workers.')
+    evictions = registry.counter('fragment_cache_evictions_total', 'Fragments evicted to stay under the size limit.')
+
+    def fragment_cache_collector(registry):
+        stats = fragment_cache.stats()
+        entries.set(stats['entries'])
+        size.set(stats['bytes'])
+        evictions.set(stats['evictions'])
+        for endpoint, route in stats['routes'].items():
+            hits.set(route['hits'], endpoint=endpoint)
+            misses.set(route['misses'], endpoint=endpoint)
+            saved.set(route['saved_ms'] / 1000, endpoint=endpoint)
+
+    rows = registry.gauge('table_rows', 'Rows per table (estimate from information_schema on MySQL).', ('table',), mode='local')
+    last_counted = [0.0]
+
+    def table_rows_collector(registry):
+        if time.monotonic() - last_counted[0] < row_count_max_age:
+            return
+        last_counted[0] = time.monotonic()
+        with app.app_context():
+            if db.engine.dialect.name == 'mysql':
+                # COUNT(*) scans InnoDB tables; the statistics estimate is enough here
+                counts = db.session.execute(text(
+                    "SELECT TABLE_NAME, TABLE_ROWS FROM information_schema.TABLES "
+                    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN :names"
+                ).bindparams(bindparam('names', expanding=True)), {'names': list(tables)}).all()
+            else:
+                # Optional tables (the price archive) may not have been created yet
+                existing = [name for name in tables if inspect(db.engine).has_table(name)]
+                counts = [(name, db.session.scalar(select(func.count()).select_from(table(name)))) for name in existing]
+        for name, count in counts:
+            rows.set(count or 0, table=name)
+
+    registry.add_collector(pool_collector)
+    registry.add_collector(fragment_cache_collector)
+    registry.add_collector(table_rows_collector, scrape_only=True)
@@ -0,0 +1,137 @@
+import os
+from datetime import datetime, timedelta
+from sqlalchemy import select, delete, insert, func
+from models import db
+from models.currency import CoinPrice, CoinPriceArchive, CoinPriceCompaction
+from models.change_log import record_changes
+
+
+def hour_bucket(value: datetime):
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def day_bucket(value: datetime):
+    return value.date()
+
+
+def select_victims(rows, bucket) -> list:
+    """
+    Given (id, coin_currency_id, quote_currency_id, datetime_update) rows, return the
+    ids to remove so that only the last tick of each pair and bucket remains.
+    Ties on the timestamp keep the highest id.
+    """
+    keep = {}
+    for row_id, coin_currency_id, quote_currency_id, updated in rows:
+        key = (coin_currency_id, quote_currency_id, bucket(updated))
+        current = keep.get(key)
+        if current is None or (updated, row_id) > current:
+            keep[key] = (updated, row_id)
+    kept_ids = {row_id for _, row_id in keep.values()}
+    return [row[0] for row in rows if row[0] not in kept_ids]
+
+
+class PriceCompactor:
+    """
+    Downsamples tbl_coin_prices by age:
+
+    - newer than ``raw_days``: untouched
+    - between ``raw_days`` and ``hourly_days``: last tick of each hour
+    - older than ``hourly_days``: last tick of each day (the daily close)
+
+    Tier boundaries are aligned to midnight so a day belongs to a single tier.
+    Removed rows are copied to tbl_coin_prices_archive (and optionally to Parquet
+    files) in the same transaction that deletes them. Work is done one day at a
+    time and committed every ``batch_size`` rows, so locks are held briefly.
+
+    The last tick of every day is always kept, so "latest price on or before a
+    date" and the daily close return the same values after compaction.
+
+    Each tier remembers the day it has compacted up to (tbl_coin_price_compaction)
+    and the next run resumes there. A day compacted hourly is compacted again
+    once it ages into the daily tier. Prices back-filled into days already
+    compacted need a ``rescan`` run. Only days that archived ticks count
+    towards ``max_days``. Deletes are recorded in the change log (one entry per
+    batch and day) so caches keyed on it refresh.
+    """
+
+    def __init__(self, raw_days: int = 7, hourly_days: int = 90, batch_size: int = 2000, parquet_dir: str = None, now: datetime = None):
+        if hourly_days < raw_days:
+            raise ValueError("hourly_days must be greater than or equal to raw_days")
+        today = (now or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+        self.raw_cutoff = today - timedelta(days=raw_days)
+        self.hourly_cutoff = today - timedelta(days=hourly_days)
+        self.batch_size = batch_size
+        self.parquet_dir = parquet_dir
+        if parquet_dir:
+            # Checked up front: a failure after some batches were archived would leave gaps in the files
+            import pandas  # noqa: F401
+            import pyarrow  # noqa: F401
+            os.makedirs(parquet_dir, exist_ok=True)
+
+    def run(self, max_days: int = None, log=None, rescan: bool = False) -> dict:
+        oldest = db.session.query(func.min(CoinPrice.datetime_update)).scalar()
+        stats = {'days': 0, 'scanned': 0, 'archived': 0}
+        if oldest is None:
+            return stats
+
+        oldest = oldest.replace(hour=0, minute=0, second=0, microsecond=0)
+        progress = {} if rescan else {state.tier: state.compacted_until for state in db.session.scalars(select(CoinPriceCompaction))}
+        tiers = [
+            ('daily', day_bucket, max(oldest, progress.get('daily', oldest)), self.hourly_cutoff),
+            ('hourly', hour_bucket, max(oldest, self.hourly_cutoff, progress.get('hourly', oldest)), self.raw_cutoff),
+        ]
+        for tier, bucket, day, end in tiers:
+            while day < end:
+                if max_days is not None and stats['days'] >= max_days:
+                    return stats
+                archived = self.compact_day(day, bucket)
+                self._save_progress(tier, day + timedelta(days=1))
+                stats['scanned'] += 1
+                stats['archived'] += archived
+                if archived:
+                    # Only days that still had ticks to archive count towards max_days
+                    stats['days'] += 1
+                    if log:
+                        log(f"{day.date()}: archived {archived} ticks ({tier})")
+                day += timedelta(days=1)
+        return stats
+
+    def _save_progress(self, tier: str, compacted_until: datetime):
+        state = db.session.get(CoinPriceCompaction, tier) or CoinPriceCompaction(tier=tier)
+        state.compacted_until = compacted_until
+        db.session.add(state)
+        db.session.commit()
+
+    def compact_day(self, day: datetime, bucket) -> int:
+        rows = db.session.execute(
+            select(CoinPrice.id, CoinPrice.coin_currency_id, CoinPrice.quote_currency_id, CoinPrice.datetime_update)
+            .where(CoinPrice.datetime_update >= day, CoinPrice.datetime_update < day + timedelta(days=1))
+        ).all()
+        victims = select_victims(rows, bucket)
+        db.session.commit()
+
+        for start in range(0, len(victims), self.batch_size):
+            self._archive_batch(victims[start:start + self.batch_size], day)
+        return len(victims)
+
+    def _archive_batch(self, ids: list, day: datetime):
+        table = CoinPrice.__table__
+        archived_at = datetime.now()
+        rows = [
+            {**row._asdict(), 'archived_at': archived_at}
+            for row in db.session.execute(
+                select(table.c.id, table.c.coin_currency_id, table.c.quote_currency_id, table.c.price, table.c.date_time_update)
+                .where(table.c.id.in_(ids))
+            )
+        ]
+        db.session.execute(insert(CoinPriceArchive.__table__), rows)
+        db.session.execute(delete(table).where(table.c.id.in_(ids)))
+        record_changes(CoinPrice.__tablename__, 'delete', [(None, day)])
+        if self.parquet_dir:
+            self._write_parquet(rows, day)
+        db.session.commit()
+
+    def _write_parquet(self, rows: list, day: datetime):
+        import pandas as pd
+        path = os.path.join(self.parquet_dir, f"coin_prices_{day:%Y%m%d}_{rows[0]['id']}.parquet")
+        pd.DataFrame(rows).to_parquet(path, index=False)
@@ -0,0 +1,200 @@
+import cProfile
+import io
+import itertools
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from flask import g, request, session
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ARG = "_profile"
+
+
+def _frame_label(code) -> str:
+    module = code.co_filename.rsplit('/', 1)[-1]
+    return f"{module}:{code.co_name}:{code.co_firstlineno}"
+
+
+def _pstats_label(func) -> str:
+    filename, lineno, name = func
+    return f"{filename.rsplit('/', 1)[-1]}:{name}:{lineno}"
+
+
+def _threads_are_greenlets() -> bool:
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('threading')
+
+
+class _StackSampler(threading.Thread):
+    """Samples the stack of one thread at a fixed interval and counts collapsed stacks."""
+
+    def __init__(self, target_thread_id: int, interval: float):
+        super().__init__(daemon=True)
+        self.target_thread_id = target_thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.target_thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+def _collapse_pstats(stats: pstats.Stats) -> list:
+    """
+    Approximate collapsed stacks from deterministic profile data.
+    Each function's own time is attributed to the chain of its most expensive callers.
+    """
+    lines = []
+    for func, (_, _, tottime, _, callers) in stats.stats.items():
+        if tottime <= 0:
+            continue
+        path = [_pstats_label(func)]
+        seen = {func}
+        current = callers
+        while current:
+            parent = max(current, key=lambda caller: stats.stats.get(caller, (0, 0, 0, 0))[3])
+            if parent in seen or parent not in stats.stats:
+                break
+            seen.add(parent)
+            path.append(_pstats_label(parent))
+            current = stats.stats[parent][4]
+        lines.append((";".join(reversed(path)), int(tottime * 1e6)))
+    return lines
+
+
+class RequestProfiler:
+    """
+    Opt-in, admin-only profiling of individual requests.
+
+    A request is profiled when an admin sends the ``X-Profile`` header or the
+    ``_profile`` query argument. The value ``sample`` selects the stack sampler,
+    anything else the deterministic profiler (cProfile). Finished profiles are
+    kept in a bounded ring buffer per worker process.
+
+    Under gevent the sampler cannot see the request: ``sys._current_frames()``
+    has one frame per OS thread, not per greenlet. ``sample`` then falls back
+    to cProfile, whose times include greenlets that ran while the request
+    waited on I/O.
+
+    When the flag is absent the only cost is a header/argument lookup per request
+    and an attribute check per SQL statement.
+    """
+
+    def __init__(self, app=None, capacity: int = 50, sample_interval: float = 0.005):
+        self.profiles = deque(maxlen=capacity)
+        self.sample_interval = sample_interval
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.profiles = deque(maxlen=app.config.get('PROFILER_CAPACITY', self.profiles.maxlen))
+        app.before_request(self._start)
+        app.after_request(self._stop)
+        # after_request is skipped when the view raises
+        app.teardown_request(self._teardown)
+        event.listen(Engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _requested_mode(self):
+        flag = request.headers.get(PROFILE_HEADER) or request.args.get(PROFILE_ARG)
+        if not flag or flag == "0":
+            return None
+        if session.get("user", {}).get("role") != "admin":
+            return None
+        return "sample" if flag == "sample" and not _threads_are_greenlets() else "cprofile"
+
+    def _start(self):
+        mode = self._requested_mode()
+        if mode is None:
+            return
+        state = {'mode': mode, 'sql_count': 0, 'sql_time': 0.0, 'started': time.perf_counter()}
+        if mode == "sample":
+            state['sampler'] = _StackSampler(threading.get_ident(), self.sample_interval)
+            state['sampler'].start()
+        else:
+            state['profiler'] = cProfile.Profile()
+            state['profiler'].enable()
+        g._profile_state = state
+
+    def _stop(self, response):
+        state = g.pop('_profile_state', None)
+        if state is None:
+            return response
+        response.headers['X-Profile-Id'] = str(self._finish(state, response.status_code))
+        return response
+
+    def _teardown(self, error=None):
+        state = g.pop('_profile_state', None)
+        if state is not None:
+            self._finish(state, 500)
+
+    def _finish(self, state: dict, status: int) -> int:
+        """Stop the profiler or sampler of a request and keep its profile."""
+        duration = time.perf_counter() - state['started']
+        if state['mode'] == "sample":
+            state['sampler'].stop()
+            collapsed = sorted(state['sampler'].samples.items(), key=lambda item: -item[1])
+            stats_text = "\n".join(f"{count:6d}  {stack}" for stack, count in collapsed[:40])
+        else:
+            state['profiler'].disable()
+            out = io.StringIO()
+            stats = pstats.Stats(state['profiler'], stream=out)
+            stats.sort_stats("cumulative").print_stats(40)
+            stats_text = out.getvalue()
+            collapsed = _collapse_pstats(stats)
+
+        with self._lock:
+            profile_id = next(self._ids)
+            self.profiles.append({
+                'id': profile_id,
+                'created_at': datetime.now(),
+                'method': request.method,
+                'path': request.full_path.rstrip('?'),
+                'endpoint': request.endpoint,
+                'status': status,
+                'mode': state['mode'],
+                'duration_ms': duration * 1000,
+                'sql_count': state['sql_count'],
+                'sql_ms': state['sql_time'] * 1000,
+                'stats_text': stats_text,
+                'collapsed': "\n".join(f"{stack} {count}" for stack, count in collapsed),
+            })
+        return profile_id
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        state = g.get('_profile_state') if g else None
+        if state is not None:
+            state['sql_started'] = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        state = g.get('_profile_state') if g else None
+        if state is not None and 'sql_started' in state:
+            state['sql_count'] += 1
+            state['sql_time'] += time.perf_counter() - state.pop('sql_started')
+
+    def get(self, profile_id: int):
+        for profile in self.profiles:
+            if profile['id'] == profile_id:
+                return profile
+        return None
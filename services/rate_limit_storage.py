@@ -0,0 +1,94 @@
+import sqlite3
+import time
+from limits.errors import ConfigurationError
+from limits.storage import Storage
+from services.shared_files import SQLiteConnections
+
+
+class SQLiteStorage(Storage):
+    """
+    Fixed-window rate limit storage shared by every worker process on the host.
+
+    Counters live in a single SQLite file (WAL mode), so gunicorn workers see the
+    same hits without running an external service. Each increment is one
+    ``BEGIN IMMEDIATE`` transaction, and expired windows are purged every
+    ``cleanup_interval`` seconds so the file does not grow without bound.
+
+    Usage: ``storage_uri="sqlite:///path/to/ratelimit.db"``
+    """
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri: str, wrap_exceptions: bool = False, cleanup_interval: float = 60.0, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.path = uri[len("sqlite:///"):]
+        # Each OS thread opens its own connection, and every ":memory:" connection
+        # is a separate empty database: nothing would be shared.
+        if not self.path or self.path == ":memory:":
+            raise ConfigurationError(f"{uri!r} has no database file; use sqlite:///<path> (or memory:// for a single process)")
+        self.cleanup_interval = float(cleanup_interval)
+        self._connections = SQLiteConnections(self.path)
+        self._next_cleanup = 0.0
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits ("
+                "key TEXT PRIMARY KEY, count INTEGER NOT NULL, expiry REAL NOT NULL)"
+            )
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _connection(self) -> sqlite3.Connection:
+        return self._connections.get()
+
+    def _maybe_cleanup(self, conn: sqlite3.Connection, now: float) -> None:
+        if now < self._next_cleanup:
+            return
+        self._next_cleanup = now + self.cleanup_interval
+        conn.execute("DELETE FROM rate_limits WHERE expiry <= ?", (now,))
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO rate_limits (key, count, expiry) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET "
+                "count = CASE WHEN expiry <= ? THEN excluded.count ELSE count + excluded.count END, "
+                "expiry = CASE WHEN expiry <= ? THEN excluded.expiry ELSE expiry END",
+                (key, amount, now + expiry, now, now),
+            )
+            count = conn.execute("SELECT count FROM rate_limits WHERE key = ?", (key,)).fetchone()[0]
+            self._maybe_cleanup(conn, now)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return count
+
+    def get(self, key: str) -> int:
+        row = self._connection().execute(
+            "SELECT count FROM rate_limits WHERE key = ? AND expiry > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key: str) -> float:
+        row = self._connection().execute(
+            "SELECT expiry FROM rate_limits WHERE key = ? AND expiry > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else time.time()
+
+    def check(self) -> bool:
+        try:
+            self._connection().execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self) -> int:
+        return self._connection().execute("DELETE FROM rate_limits").rowcount
+
+    def clear(self, key: str) -> None:
+        self._connection().execute("DELETE FROM rate_limits WHERE key = ?", (key,))
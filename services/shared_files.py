@@ -0,0 +1,62 @@
+"""
+State the worker processes of a host share through files (SQLite stores).
+"""
+import os
+import sqlite3
+import threading
+
+try:
+    # Monkey patching makes threading.get_ident() return the current greenlet
+    from gevent.monkey import get_original
+    _os_thread_id = get_original('_thread', 'get_ident')
+except ImportError:  # gevent is only needed for the gevent worker class
+    _os_thread_id = threading.get_ident
+
+
+def is_alive(pid: int) -> bool:
+    """Whether a process of this host (another worker) is still running."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SQLiteConnections:
+    """
+    One connection to a SQLite file (WAL mode) per OS thread of a process.
+
+    Connections are opened lazily and never used across a fork. Under gevent
+    all greenlets of a worker run on one OS thread and share its connection:
+    sqlite3 calls never yield to another greenlet, so a transaction cannot
+    interleave with another one, and requests do not each open a connection.
+
+    A call that waits on a lock held by another process (up to ``timeout``
+    seconds) blocks the whole OS thread, which under gevent is every request
+    of the worker. The stores keep their write transactions to a few
+    statements so such waits stay short.
+    """
+
+    def __init__(self, path: str, timeout: float = 5.0, row_factory=None):
+        self.path = path
+        self.timeout = timeout
+        self.row_factory = row_factory
+        self._connections = {}
+        self._pid = None
+
+    def get(self) -> sqlite3.Connection:
+        if self._pid != os.getpid():
+            # Connections inherited from the parent process are left alone
+            self._connections = {}
+            self._pid = os.getpid()
+        conn = self._connections.get(_os_thread_id())
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            if self.row_factory is not None:
+                conn.row_factory = self.row_factory
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._connections[_os_thread_id()] = conn
+        return conn
@@ -0,0 +1,272 @@
+import csv
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from flask import current_app
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from sqlalchemy import select, func
+from models import db
+from models.investor import Investor, InvestorTransaction
+from models.exchange import ExchangeBalance
+from models.currency import Currency
+from services.unitization import transaction_flow, transaction_units
+
+FORMATS = ('csv', 'html', 'pdf')
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'templates')
+
+# Below this many investors statements are rendered in-process: spawning a
+# worker costs about half a second, rendering a statement about a millisecond.
+# Overridden by STATEMENTS_MIN_PARALLEL.
+MIN_PARALLEL_INVESTORS = 200
+
+_shared = None
+
+
+def load_statement_data(start_date: str, end_date: str) -> dict:
+    """
+    Load everything the statements share in a handful of queries: investors,
+    their transactions up to end_date, and fund value on both dates.
+    The result only holds plain Python values so it can be sent to worker processes.
+    """
+    currencies = dict(db.session.execute(select(Currency.id, Currency.code)).all())
+    investors = [
+        {'id': investor_id, 'alias': alias, 'username': username}
+        for investor_id, alias, username in db.session.execute(
+            select(Investor.id, Investor.alias, Investor.username).order_by(Investor.alias)
+        )
+    ]
+
+    transactions = {}
+    for row in db.session.execute(
+        select(
+            InvestorTransaction.investor_id, InvestorTransaction.effective_datetime, InvestorTransaction.transaction_type,
+            InvestorTransaction.cash_amount, InvestorTransaction.cash_currency_id, InvestorTransaction.kind_amount,
+            InvestorTransaction.kind_currency_id, InvestorTransaction.transaction_nav,
+        )
+        .where(func.date(InvestorTransaction.effective_datetime) <= end_date)
+        .order_by(InvestorTransaction.effective_datetime, InvestorTransaction.id)
+    ):
+        transactions.setdefault(row.investor_id, []).append({
+            'date': row.effective_datetime.strftime('%Y-%m-%d'),
+            'type': row.transaction_type,
+            'cash_amount': float(row.cash_amount or 0.0),
+            'cash_currency': currencies.get(row.cash_currency_id),
+            'kind_amount': float(row.kind_amount) if row.kind_amount else None,
+            'kind_currency': currencies.get(row.kind_currency_id),
+            'nav': float(row.transaction_nav) if row.transaction_nav else None,
+            'flow': transaction_flow(row.transaction_type, row.cash_amount),
+            'units': transaction_units(row.transaction_type, row.cash_amount, row.transaction_nav),
+        })
+
+    def fund_value(date: str) -> float:
+        # Balances of the last day with balances on or before date
+        day = db.session.query(func.max(func.date(ExchangeBalance.update_datetime))).filter(
+            func.date(ExchangeBalance.update_datetime) <= date
+        ).scalar()
+        if day is None:
+            return 0.0
+        return float(db.session.query(func.sum(ExchangeBalance.balance)).filter(
+            func.date(ExchangeBalance.update_datetime) == day
+        ).scalar() or 0.0)
+
+    all_transactions = [tx for txs in transactions.values() for tx in txs]
+    units_start = sum(tx['units'] for tx in all_transactions if tx['date'] < start_date)
+    units_end = sum(tx['units'] for tx in all_transactions)
+    value_start = fund_value(start_date)
+    value_end = fund_value(end_date)
+
+    return {
+        'start_date': start_date,
+        'end_date': end_date,
+        'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M'),
+        'investors': investors,
+        'transactions': transactions,
+        'fund': {
+            'value_start': value_start,
+            'value_end': value_end,
+            'units_start': units_start,
+            'units_end': units_end,
+            'nav_start': value_start / units_start if units_start else None,
+            'nav_end': value_end / units_end if units_end else None,
+        },
+    }
+
+
+def build_statement(investor: dict, transactions: list, shared: dict) -> dict:
+    """Compute one investor's statement from the shared data. Pure function, no database access."""
+    start_date, end_date = shared['start_date'], shared['end_date']
+    fund = shared['fund']
+    period = [tx for tx in transactions if tx['date'] >= start_date]
+    units_start = sum(tx['units'] for tx in transactions if tx['date'] < start_date)
+    units_end = units_start + sum(tx['units'] for tx in period)
+    value_start = units_start * fund['nav_start'] if fund['nav_start'] else 0.0
+    value_end = units_end * fund['nav_end'] if fund['nav_end'] else 0.0
+    deposits = sum(tx['flow'] for tx in period if tx['flow'] > 0)
+    redemptions = sum(tx['flow'] for tx in period if tx['flow'] < 0)
+    net_flow = deposits + redemptions
+
+    # Modified Dietz: flows weighted by the fraction of the period they were invested
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    days = max((datetime.strptime(end_date, '%Y-%m-%d') - start).days, 1)
+    weighted_flows = sum(
+        tx['flow'] * (days - (datetime.strptime(tx['date'], '%Y-%m-%d') - start).days) / days for tx in period
+    )
+    invested = value_start + weighted_flows
+    period_return = (value_end - value_start - net_flow) / invested if invested else None
+    fund_return = fund['nav_end'] / fund['nav_start'] - 1 if fund['nav_start'] and fund['nav_end'] else None
+
+    return {
+        'investor': investor,
+        'start_date': start_date,
+        'end_date': end_date,
+        'generated_at': shared['generated_at'],
+        'transactions': period,
+        'units_start': units_start,
+        'units_end': units_end,
+        'nav_start': fund['nav_start'],
+        'nav_end': fund['nav_end'],
+        'value_start': value_start,
+        'value_end': value_end,
+        'deposits': deposits,
+        'redemptions': redemptions,
+        'net_flow': net_flow,
+        'fund_share': units_end / fund['units_end'] if fund['units_end'] else None,
+        'period_return': period_return,
+        'fund_return': fund_return,
+    }
+
+
+def render_statement(statement: dict, fmt: str) -> bytes:
+    if fmt == 'csv':
+        return _render_csv(statement)
+    if fmt == 'html':
+        return _render_html(statement).encode('utf-8')
+    if fmt == 'pdf':
+        return _render_pdf(statement)
+    raise ValueError(f"Unsupported format '{fmt}', expected one of {', '.join(FORMATS)}")
+
+
+SUMMARY_FIELDS = [
+    ('Units at start', 'units_start'), ('Units at end', 'units_end'),
+    ('NAV per unit at start', 'nav_start'), ('NAV per unit at end', 'nav_end'),
+    ('Value at start', 'value_start'), ('Value at end', 'value_end'),
+    ('Deposits', 'deposits'), ('Redemptions', 'redemptions'), ('Net flow', 'net_flow'),
+    ('Share of fund', 'fund_share'), ('Period return', 'period_return'), ('Fund return', 'fund_return'),
+]
+
+
+def _render_csv(statement: dict) -> bytes:
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(['Investor', statement['investor']['alias']])
+    writer.writerow(['Period', statement['start_date'], statement['end_date']])
+    for label, key in SUMMARY_FIELDS:
+        writer.writerow([label, statement[key] if statement[key] is not None else ''])
+    writer.writerow([])
+    writer.writerow(['Date', 'Type', 'Cash amount', 'Cash currency', 'Kind amount', 'Kind currency', 'NAV', 'Units'])
+    for tx in statement['transactions']:
+        writer.writerow([tx['date'], tx['type'], tx['cash_amount'], tx['cash_currency'] or '',
+                         tx['kind_amount'] or '', tx['kind_currency'] or '', tx['nav'] or '', tx['units']])
+    return out.getvalue().encode('utf-8')
+
+
+_jinja_env = None
+
+
+def _render_html(statement: dict) -> str:
+    global _jinja_env
+    if _jinja_env is None:
+        _jinja_env = Environment(loader=FileSystemLoader(TEMPLATES_DIR), autoescape=select_autoescape(['html']))
+    return _jinja_env.get_template('investor/statement.html').render(statement=statement, summary_fields=SUMMARY_FIELDS)
+
+
+def _render_pdf(statement: dict) -> bytes:
+    lines = [
+        f"Statement - {statement['investor']['alias']}",
+        f"Period {statement['start_date']} to {statement['end_date']}",
+        "",
+    ]
+    for label, key in SUMMARY_FIELDS:
+        value = statement[key]
+        lines.append(f"{label:<24}{value:>18,.6f}" if isinstance(value, float) else f"{label:<24}{'-':>18}")
+    lines += ["", f"{'Date':<12}{'Type':<10}{'Cash amount':>16}{'NAV':>12}{'Units':>16}"]
+    for tx in statement['transactions']:
+        lines.append(f"{tx['date']:<12}{tx['type']:<10}{tx['cash_amount']:>16,.2f}{tx['nav'] or 0:>12,.4f}{tx['units']:>16,.6f}")
+    return _text_pdf(lines)
+
+
+PDF_LINES_PER_PAGE = 64
+
+
+def _text_pdf(lines: list) -> bytes:
+    """
+    Write lines of monospaced text as an A4 PDF using the built-in Courier font.
+    Statements are plain text tables, so this avoids a rendering library and
+    costs well under a millisecond per document.
+    """
+    def escape(text):
+        return text.encode('latin-1', 'replace').decode('latin-1').replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+    pages = [lines[i:i + PDF_LINES_PER_PAGE] for i in range(0, len(lines), PDF_LINES_PER_PAGE)] or [[]]
+    page_ids = [4 + 2 * n for n in range(len(pages))]
+    objects = {
+        1: "<< /Type /Catalog /Pages 2 0 R >>",
+        2: f"<< /Type /Pages /Kids [{' '.join(f'{page_id} 0 R' for page_id in page_ids)}] /Count {len(pages)} >>",
+        3: "<< /Type /Font /Subtype /Type1 /BaseFont /Courier >>",
+    }
+    for page_id, page_lines in zip(page_ids, pages):
+        text = "".join(f"({escape(line)}) Tj T* " for line in page_lines)
+        stream = f"BT /F1 9 Tf 11 TL 40 800 Td {text}ET"
+        objects[page_id] = (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>")
+        objects[page_id + 1] = f"<< /Length {len(stream.encode('latin-1'))} >>\nstream\n{stream}\nendstream"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for object_id in range(1, len(objects) + 1):
+        offsets.append(len(out))
+        out += f"{object_id} 0 obj\n{objects[object_id]}\nendobj\n".encode('latin-1')
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode('latin-1')
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode('latin-1')
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode('latin-1')
+    return bytes(out)
+
+
+def _init_worker(shared: dict):
+    global _shared
+    _shared = shared
+
+
+def _statement_job(job: tuple) -> tuple:
+    investor, transactions, fmt = job
+    statement = build_statement(investor, transactions, _shared)
+    filename = f"statement_{investor['id']}_{_shared['start_date']}_{_shared['end_date']}.{fmt}"
+    return filename, render_statement(statement, fmt)
+
+
+def generate_statements(start_date: str, end_date: str, fmt: str = 'csv', processes: int = None, min_parallel: int = None) -> list:
+    """
+    Build and render the statements of every investor.
+    Shared data is loaded once and handed to each worker process at start-up;
+    investors are then fanned out across the pool when there are at least
+    min_parallel of them (default STATEMENTS_MIN_PARALLEL). Returns [(filename, content)].
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}', expected one of {', '.join(FORMATS)}")
+    shared = load_statement_data(start_date, end_date)
+    jobs = [(investor, shared['transactions'].get(investor['id'], []), fmt) for investor in shared['investors']]
+    processes = processes or os.cpu_count() or 1
+    if min_parallel is None:
+        min_parallel = current_app.config.get('STATEMENTS_MIN_PARALLEL', MIN_PARALLEL_INVESTORS)
+
+    if processes <= 1 or len(jobs) < min_parallel:
+        _init_worker(shared)
+        return [_statement_job(job) for job in jobs]
+
+    # spawn: workers must not inherit the parent's database connections or gevent state
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context, initializer=_init_worker, initargs=(shared,)) as pool:
+        return list(pool.map(_statement_job, jobs, chunksize=max(1, len(jobs) // (processes * 4))))
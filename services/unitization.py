@@ -0,0 +1,225 @@
+from datetime import datetime, date
+from sqlalchemy import select, delete, func, and_, or_
+from models import db
+from models.investor import InvestorTransaction, InvestorUnitLedger, InvestorUnits
+from models.exchange import ExchangeBalance
+
+
+def transaction_flow(transaction_type: str, cash_amount) -> float:
+    """Signed cash value of a transaction: deposits add to the fund, redemptions remove from it."""
+    amount = abs(float(cash_amount or 0.0))
+    return -amount if transaction_type and transaction_type.startswith('red_') else amount
+
+
+def transaction_units(transaction_type: str, cash_amount, transaction_nav) -> float:
+    """Fund units issued (positive) or redeemed (negative) by a transaction at its NAV per unit."""
+    if not transaction_nav:
+        return 0.0
+    return transaction_flow(transaction_type, cash_amount) / float(transaction_nav)
+
+
+def _as_datetime(value):
+    # Form handlers assign raw strings to the model before they are flushed
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, datetime.min.time())
+    if isinstance(value, str) and value:
+        return datetime.fromisoformat(value.strip())
+    return None
+
+
+def _as_float(value):
+    return float(value) if value not in (None, '') else None
+
+
+def _get_summary(investor_id: int) -> InvestorUnits:
+    summary = db.session.get(InvestorUnits, investor_id)
+    if summary is None:
+        summary = InvestorUnits(investor_id=investor_id, units=0.0, net_flow=0.0, twr_factor=1.0)
+        db.session.add(summary)
+    return summary
+
+
+def _append(summary: InvestorUnits, transaction_id: int, effective_datetime, transaction_type, cash_amount, nav):
+    """Apply one transaction after the investor's current state. O(1)."""
+    nav = _as_float(nav)
+    flow = transaction_flow(transaction_type, cash_amount)
+    units = transaction_units(transaction_type, cash_amount, nav)
+
+    # Time-weighted return chains NAV changes over the periods units were held
+    twr_factor = summary.twr_factor or 1.0
+    if (summary.units or 0.0) > 0 and summary.last_nav and nav:
+        twr_factor *= nav / summary.last_nav
+
+    summary.units = (summary.units or 0.0) + units
+    summary.net_flow = (summary.net_flow or 0.0) + flow
+    summary.twr_factor = twr_factor
+    summary.last_nav = nav or summary.last_nav
+    summary.last_effective_datetime = effective_datetime
+    summary.update_datetime = datetime.now()
+    db.session.add(InvestorUnitLedger(
+        transaction_id=transaction_id,
+        investor_id=summary.investor_id,
+        effective_datetime=effective_datetime,
+        flow=flow,
+        nav=nav,
+        units=units,
+        units_after=summary.units,
+        twr_factor_after=twr_factor,
+    ))
+
+
+def _drop_summary(investor_id: int):
+    summary = db.session.get(InvestorUnits, investor_id)
+    if summary is not None:
+        db.session.delete(summary)
+
+
+def rebuild_investor(investor_id: int, exclude_transaction_id: int = None):
+    """Replay every transaction of one investor; an investor without transactions has no ledger state."""
+    db.session.execute(delete(InvestorUnitLedger).where(InvestorUnitLedger.investor_id == investor_id))
+    transactions = db.session.execute(
+        select(InvestorTransaction.id, InvestorTransaction.effective_datetime, InvestorTransaction.transaction_type,
+               InvestorTransaction.cash_amount, InvestorTransaction.transaction_nav)
+        .where(InvestorTransaction.investor_id == investor_id, InvestorTransaction.id != exclude_transaction_id)
+        .order_by(InvestorTransaction.effective_datetime, InvestorTransaction.id)
+    ).all()
+    if not transactions:
+        _drop_summary(investor_id)
+        return
+    summary = _get_summary(investor_id)
+    summary.units, summary.net_flow, summary.twr_factor = 0.0, 0.0, 1.0
+    summary.last_nav, summary.last_effective_datetime = None, None
+    for transaction_id, effective_datetime, transaction_type, cash_amount, nav in transactions:
+        _append(summary, transaction_id, _as_datetime(effective_datetime), transaction_type, cash_amount, nav)
+    summary.update_datetime = datetime.now()
+
+
+def _is_latest(investor_id: int, transaction_id: int, effective_datetime) -> bool:
+    """True when no ledger row of the investor comes after (effective_datetime, transaction_id)."""
+    later = db.session.scalar(
+        select(InvestorUnitLedger.transaction_id).where(
+            InvestorUnitLedger.investor_id == investor_id,
+            InvestorUnitLedger.transaction_id != transaction_id,
+            or_(
+                InvestorUnitLedger.effective_datetime > effective_datetime,
+                and_(InvestorUnitLedger.effective_datetime == effective_datetime, InvestorUnitLedger.transaction_id > transaction_id),
+            ),
+        ).limit(1)
+    )
+    return later is None
+
+
+def _remove_latest(summary: InvestorUnits, entry: InvestorUnitLedger) -> bool:
+    """Undo the investor's last ledger row by restoring the state of the row before it. False if none is left."""
+    db.session.delete(entry)
+    db.session.flush()
+    previous = db.session.scalars(
+        select(InvestorUnitLedger)
+        .where(InvestorUnitLedger.investor_id == summary.investor_id)
+        .order_by(InvestorUnitLedger.effective_datetime.desc(), InvestorUnitLedger.transaction_id.desc())
+        .limit(1)
+    ).first()
+    summary.units = previous.units_after if previous else 0.0
+    summary.twr_factor = previous.twr_factor_after if previous else 1.0
+    # _append carries the last NAV forward over entries without one
+    summary.last_nav = db.session.scalar(
+        select(InvestorUnitLedger.nav)
+        .where(InvestorUnitLedger.investor_id == summary.investor_id, InvestorUnitLedger.nav.is_not(None))
+        .order_by(InvestorUnitLedger.effective_datetime.desc(), InvestorUnitLedger.transaction_id.desc())
+        .limit(1)
+    )
+    summary.last_effective_datetime = previous.effective_datetime if previous else None
+    summary.net_flow = (summary.net_flow or 0.0) - entry.flow
+    summary.update_datetime = datetime.now()
+    return previous is not None
+
+
+def record_transaction(transaction: InvestorTransaction):
+    """
+    Add a new transaction (flushed, so it has an id) to the ledger.
+    Appends are O(1); a back-dated transaction or an investor without ledger
+    state triggers a replay of that investor only.
+    """
+    effective_datetime = _as_datetime(transaction.effective_datetime)
+    summary = db.session.get(InvestorUnits, transaction.investor_id)
+    if summary is None or (summary.last_effective_datetime and effective_datetime < summary.last_effective_datetime):
+        rebuild_investor(transaction.investor_id)
+        return
+    _append(summary, transaction.id, effective_datetime, transaction.transaction_type,
+            transaction.cash_amount, transaction.transaction_nav)
+
+
+def update_transaction(transaction: InvestorTransaction, previous_investor_id: int):
+    """Bring the ledger in line with an edited transaction."""
+    if previous_investor_id != transaction.investor_id:
+        rebuild_investor(previous_investor_id)
+        rebuild_investor(transaction.investor_id)
+        return
+
+    entry = db.session.get(InvestorUnitLedger, transaction.id)
+    summary = db.session.get(InvestorUnits, transaction.investor_id)
+    effective_datetime = _as_datetime(transaction.effective_datetime)
+    # Fast path: correcting the investor's most recent transaction without moving it back
+    if (entry is not None and summary is not None
+            and _is_latest(transaction.investor_id, transaction.id, entry.effective_datetime)
+            and _is_latest(transaction.investor_id, transaction.id, effective_datetime)):
+        _remove_latest(summary, entry)
+        _append(summary, transaction.id, effective_datetime, transaction.transaction_type,
+                transaction.cash_amount, transaction.transaction_nav)
+        return
+    rebuild_investor(transaction.investor_id)
+
+
+def remove_transaction(transaction: InvestorTransaction):
+    """Take a transaction out of the ledger, before it is deleted."""
+    entry = db.session.get(InvestorUnitLedger, transaction.id)
+    summary = db.session.get(InvestorUnits, transaction.investor_id)
+    if entry is not None and summary is not None and _is_latest(transaction.investor_id, transaction.id, entry.effective_datetime):
+        if not _remove_latest(summary, entry):
+            db.session.delete(summary)
+        return
+    rebuild_investor(transaction.investor_id, exclude_transaction_id=transaction.id)
+
+
+def remove_investor(investor_id: int):
+    """Delete the ledger state of an investor, before the investor is deleted."""
+    db.session.execute(delete(InvestorUnitLedger).where(InvestorUnitLedger.investor_id == investor_id))
+    _drop_summary(investor_id)
+
+
+def fund_nav() -> dict:
+    """Current NAV per unit: latest day of exchange balances over the units outstanding."""
+    total_units = db.session.query(func.sum(InvestorUnits.units)).scalar() or 0.0
+    latest = db.session.query(func.max(ExchangeBalance.update_datetime)).scalar()
+    fund_value = 0.0
+    if latest is not None:
+        day_start = datetime.combine(latest.date(), datetime.min.time())
+        fund_value = db.session.query(func.sum(ExchangeBalance.balance)).filter(
+            ExchangeBalance.update_datetime >= day_start
+        ).scalar() or 0.0
+    return {
+        'date': latest.strftime('%Y-%m-%d') if latest else None,
+        'fund_value': float(fund_value),
+        'total_units': float(total_units),
+        'nav': float(fund_value) / total_units if total_units > 0 else None,
+    }
+
+
+def investor_position(summary: InvestorUnits, fund: dict) -> dict:
+    nav = fund['nav']
+    twr_factor = summary.twr_factor or 1.0
+    if summary.units > 0 and summary.last_nav and nav:
+        twr_factor *= nav / summary.last_nav
+    return {
+        'investor_id': summary.investor_id,
+        'investor_alias': summary.investor.alias if summary.investor else None,
+        'units': summary.units,
+        'net_flow': summary.net_flow,
+        'current_value': summary.units * nav if nav is not None else None,
+        'fund_share': summary.units / fund['total_units'] if fund['total_units'] > 0 else None,
+        'time_weighted_return': twr_factor - 1 if summary.last_nav else None,
+        'last_nav': summary.last_nav,
+        'last_effective_datetime': str(summary.last_effective_datetime) if summary.last_effective_datetime else None,
+    }
@@ -8,7 +8,10 @@ class DashboardLoader {
         this.startDate = null;
         this.endDate = null;
         this.loadingTimeout = 30000; // 30 second timeout
+        this.jobPollInterval = 1000; // background jobs: status check every second
+        this.jobTimeout = 600000; // and give up after 10 minutes
         this.errors = {};
+        this.deltaCache = this.loadDeltaCache();
     }
 
     /**
@@ -105,7 +108,7 @@ class DashboardLoader {
 
         try {
             const response = await this.fetchWithTimeout(
-                `/dashboard/api/balance?start_date=${this.startDate}&end_date=${this.endDate}`,
+                this.deltaUrl('balance', `/dashboard/api/balance?start_date=${this.startDate}&end_date=${this.endDate}`),
                 this.loadingTimeout
             );
 
@@ -113,7 +116,7 @@ class DashboardLoader {
                 throw new Error(response.error || 'Failed to load balance data');
             }
 
-            const data = response.data;
+            const data = this.mergeDelta('balance', response.data);
             this.renderBalanceDifference(data);
             delete this.errors.balance;
         } catch (error) {
@@ -132,7 +135,7 @@ class DashboardLoader {
 
         try {
             const response = await this.fetchWithTimeout(
-                `/dashboard/api/transactions?start_date=${this.startDate}&end_date=${this.endDate}`,
+                this.deltaUrl('transactions', `/dashboard/api/transactions?start_date=${this.startDate}&end_date=${this.endDate}`),
                 this.loadingTimeout
             );
 
@@ -140,7 +143,7 @@ class DashboardLoader {
                 throw new Error(response.error || 'Failed to load transactions data');
             }
 
-            const data = response.data;
+            const data = this.mergeDelta('transactions', response.data);
             this.renderTransactions(data);
             delete this.errors.transactions;
         } catch (error) {
@@ -158,16 +161,21 @@ class DashboardLoader {
         if (!container) return;
 
         try {
-            const response = await this.fetchWithTimeout(
-                `/dashboard/api/crypto-variation?start_date=${this.startDate}&end_date=${this.endDate}`,
+            let response = await this.fetchWithTimeout(
+                this.deltaUrl('crypto', `/dashboard/api/crypto-variation?start_date=${this.startDate}&end_date=${this.endDate}&async=1`),
                 this.loadingTimeout
             );
 
+            // Long ranges come back as a background job to poll
+            if (response.success && response.data && response.data.job) {
+                response = await this.waitForJob(response.data.job, job => this.showCryptoVariationProgress(job));
+            }
+
             if (!response.success) {
                 throw new Error(response.error || 'Failed to load crypto variation data');
             }
 
-            const data = response.data;
+            const data = this.mergeDelta('crypto', response.data);
             this.renderCryptoVariation(data);
             delete this.errors.crypto;
         } catch (error) {
@@ -177,6 +185,101 @@ class DashboardLoader {
         }
     }
 
+    /**
+     * Results of earlier ranges, kept across visits so that the next day's
+     * default range (same start, one more day) only fetches the added day
+     */
+    loadDeltaCache() {
+        try {
+            return JSON.parse(localStorage.getItem('dashboardDelta')) || {};
+        } catch (error) {
+            return {};
+        }
+    }
+
+    saveDeltaCache() {
+        try {
+            localStorage.setItem('dashboardDelta', JSON.stringify(this.deltaCache));
+        } catch (error) {
+            // Storage full or disabled, delta requests are only an optimization
+            this.deltaCache = {};
+        }
+    }
+
+    /**
+     * Add the previous range and its token when the requested range extends it
+     */
+    deltaUrl(kind, url) {
+        const previous = this.deltaCache[kind];
+        if (previous && previous.token && previous.start_date === this.startDate && previous.end_date < this.endDate) {
+            return `${url}&previous_end_date=${previous.end_date}&token=${encodeURIComponent(previous.token)}`;
+        }
+        return url;
+    }
+
+    /**
+     * Combine a delta response with the cached result of the previous range.
+     * Totals come complete from the server; only the lists of the added days
+     * are appended here.
+     */
+    mergeDelta(kind, data) {
+        const previous = this.deltaCache[kind];
+        if (data.is_delta && previous) {
+            if (kind === 'transactions') {
+                data.investor_transactions = previous.data.investor_transactions.concat(data.investor_transactions);
+            } else if (kind === 'crypto') {
+                data.variations_by_currency.forEach(variation => {
+                    const before = previous.data.variations_by_currency.find(v => v.currency_id === variation.currency_id);
+                    const repriced = (before ? before.holdings_details : []).map(holding => ({
+                        ...holding,
+                        price_at_end: variation.end_price,
+                        variation: holding.amount * (variation.end_price - holding.price_at_measurement_start)
+                    }));
+                    variation.holdings_details = repriced.concat(variation.holdings_details);
+                });
+            }
+        }
+
+        if (data.delta_token) {
+            this.deltaCache[kind] = {
+                start_date: data.start_date,
+                end_date: data.end_date,
+                token: data.delta_token,
+                data: data
+            };
+        } else {
+            delete this.deltaCache[kind];
+        }
+        this.saveDeltaCache();
+        return data;
+    }
+
+    /**
+     * Poll a background job until it finishes; resolves to a response shaped
+     * like the synchronous endpoint's ({success, data, error})
+     */
+    async waitForJob(job, onProgress) {
+        const startedAt = Date.now();
+        while (job.status === 'queued' || job.status === 'running') {
+            if (Date.now() - startedAt > this.jobTimeout) {
+                throw new Error('Request timeout - calculation took too long');
+            }
+            onProgress(job);
+            await new Promise(resolve => setTimeout(resolve, this.jobPollInterval));
+
+            const response = await this.fetchWithTimeout(`/dashboard/api/jobs/${job.id}`, this.loadingTimeout);
+            if (!response.success) {
+                throw new Error(response.error || 'Failed to load job status');
+            }
+            job = response.data;
+        }
+
+        if (job.status === 'failed') {
+            return { success: false, error: job.error, data: null };
+        }
+        return { success: true, data: job.result };
+    }
+
     /**
      * Fetch with timeout support
      */
@@ -596,6 +699,23 @@ class DashboardLoader {
         }
     }
 
+    /**
+     * Progress of a crypto variation job over the skeleton
+     */
+    showCryptoVariationProgress(job) {
+        const cryptoSummary = document.getElementById('crypto-summary-card');
+        if (!cryptoSummary) return;
+
+        const percent = Math.round((job.progress || 0) * 100);
+        cryptoSummary.innerHTML = `
+            <h6 class="text-muted text-uppercase small mb-2">Crypto Variation</h6>
+            <div class="progress mb-2" role="progressbar" aria-valuenow="${percent}" aria-valuemin="0" aria-valuemax="100">
+                <div class="progress-bar progress-bar-striped progress-bar-animated" style="width: ${percent}%"></div>
+            </div>
+            <small class="text-muted">${job.status === 'queued' ? 'Waiting for a worker...' : this.escapeHtml(job.message || 'Calculating...')}</small>
+        `;
+    }
+
     /**
      * Show skeleton for crypto variation section
      */
@@ -641,7 +761,7 @@ class DashboardLoader {
             <div class="alert alert-danger mb-0 d-flex align-items-center">
                 <i class="bi bi-exclamation-circle me-2"></i>
                 <div>
-                    <strong>Balance Data Error:</strong> ${errorMsg}
+                    <strong>Balance Data Error:</strong> ${this.escapeHtml(errorMsg)}
                 </div>
             </div>
         `;
@@ -661,7 +781,7 @@ class DashboardLoader {
             <div class="alert alert-danger mb-0 d-flex align-items-center">
                 <i class="bi bi-exclamation-circle me-2"></i>
                 <div>
-                    <strong>Transactions Error:</strong> ${errorMsg}
+                    <strong>Transactions Error:</strong> ${this.escapeHtml(errorMsg)}
                 </div>
             </div>
         `;
@@ -681,7 +801,7 @@ class DashboardLoader {
             <div class="alert alert-danger mb-0 d-flex align-items-center">
                 <i class="bi bi-exclamation-circle me-2"></i>
                 <div>
-                    <strong>Crypto Variation Error:</strong> ${errorMsg}
+                    <strong>Crypto Variation Error:</strong> ${this.escapeHtml(errorMsg)}
                 </div>
             </div>
         `;
@@ -700,7 +820,7 @@ class DashboardLoader {
             <div class="d-flex align-items-center">
                 <i class="bi bi-exclamation-triangle me-2 fs-5"></i>
                 <div>
-                    <strong>Error:</strong> ${message}
+                    <strong>Error:</strong> ${this.escapeHtml(message)}
                 </div>
                 <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
             </div>
@@ -741,6 +861,15 @@ class DashboardLoader {
         });
     }
 
+    /**
+     * Escape text from the server (job messages, errors) before it goes into innerHTML
+     */
+    escapeHtml(text) {
+        const div = document.createElement('div');
+        div.textContent = String(text);
+        return div.innerHTML;
+    }
+
     /**
      * Parse currency string back to number
      */
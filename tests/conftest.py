@@ -0,0 +1,47 @@
+"""
+The app runs against an in-memory SQLite database (one shared connection) and
+writes its side files (rate limits, metrics, jobs) to a temporary directory.
+"""
+import os
+import sys
+import tempfile
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TMP_DIR = tempfile.mkdtemp(prefix='painel-tests-')
+os.environ.setdefault('SECRET_KEY', 'test-secret')
+os.environ['RATELIMIT_STORAGE_URI'] = 'sqlite:///' + os.path.join(TMP_DIR, 'ratelimit.db')
+os.environ['METRICS_DIR'] = os.path.join(TMP_DIR, 'metrics')
+os.environ['JOB_QUEUE_PATH'] = os.path.join(TMP_DIR, 'jobs.db')
+os.environ['RATELIMIT_ENABLED'] = 'false'
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import app as flask_app
+    engine = create_engine('sqlite://', poolclass=StaticPool, connect_args={'check_same_thread': False})
+    flask_app.extensions['sqlalchemy']._app_engines[flask_app][None] = engine
+    flask_app.config['TESTING'] = True
+    return flask_app
+
+
+@pytest.fixture
+def session(app):
+    """A fresh schema for each test, inside an app context."""
+    from models import db
+    with app.app_context():
+        db.create_all()
+        yield db.session
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def admin_client(app, session):
+    client = app.test_client()
+    with client.session_transaction() as browser_session:
+        browser_session['user'] = {'role': 'admin', 'name': 'Admin'}
+    return client
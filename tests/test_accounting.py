@@ -0,0 +1,95 @@
+import random
+import pytest
+from services.accounting import AVERAGE, FIFO, LIFO, LotBook, run_ledger, summarize
+
+
+def _book(method, trades):
+    book = LotBook(method)
+    for amount, price in trades:
+        book.apply(amount, price)
+    return book
+
+
+@pytest.mark.parametrize('method, realized, cost_basis, unrealized', [
+    # buy 2 @ 10, buy 2 @ 20, sell 3 @ 30, then valued at 25
+    (FIFO, 90 - (2 * 10 + 1 * 20), 20.0, 25 - 20),
+    (LIFO, 90 - (2 * 20 + 1 * 10), 10.0, 25 - 10),
+    (AVERAGE, 90 - 3 * 15, 15.0, 25 - 15),
+])
+def test_realized_and_unrealized_pnl(method, realized, cost_basis, unrealized):
+    book = _book(method, [(2, 10), (2, 20), (-3, 30)])
+
+    assert book.amount == 1
+    assert book.realized == pytest.approx(realized)
+    assert book.cost_basis == pytest.approx(cost_basis)
+    assert book.average_cost == pytest.approx(cost_basis)
+    assert book.unrealized(25) == pytest.approx(unrealized)
+    # The method only moves P&L between realized and unrealized
+    assert book.realized + book.unrealized(25) == pytest.approx(55)
+
+
+@pytest.mark.parametrize('method', [FIFO, LIFO, AVERAGE])
+def test_sell_beyond_position_is_unmatched(method):
+    book = _book(method, [(1, 10), (-3, 20)])
+
+    assert book.realized == pytest.approx(10)
+    assert book.unmatched_amount == pytest.approx(2)
+    assert book.amount == 0
+    assert book.cost_basis == 0
+    assert book.average_cost == 0
+
+
+@pytest.mark.parametrize('method', [FIFO, LIFO])
+def test_running_cost_basis_matches_open_lots(method):
+    rng = random.Random(3)
+    book = LotBook(method)
+    for _ in range(5000):
+        book.apply(rng.uniform(0.1, 2) * (1 if rng.random() < 0.55 else -1), rng.uniform(50, 150))
+    lots = book.to_state()['lots']
+
+    assert book.amount == pytest.approx(sum(amount for amount, _ in lots))
+    assert book.cost_basis == pytest.approx(sum(amount * price for amount, price in lots))
+
+
+def test_fifo_compacts_consumed_lots():
+    book = _book(FIFO, [(1, price) for price in range(3000)])
+    book.sell(2000, 5000)
+
+    assert book.head < 1024
+    assert book.cost_basis == pytest.approx(sum(range(2000, 3000)))
+    assert book.realized == pytest.approx(2000 * 5000 - sum(range(2000)))
+
+
+@pytest.mark.parametrize('method', [FIFO, LIFO, AVERAGE])
+def test_state_round_trip(method):
+    book = _book(method, [(2, 10), (2, 20), (-3, 30)])
+    restored = LotBook.from_state(book.to_state())
+    for copy in (book, restored):
+        copy.apply(1, 40)
+        copy.apply(-1.5, 50)
+
+    assert restored.amount == pytest.approx(book.amount)
+    assert restored.cost_basis == pytest.approx(book.cost_basis)
+    assert restored.realized == pytest.approx(book.realized)
+    assert restored.to_state()['lots'] == book.to_state()['lots']
+
+
+def test_lot_state_without_running_cost_basis():
+    state = _book(FIFO, [(2, 10), (2, 20), (-3, 30)]).to_state()
+    state['cost_basis'] = 0.0
+
+    assert LotBook.from_state(state).cost_basis == pytest.approx(20)
+
+
+def test_run_ledger_and_summarize():
+    books = run_ledger([(1, 2, 10), (2, 1, 100), (1, -1, 15), (2, 1, 120)], method=FIFO)
+    positions = summarize(books, {1: 12})
+
+    assert positions[1] == {'amount': 1, 'cost_basis': 10, 'average_cost': 10, 'realized_pnl': 5, 'unrealized_pnl': 2}
+    assert positions[2]['cost_basis'] == 220
+    assert positions[2]['unrealized_pnl'] is None
+
+
+def test_unknown_method():
+    with pytest.raises(ValueError):
+        LotBook('hifo')
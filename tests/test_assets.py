@@ -0,0 +1,47 @@
+import gzip
+import os
+import pytest
+from extensions import assets
+from services.assets import build_assets
+
+
+@pytest.fixture
+def built(app, tmp_path, monkeypatch):
+    (tmp_path / 'script.js').write_text("// greeting\nfunction greet(name) {\n    return 'hello ' + name;\n}\n")
+    (tmp_path / 'styles.css').write_text("body {\n    color: red;\n}\n")
+    manifest = build_assets(str(tmp_path), files=('script.js', 'styles.css'))
+    monkeypatch.setattr(assets, 'dist_folder', os.path.join(str(tmp_path), 'dist'))
+    monkeypatch.setattr(assets, 'manifest', None)
+    return manifest
+
+
+def test_serves_the_gzip_variant_when_accepted(app, built):
+    response = app.test_client().get('/assets/' + built['script.js'], headers={'Accept-Encoding': 'gzip'})
+
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.mimetype == 'text/javascript'
+    assert response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+    assert 'greet' in gzip.decompress(response.data).decode()
+    assert '// greeting' not in gzip.decompress(response.data).decode()
+
+
+def test_serves_the_plain_file_without_accept_encoding(app, built):
+    response = app.test_client().get('/assets/' + built['styles.css'], headers={'Accept-Encoding': 'identity'})
+
+    assert response.status_code == 200
+    assert 'Content-Encoding' not in response.headers
+    assert response.mimetype == 'text/css'
+    assert b'color:red' in response.data.replace(b' ', b'')
+
+
+def test_only_manifest_entries_are_served(app, built):
+    client = app.test_client()
+    assert client.get('/assets/manifest.json').status_code == 404
+    assert client.get('/assets/' + built['script.js'] + '.gz').status_code == 404
+
+
+def test_asset_url_falls_back_to_the_static_file(app, built):
+    with app.test_request_context():
+        assert assets.asset_url('script.js') == '/assets/' + built['script.js']
+        assert assets.asset_url('other.js') == '/static/other.js'
@@ -0,0 +1,57 @@
+from datetime import datetime
+from models.change_log import ChangeLog
+from models.exchange import Exchange, ExchangeBalance, Strategy
+
+
+def _seed(session):
+    session.add_all([Exchange(id=1, name='Binance'), Strategy(id=1, name='Hold')])
+    session.add_all([
+        ExchangeBalance(id=1, balance=100.0, update_datetime=datetime(2025, 1, 2, 12), exchange_id=1, strategy_id=1),
+        ExchangeBalance(id=2, balance=200.0, update_datetime=datetime(2025, 1, 2, 12), exchange_id=1, strategy_id=1),
+    ])
+    session.commit()
+
+
+def _row(balance_id, balance, loaded_at='2025-01-02T12:00:00'):
+    return {
+        'id': balance_id,
+        'balance': balance,
+        'update_datetime': '2025-01-02T18:00:00',
+        'expected_update_datetime': loaded_at,
+    }
+
+
+def test_rows_are_updated_together(admin_client, session):
+    _seed(session)
+    response = admin_client.post('/exchange/balances/batch', json={'rows': [_row(1, 110.0), _row(2, 210.0)]})
+
+    assert response.status_code == 200
+    assert response.json['updated'] == 2
+    session.expire_all()
+    assert [b.balance for b in session.query(ExchangeBalance).order_by(ExchangeBalance.id)] == [110.0, 210.0]
+    assert session.query(ChangeLog).filter_by(table_name='tbl_balances_history', operation='update').count() == 2
+
+
+def test_conflict_returns_409_and_writes_nothing(admin_client, session):
+    _seed(session)
+    response = admin_client.post('/exchange/balances/batch', json={
+        'rows': [_row(1, 110.0), _row(2, 210.0, loaded_at='2025-01-02T09:00:00')],
+    })
+
+    assert response.status_code == 409
+    assert response.json['conflicts'] == [2]
+    session.expire_all()
+    assert [b.balance for b in session.query(ExchangeBalance).order_by(ExchangeBalance.id)] == [100.0, 200.0]
+
+
+def test_removed_row_is_a_conflict(admin_client, session):
+    _seed(session)
+    response = admin_client.post('/exchange/balances/batch', json={'rows': [_row(1, 110.0), _row(3, 5.0)]})
+
+    assert response.status_code == 409
+    assert response.json['conflicts'] == [3]
+
+
+def test_invalid_rows_are_rejected(admin_client, session):
+    assert admin_client.post('/exchange/balances/batch', json={'rows': []}).status_code == 400
+    assert admin_client.post('/exchange/balances/batch', json={'rows': [{'id': 1}]}).status_code == 400
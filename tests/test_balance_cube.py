@@ -0,0 +1,101 @@
+from datetime import date, datetime
+import pytest
+from models.currency import Currency
+from models.exchange import Exchange, ExchangeBalance, Strategy
+from services.balance_cube import BalanceCube, cube_cache
+
+LABELS = {
+    'exchange': {1: 'Binance', 2: 'Kraken'},
+    'strategy': {1: 'Basis'},
+    'currency': {1: 'BTC', 2: 'USDT'},
+}
+START, END = date(2025, 1, 1), date(2025, 1, 31)
+
+
+@pytest.fixture
+def cube():
+    start, end = START.toordinal(), END.toordinal()
+    return BalanceCube([
+        (start, 1, 1, 1, 100.0),
+        (start, 1, 1, 1, 20.0),
+        (start, 2, None, 2, 50.0),
+        (start + 1, 1, 1, 1, 999.0),
+        (end, 1, 1, 1, 150.0),
+        (end, 1, 1, 2, 30.0),
+        (end, 2, None, 2, 40.0),
+    ], LABELS)
+
+
+def test_fund_total(cube):
+    assert cube.query(START, END)['total'] == {
+        'start_balance_sum': 170.0, 'end_balance_sum': 220.0, 'balance_difference': 50.0,
+    }
+
+
+def test_roll_up_reports_missing_ids_as_none(cube):
+    rows = cube.query(START, END, by=['strategy'])['rows']
+
+    assert rows == [
+        {'strategy': {'id': None, 'name': None},
+         'start_balance_sum': 50.0, 'end_balance_sum': 40.0, 'balance_difference': -10.0},
+        {'strategy': {'id': 1, 'name': 'Basis'},
+         'start_balance_sum': 120.0, 'end_balance_sum': 180.0, 'balance_difference': 60.0},
+    ]
+
+
+def test_slice(cube):
+    result = cube.query(START, END, by=['currency'], filters={'exchange': [1]})
+
+    assert [(row['currency']['name'], row['balance_difference']) for row in result['rows']] == [('BTC', 30.0), ('USDT', 30.0)]
+    assert result['total']['balance_difference'] == 60.0
+    assert cube.query(START, END, filters={'exchange': [3]})['total']['end_balance_sum'] == 0.0
+
+
+def test_pivot(cube):
+    result = cube.pivot(START, END, 'exchange', 'currency', measure='end_balance_sum')
+
+    assert [row['name'] for row in result['rows']] == ['Binance', 'Kraken']
+    assert [column['name'] for column in result['columns']] == ['BTC', 'USDT']
+    assert result['values'] == [[150.0, 30.0], [0.0, 40.0]]
+    assert result['row_totals'] == [180.0, 40.0]
+    assert result['column_totals'] == [150.0, 70.0]
+
+
+def test_pivot_leaves_out_empty_rows(cube):
+    result = cube.pivot(START, END, 'exchange', 'currency', filters={'currency': [1]})
+
+    assert [row['name'] for row in result['rows']] == ['Binance']
+    assert result['values'] == [[30.0]]
+
+
+@pytest.fixture
+def balances(session, monkeypatch):
+    monkeypatch.setattr(cube_cache, '_cube', None)
+    session.add_all([
+        Exchange(id=1, name='Binance'), Exchange(id=2, name='Kraken'), Strategy(id=1, name='Basis'),
+        Currency(id=1, code='BTC', name='Bitcoin'), Currency(id=2, code='USDT', name='Tether'),
+        ExchangeBalance(balance=100.0, update_datetime=datetime(2025, 1, 1, 12), exchange_id=1, strategy_id=1, currency_id=1),
+        ExchangeBalance(balance=50.0, update_datetime=datetime(2025, 1, 1, 12), exchange_id=2, currency_id=2),
+        ExchangeBalance(balance=150.0, update_datetime=datetime(2025, 1, 31, 12), exchange_id=1, strategy_id=1, currency_id=1),
+        ExchangeBalance(balance=40.0, update_datetime=datetime(2025, 1, 31, 12), exchange_id=2, currency_id=2),
+    ])
+    session.commit()
+
+
+def test_api_slice_and_pivot(admin_client, balances):
+    response = admin_client.get('/exchange/api/balances/cube?start_date=2025-01-01&end_date=2025-01-31'
+                                '&by=exchange&currency_id=2')
+    assert response.status_code == 200
+    assert [(row['exchange']['name'], row['balance_difference']) for row in response.json['data']['rows']] == [('Kraken', -10.0)]
+
+    response = admin_client.get('/exchange/api/balances/cube?start_date=2025-01-01&end_date=2025-01-31'
+                                '&pivot=strategy,exchange')
+    data = response.json['data']
+    assert data['rows'] == [{'id': None, 'name': None}, {'id': 1, 'name': 'Basis'}]
+    assert data['values'] == [[0.0, -10.0], [50.0, 0.0]]
+
+
+@pytest.mark.parametrize('query', ['by=region', 'by=exchange,exchange', 'pivot=exchange', 'pivot=exchange,exchange',
+                                   'measure=volume', 'exchange_id=a', 'start_date=2025-13-01'])
+def test_api_rejects_invalid_parameters(admin_client, balances, query):
+    assert admin_client.get('/exchange/api/balances/cube?' + query).status_code == 400
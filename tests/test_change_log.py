@@ -0,0 +1,121 @@
+from datetime import date, datetime
+from models.change_log import (ChangeLog, changed_since, changes_since, latest_cursor, pruned_through,
+                               record_changes, table_versions)
+from models.exchange import Exchange, ExchangeBalance
+from models.investor import Investor
+
+
+def _entries(session):
+    return [(c.table_name, c.row_id, c.operation, c.affected_date)
+            for c in session.query(ChangeLog).order_by(ChangeLog.id)]
+
+
+def test_flush_records_inserts_updates_and_deletes(session):
+    balance = ExchangeBalance(id=1, balance=10.0, update_datetime=datetime(2025, 1, 5, 12))
+    session.add(balance)
+    session.commit()
+    balance.update_datetime = datetime(2025, 1, 3, 12)
+    session.commit()
+    balance.update_datetime = datetime(2025, 1, 9, 12)
+    session.commit()
+    session.delete(balance)
+    session.commit()
+
+    assert _entries(session) == [
+        ('tbl_balances_history', 1, 'insert', date(2025, 1, 5)),
+        ('tbl_balances_history', 1, 'update', date(2025, 1, 3)),
+        # A row moved to a later date also affects the one it left, even once expired by a commit
+        ('tbl_balances_history', 1, 'update', date(2025, 1, 3)),
+        ('tbl_balances_history', 1, 'delete', date(2025, 1, 9)),
+    ]
+
+
+def test_reference_tables_have_no_date(session):
+    session.add(Exchange(id=1, name='Binance'))
+    session.commit()
+
+    assert _entries(session) == [('tbl_exchanges', 1, 'insert', None)]
+
+
+def test_changes_since_pages_through_the_log(session):
+    record_changes('tbl_coin_prices', 'delete', [(row_id, date(2025, 1, 1)) for row_id in range(5)])
+    record_changes('tbl_balances_history', 'update', [(9, date(2025, 1, 1))])
+    session.commit()
+
+    first, cursor = changes_since(0, ['tbl_coin_prices'], limit=3)
+    second, cursor = changes_since(cursor, ['tbl_coin_prices'], limit=3)
+    third, final = changes_since(cursor, ['tbl_coin_prices'], limit=3)
+
+    assert [c.row_id for c in first + second] == [0, 1, 2, 3, 4]
+    assert third == [] and final == cursor
+    assert latest_cursor() == 6
+
+
+def test_changed_since_only_counts_dates_up_to_until_date(session):
+    cursor = latest_cursor()
+    record_changes('tbl_balances_history', 'insert', [(1, date(2025, 1, 10))])
+    session.commit()
+
+    assert changed_since(cursor, ['tbl_balances_history'], until_date='2025-01-10')
+    assert not changed_since(cursor, ['tbl_balances_history'], until_date='2025-01-09')
+    assert not changed_since(cursor, ['tbl_coin_prices'])
+
+    record_changes('tbl_currencies', 'update', [(1, None)])
+    session.commit()
+    assert changed_since(cursor, ['tbl_currencies'], until_date='2025-01-01')
+
+
+def test_table_versions_move_on_every_write(session):
+    record_changes('tbl_balances_history', 'insert', [(1, date(2025, 1, 1))])
+    session.commit()
+    before = table_versions()
+    record_changes('tbl_coin_prices', 'insert', [(1, date(2025, 1, 1))])
+    session.commit()
+    after = table_versions()
+
+    assert after['tbl_balances_history'] == before['tbl_balances_history']
+    assert after['tbl_coin_prices'] > before['tbl_balances_history']
+
+
+def test_entries_are_written_on_commit_only(session):
+    session.add(Exchange(id=1, name='Binance'))
+    session.flush()
+    record_changes('tbl_coin_prices', 'delete', [(None, date(2025, 1, 1))])
+    assert _entries(session) == []
+
+    session.rollback()
+    session.commit()
+    assert _entries(session) == []
+
+    session.add(Exchange(id=2, name='Kraken'))
+    session.commit()
+    assert _entries(session) == [('tbl_exchanges', 2, 'insert', None)]
+
+
+def test_investor_edits_are_tracked(session):
+    investor = Investor(id=1, alias='Ana', username='ana')
+    session.add(investor)
+    session.commit()
+    investor.alias = 'Ana B.'
+    session.commit()
+
+    assert _entries(session) == [('tbl_investors', 1, 'insert', None), ('tbl_investors', 1, 'update', None)]
+
+
+def test_pruned_cursors_count_as_changed(session, app):
+    record_changes('tbl_balances_history', 'insert', [(1, date(2025, 1, 10))])
+    session.commit()
+    old_cursor = latest_cursor()
+    record_changes('tbl_balances_history', 'insert', [(2, date(2025, 1, 20))])
+    session.commit()
+    cursor = latest_cursor()
+    session.query(ChangeLog).filter(ChangeLog.id == old_cursor).update({'changed_at': datetime(2024, 1, 1)})
+    session.commit()
+
+    result = app.test_cli_runner().invoke(args=['changes', 'prune', '--days', '30'])
+
+    assert 'Deleted 1 change log entries' in result.output
+    assert pruned_through() == old_cursor
+    assert changed_since(old_cursor - 1, ['tbl_coin_prices'])
+    assert not changed_since(cursor, ['tbl_balances_history'])
+    assert [c.row_id for c in changes_since(0)[0]] == [2]
@@ -0,0 +1,69 @@
+from datetime import datetime
+import pytest
+from models.currency import Currency
+from models.exchange import CryptoPosition
+from services.crypto_ledger import (LedgerValidationError, currency_ids_by_code, ingest_transactions, parse_rows,
+                                    rebuild_position, validate_rows)
+
+
+@pytest.fixture
+def currencies(session):
+    session.add_all([Currency(id=1, code='BTC', name='Bitcoin'), Currency(id=2, code='ETH', name='Ether')])
+    session.commit()
+
+
+def _ingest(content):
+    return ingest_transactions(validate_rows(parse_rows(content, 'csv'), currency_ids_by_code()))
+
+
+def _position(session, currency_id):
+    position = session.get(CryptoPosition, currency_id)
+    return position.amount, position.cost_basis, position.average_cost, position.last_effective_date
+
+
+def _replayed(session, currency_id):
+    rebuild_position(currency_id)
+    session.commit()
+    return _position(session, currency_id)
+
+
+def test_appended_batch_matches_a_full_replay(session, currencies):
+    _ingest("effective_date,currency,amount,price\n2025-01-01,BTC,2,100\n2025-01-05,ETH,10,5\n")
+    result = _ingest("effective_date,currency,amount,price\n2025-01-05,BTC,-0.5,120\n2025-01-09,BTC,1,130\n")
+    incremental = _position(session, 1)
+
+    assert result['rebuilt_currencies'] == []
+    assert incremental[0] == pytest.approx(2.5)
+    assert incremental[3] == datetime(2025, 1, 9)
+    replayed = _replayed(session, 1)
+    assert incremental[:3] == pytest.approx(replayed[:3])
+    assert incremental[3] == replayed[3]
+
+
+def test_back_dated_batch_is_rebuilt(session, currencies):
+    _ingest("effective_date,currency,amount,price\n2025-01-01,BTC,2,100\n2025-01-10,BTC,-1,150\n")
+    result = _ingest("effective_date,currency,amount,price\n2025-01-05,BTC,2,200\n2025-01-12,ETH,1,5\n")
+    incremental = _position(session, 1)
+
+    assert result['rebuilt_currencies'] == [1]
+    # Average cost (100 * 2 + 200 * 2) / 4 = 150 before the sale on the 10th
+    assert incremental[:3] == pytest.approx((3.0, 450.0, 150.0))
+    assert incremental == _replayed(session, 1)
+
+
+def test_offsets_are_converted_to_naive_utc(session, currencies):
+    _ingest("effective_date,currency,amount,price\n2025-01-05T10:00:00,BTC,1,100\n")
+    result = _ingest("effective_date,currency,amount,price\n"
+                     "2025-01-05T12:00:00+02:00,BTC,1,110\n2025-01-05T11:00:00,BTC,1,120\n")
+
+    # 12:00+02:00 is 10:00 UTC: not before the stored 10:00, so no rebuild
+    assert result['rebuilt_currencies'] == []
+    assert _position(session, 1)[3] == datetime(2025, 1, 5, 11)
+
+
+def test_invalid_rows_are_all_reported(session, currencies):
+    with pytest.raises(LedgerValidationError) as error:
+        validate_rows(parse_rows("effective_date,currency,amount,price\n2025-01-01,DOGE,1,1\nnot-a-date,BTC,1,1\n"
+                                 "2025-01-01,BTC,0,1\n", 'csv'), currency_ids_by_code())
+
+    assert [row['line'] for row in error.value.errors] == [1, 2, 3]
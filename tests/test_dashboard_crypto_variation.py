@@ -0,0 +1,59 @@
+from datetime import datetime
+import pytest
+from models.currency import CoinPrice, Currency
+from models.exchange import CryptoTransaction
+
+
+@pytest.fixture
+def ledger(session):
+    session.add_all([Currency(id=1, code='USD', name='Dollar'), Currency(id=2, code='BTC', name='Bitcoin')])
+    for day in range(1, 12):
+        session.add(CoinPrice(coin_currency_id=2, quote_currency_id=1, price=100 + day, datetime_update=datetime(2025, 1, day, 10)))
+    for day, amount, price in [(1, 2, 101), (3, 1, 103), (8, -1.5, 108), (9, 1, 109)]:
+        session.add(CryptoTransaction(currency_id=2, amount=amount, price=price, effective_date=datetime(2025, 1, day)))
+    session.commit()
+
+
+def _variation(client, method):
+    response = client.get(f'/dashboard/api/crypto-variation?start_date=2025-01-05&end_date=2025-01-10&method={method}')
+    assert response.status_code == 200
+    return response.json['data']
+
+
+# Held before the period: 2 @ 101 and 1 @ 103. In the period: sell 1.5 @ 108, buy 1 @ 109.
+# start_price is the method's average cost after the last transaction of the
+# period (the start day's market price when there is none), avg_price_after_tx
+# the average cost after each transaction.
+@pytest.mark.parametrize('method, realized, unrealized, avg_after_tx', [
+    ('fifo', 162 - 1.5 * 101, 275 - 262.5, [153.5 / 1.5, 262.5 / 2.5]),
+    ('lifo', 162 - (103 + 0.5 * 101), 275 - 260.5, [101.0, 260.5 / 2.5]),
+    ('average', 162 - 1.5 * 305 / 3, 275 - 261.5, [305 / 3, 261.5 / 2.5]),
+])
+def test_pnl_per_cost_method(admin_client, ledger, method, realized, unrealized, avg_after_tx):
+    data = _variation(admin_client, method)
+    [btc] = data['variations_by_currency']
+
+    assert data['cost_method'] == method
+    assert btc['realized_pnl'] == pytest.approx(realized)
+    assert btc['unrealized_pnl'] == pytest.approx(unrealized)
+    assert data['total_realized_pnl'] == pytest.approx(realized)
+    assert data['total_unrealized_pnl'] == pytest.approx(unrealized)
+    assert btc['start_price'] == pytest.approx(avg_after_tx[-1])
+    assert [h['avg_price_after_tx'] for h in btc['holdings_details']] == pytest.approx(avg_after_tx)
+    # Market variation does not depend on the cost method: 110 * 2.5 - (3 * 105 - 1.5 * 108 + 109)
+    assert btc['variation'] == pytest.approx(13)
+    assert btc['end_price'] == 110
+    assert btc['amount'] == pytest.approx(2.5)
+
+
+def test_start_price_without_period_transactions(admin_client, ledger):
+    response = admin_client.get('/dashboard/api/crypto-variation?start_date=2025-01-04&end_date=2025-01-07')
+    [btc] = response.json['data']['variations_by_currency']
+
+    assert btc['start_price'] == 104
+    assert btc['holdings_details'] == []
+    assert btc['variation'] == pytest.approx(3 * (107 - 104))
+
+
+def test_unknown_method_is_rejected(admin_client, ledger):
+    assert admin_client.get('/dashboard/api/crypto-variation?method=hifo').status_code == 400
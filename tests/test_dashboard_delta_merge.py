@@ -0,0 +1,83 @@
+"""
+A delta response merged into the previous range by mergeDelta (static/dashboard-async.js)
+must equal the response computed from scratch for the extended range.
+"""
+import json
+import os
+import shutil
+import subprocess
+from datetime import datetime
+import pytest
+from models.currency import CoinPrice, Currency
+from models.exchange import CryptoTransaction, Exchange, ExchangeBalance
+from models.investor import Investor, InvestorTransaction
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static', 'dashboard-async.js')
+
+# Loads the dashboard module with stubbed browser globals and merges the responses given on stdin
+MERGE = """
+const fs = require('fs');
+const vm = require('vm');
+const storage = {};
+const context = {
+    console,
+    document: {addEventListener() {}},
+    localStorage: {getItem: key => storage[key] || null, setItem: (key, value) => { storage[key] = value; }},
+};
+vm.runInNewContext(fs.readFileSync(process.argv[1], 'utf8') + '\\nthis.DashboardLoader = DashboardLoader;', context);
+const {kind, previous, delta} = JSON.parse(fs.readFileSync(0, 'utf8'));
+const loader = new context.DashboardLoader();
+loader.mergeDelta(kind, previous);
+process.stdout.write(JSON.stringify(loader.mergeDelta(kind, delta)));
+"""
+
+pytestmark = pytest.mark.skipif(shutil.which('node') is None, reason='needs node to run the dashboard script')
+
+
+@pytest.fixture
+def history(session):
+    session.add_all([Currency(id=1, code='USD', name='Dollar'), Currency(id=2, code='BTC', name='Bitcoin'),
+                     Currency(id=3, code='ETH', name='Ether'), Exchange(id=1, name='Binance'),
+                     Investor(id=1, alias='Ana', username='ana')])
+    for day in range(1, 21):
+        session.add(CoinPrice(coin_currency_id=2, quote_currency_id=1, price=100 + day, datetime_update=datetime(2025, 1, day, 10)))
+        session.add(CoinPrice(coin_currency_id=3, quote_currency_id=1, price=50 - day, datetime_update=datetime(2025, 1, day, 10)))
+        session.add(ExchangeBalance(exchange_id=1, currency_id=1, balance=1000 + 10 * day, update_datetime=datetime(2025, 1, day, 12)))
+    for currency_id, day, amount, price in [(2, 1, 2, 101), (2, 4, 1, 104), (2, 8, -1.5, 108), (2, 12, 1, 112),
+                                            (2, 15, -2, 115), (3, 6, 3, 44), (3, 11, 2, 39), (3, 18, -4, 32)]:
+        session.add(CryptoTransaction(currency_id=currency_id, amount=amount, price=price, effective_date=datetime(2025, 1, day)))
+    for day, transaction_type, cash_amount in [(3, 'dep_cash', 500), (9, 'red_cash', 200), (14, 'dep_cash', 300), (19, 'red_cash', 100)]:
+        session.add(InvestorTransaction(investor_id=1, transaction_type=transaction_type, cash_amount=cash_amount, cash_currency_id=1,
+                                        transaction_nav=1.0, effective_datetime=datetime(2025, 1, day)))
+    session.commit()
+
+
+def _get(client, path, end_date, **params):
+    query = '&'.join(f'{key}={value}' for key, value in params.items())
+    response = client.get(f'/dashboard/api/{path}?start_date=2025-01-02&end_date={end_date}&{query}')
+    assert response.status_code == 200
+    return response.json['data']
+
+
+def _comparable(data):
+    return {key: value for key, value in data.items() if key not in ('is_delta', 'delta_token')}
+
+
+@pytest.mark.parametrize('kind, path, params', [
+    ('balance', 'balance', {}),
+    ('transactions', 'transactions', {}),
+    ('crypto', 'crypto-variation', {'method': 'fifo'}),
+    ('crypto', 'crypto-variation', {'method': 'lifo'}),
+    ('crypto', 'crypto-variation', {'method': 'average'}),
+])
+def test_merged_delta_matches_a_full_recompute(admin_client, history, kind, path, params):
+    previous = _get(admin_client, path, '2025-01-10', **params)
+    delta = _get(admin_client, path, '2025-01-20', previous_end_date='2025-01-10', token=previous['delta_token'], **params)
+    full = _get(admin_client, path, '2025-01-20', **params)
+    assert delta['is_delta'] and not full['is_delta']
+
+    result = subprocess.run(['node', '-e', MERGE, SCRIPT], input=json.dumps({'kind': kind, 'previous': previous, 'delta': delta}),
+                            capture_output=True, text=True, check=True)
+    merged = json.loads(result.stdout)
+
+    assert _comparable(merged) == _comparable(full)
@@ -0,0 +1,76 @@
+import logging
+from datetime import date
+import pytest
+from extensions import job_queue
+from models.change_log import latest_cursor, record_changes
+from services.delta_tokens import TOKEN_MAX_LENGTH, issue_token, load_previous
+
+TABLES = ['tbl_balances_history']
+
+
+@pytest.fixture
+def request_context(app, session):
+    with app.test_request_context():
+        yield
+
+
+def _load(token, **kwargs):
+    arguments = dict(kind='balance', start_date='2025-01-01', end_date='2025-01-20',
+                     previous_end_date='2025-01-10', tables=TABLES)
+    arguments.update(kwargs)
+    return load_previous(token, **arguments)
+
+
+def test_round_trip(request_context):
+    token = issue_token('balance', '2025-01-01', '2025-01-10', latest_cursor(), {'start_balance_sum': 12.5})
+
+    assert _load(token) == {'start_balance_sum': 12.5, 'end_date': '2025-01-10'}
+
+
+def test_large_state_is_kept_on_the_server(request_context):
+    state = {'currencies': [{'currency_id': i, 'book': {'lots': [[1.0, 100.0 + i]] * 20}} for i in range(50)]}
+    token = issue_token('crypto', '2025-01-01', '2025-01-10', latest_cursor(), state, method='fifo')
+
+    assert len(token) < TOKEN_MAX_LENGTH
+    assert _load(token, kind='crypto', method='fifo') == dict(state, end_date='2025-01-10')
+
+
+def test_expired_server_state_is_refused(request_context, monkeypatch, caplog):
+    state = {'values': list(range(2000))}
+    token = issue_token('balance', '2025-01-01', '2025-01-10', latest_cursor(), state)
+    monkeypatch.setattr(job_queue, 'state_ttl', -1)
+
+    with caplog.at_level(logging.INFO):
+        assert _load(token) is None
+    assert 'expired' in caplog.text
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'kind': 'transactions'},
+    {'start_date': '2024-12-01'},
+    {'previous_end_date': '2025-01-09'},
+    {'previous_end_date': '2025-01-20'},
+    {'method': 'lifo'},
+])
+def test_token_for_another_request_is_refused(request_context, kwargs):
+    token = issue_token('balance', '2025-01-01', '2025-01-10', latest_cursor(), {'start_balance_sum': 1.0})
+
+    assert _load(token, **kwargs) is None
+
+
+def test_tampered_token_is_refused(request_context):
+    token = issue_token('balance', '2025-01-01', '2025-01-10', latest_cursor(), {'start_balance_sum': 1.0})
+
+    assert _load(token[:-2] + ('A' if token[-2] != 'A' else 'B') + token[-1]) is None
+    assert _load('not-a-token') is None
+
+
+def test_write_inside_the_range_invalidates_the_token(request_context, session):
+    token = issue_token('balance', '2025-01-01', '2025-01-10', latest_cursor(), {'start_balance_sum': 1.0})
+    record_changes('tbl_balances_history', 'update', [(1, date(2025, 1, 15))])
+    session.commit()
+    assert _load(token) is not None
+
+    record_changes('tbl_balances_history', 'update', [(1, date(2025, 1, 5))])
+    session.commit()
+    assert _load(token) is None
@@ -0,0 +1,63 @@
+import pytest
+from jinja2 import DictLoader
+from models.exchange import Exchange
+from services.fragment_cache import FragmentCache
+
+TEMPLATES = {
+    'exchanges.html': "{% call cache_fragment('options', ['tbl_exchanges'], *vary) %}{{ render() }}{% endcall %}",
+    'other.html': "{% call cache_fragment('options', ['tbl_exchanges']) %}other {{ render() }}{% endcall %}",
+}
+
+
+@pytest.fixture
+def render(app, session):
+    cache = FragmentCache()
+    env = app.jinja_env.overlay(loader=DictLoader(TEMPLATES))
+    renders = []
+
+    def render(template='exchanges.html', *vary):
+        def render_rows():
+            renders.append(template)
+            return ','.join(name for name, in session.query(Exchange.name).order_by(Exchange.id))
+        # A new app context per render, as for real requests (g holds the table versions)
+        with app.app_context(), app.test_request_context():
+            return env.get_template(template).render(cache_fragment=cache.cache_fragment, render=render_rows, vary=vary)
+
+    render.cache, render.renders = cache, renders
+    with app.test_request_context():
+        session.add(Exchange(id=1, name='Binance'))
+        session.commit()
+    return render
+
+
+def test_second_render_is_a_hit(render):
+    assert render() == render() == 'Binance'
+    assert len(render.renders) == 1
+    stats = render.cache.stats()
+    assert stats['entries'] == 1
+    [route] = stats['routes'].values()
+    assert (route['hits'], route['misses']) == (1, 1)
+
+
+def test_a_write_to_a_listed_table_invalidates(render, session):
+    render()
+    session.add(Exchange(id=2, name='Kraken'))
+    session.commit()
+
+    assert render() == 'Binance,Kraken'
+    assert len(render.renders) == 2
+
+
+def test_extra_arguments_are_cached_separately(render):
+    render('exchanges.html', '2025-01-01')
+    render('exchanges.html', '2025-02-01')
+    render('exchanges.html', '2025-01-01')
+
+    assert len(render.renders) == 2
+    assert render.cache.stats()['entries'] == 2
+
+
+def test_fragment_names_are_scoped_to_the_template(render):
+    assert render('exchanges.html') == 'Binance'
+    assert render('other.html') == 'other Binance'
+    assert render.renders == ['exchanges.html', 'other.html']
@@ -0,0 +1,124 @@
+import sqlite3
+import time
+import pytest
+from flask import Flask
+from services.job_queue import DONE, FAILED, QUEUED, RUNNING, JobQueue
+
+
+def _queue(tmp_path, workers=0):
+    app = Flask(__name__)
+    app.config.update(JOB_QUEUE_PATH=str(tmp_path / 'jobs.db'), JOB_WORKERS=workers, JOB_RESULT_TTL=60)
+    queue = JobQueue(app, poll_interval=0.01)
+
+    @queue.handler('square')
+    def square(params, progress):
+        progress(1, 2, 'half way')
+        return params['x'] ** 2
+
+    @queue.handler('fail')
+    def fail(params, progress):
+        raise ValueError('no data')
+
+    return queue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    # No worker threads: the tests claim and run the jobs themselves
+    return _queue(tmp_path)
+
+
+def test_identical_jobs_are_deduplicated(queue):
+    first = queue.submit('square', {'x': 3})
+
+    assert queue.submit('square', {'x': 3})['id'] == first['id']
+    assert queue.submit('square', {'x': 4})['id'] != first['id']
+    with pytest.raises(LookupError):
+        queue.submit('cube', {'x': 3})
+
+
+def test_claims_the_oldest_job_once(queue):
+    first = queue.submit('square', {'x': 3})
+    second = queue.submit('square', {'x': 4})
+
+    claimed = queue._claim()
+    assert claimed['id'] == first['id']
+    assert queue.get(first['id'])['status'] == RUNNING
+    # A running job is still the one returned to identical submissions
+    assert queue.submit('square', {'x': 3})['id'] == first['id']
+    assert queue._claim()['id'] == second['id']
+    assert queue._claim() is None
+
+
+def test_result_and_failure_are_stored(queue):
+    done = queue.submit('square', {'x': 3})
+    failed = queue.submit('fail', {})
+    queue._run(queue._claim())
+    queue._run(queue._claim())
+
+    assert queue.get(done['id'])['status'] == DONE
+    assert queue.get(done['id'])['result'] == 9
+    assert queue.get(done['id'])['progress'] == 1.0
+    assert queue.get(failed['id'])['status'] == FAILED
+    assert queue.get(failed['id'])['error'] == 'no data'
+
+
+def test_finished_job_is_reused_while_fresh(queue):
+    job = queue.submit('square', {'x': 3}, version=7)
+    queue._run(queue._claim())
+
+    reused = queue.submit('square', {'x': 3}, fresh=lambda finished: finished['version'] == 7)
+    assert (reused['id'], reused['status']) == (job['id'], DONE)
+    again = queue.submit('square', {'x': 3}, fresh=lambda finished: False)
+    assert again['id'] != job['id'] and again['status'] == QUEUED
+
+
+def test_job_of_a_dead_process_is_queued_again(queue):
+    job = queue.submit('square', {'x': 3})
+    queue._claim()
+    queue._update(job['id'], pid=2 ** 22 + 1)
+    queue._next_cleanup = 0.0
+
+    assert queue._claim()['id'] == job['id']
+
+
+def test_states_expire(queue, monkeypatch):
+    state_id = queue.put_state({'lots': [[1.0, 2.0]]})
+
+    assert queue.get_state(state_id) == {'lots': [[1.0, 2.0]]}
+    assert queue.get_state('unknown') is None
+    monkeypatch.setattr(queue, 'state_ttl', -1)
+    assert queue.get_state(state_id) is None
+
+
+def test_worker_threads_run_submitted_jobs(tmp_path):
+    queue = _queue(tmp_path, workers=2)
+    jobs = [queue.submit('square', {'x': x}) for x in range(4)]
+
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline and any(queue.get(job['id'])['status'] != DONE for job in jobs):
+        time.sleep(0.01)
+
+    assert [queue.get(job['id'])['result'] for job in jobs] == [0, 1, 4, 9]
+
+
+def test_worker_thread_survives_a_job_it_cannot_record(tmp_path, monkeypatch):
+    queue = _queue(tmp_path, workers=1)
+    update, failures = queue._update, []
+
+    def locked_once(job_id, **fields):
+        if fields.get('status') == FAILED and not failures:
+            failures.append(job_id)
+            raise sqlite3.OperationalError('database is locked')
+        update(job_id, **fields)
+
+    monkeypatch.setattr(queue, '_update', locked_once)
+    failed = queue.submit('fail', {})
+    job = queue.submit('square', {'x': 3})
+
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline and queue.get(job['id'])['status'] != DONE:
+        time.sleep(0.01)
+
+    assert failures == [failed['id']]
+    assert queue.get(job['id'])['result'] == 9
@@ -0,0 +1,95 @@
+from datetime import datetime
+import pytest
+from sqlalchemy.dialects import mysql
+from models.currency import CoinLatestPrice, CoinPrice, Currency, upsert_latest_price
+from models.exchange import CryptoTransaction, ExchangeBalance
+
+
+@pytest.fixture
+def currencies(session):
+    session.add_all([Currency(id=1, code='USD', name='Dollar'), Currency(id=2, code='BTC', name='Bitcoin'),
+                     Currency(id=3, code='ETH', name='Ether'), Currency(id=4, code='SOL', name='Solana')])
+    session.commit()
+
+
+def _tick(session, price, day, coin=2):
+    tick = CoinPrice(coin_currency_id=coin, quote_currency_id=1, price=price, datetime_update=datetime(2025, 1, day, 10))
+    session.add(tick)
+    session.commit()
+    return tick
+
+
+def _latest(session, coin=2):
+    row = session.get(CoinLatestPrice, (coin, 1))
+    return (row.price, row.datetime_update.day) if row else None
+
+
+def test_older_tick_does_not_overwrite_a_newer_one(session, currencies):
+    _tick(session, 100.0, 10)
+    _tick(session, 90.0, 5)
+    assert _latest(session) == (100.0, 10)
+
+    _tick(session, 110.0, 12)
+    assert _latest(session) == (110.0, 12)
+
+
+def test_mysql_upsert_compares_the_date_before_overwriting_it():
+    statements = []
+
+    class Connection:
+        dialect = mysql.dialect()
+
+        def execute(self, stmt):
+            statements.append(stmt)
+
+    upsert_latest_price(Connection(), {'coin_currency_id': 2, 'quote_currency_id': 1, 'price': 1.0,
+                                       'date_time_update': datetime(2025, 1, 1), 'coin_price_id': 1})
+    sql = str(statements[0].compile(dialect=mysql.dialect()))
+    update = sql[sql.index('ON DUPLICATE KEY UPDATE'):]
+
+    # Every assignment is guarded by the date, and the date is assigned last
+    assert update.count('CASE WHEN (VALUES(date_time_update) >= tbl_coin_latest_prices.date_time_update)') == 3
+    assert update.index('price =') < update.index('coin_price_id =') < update.index('date_time_update = CASE')
+
+
+def test_edit_and_delete_refresh_the_latest_price(session, currencies):
+    older = _tick(session, 100.0, 10)
+    newest = _tick(session, 120.0, 20)
+
+    newest.datetime_update = datetime(2025, 1, 2, 10)
+    session.commit()
+    assert _latest(session) == (100.0, 10)
+
+    session.delete(older)
+    session.commit()
+    assert _latest(session) == (120.0, 2)
+
+    session.delete(newest)
+    session.commit()
+    assert _latest(session) is None
+
+
+def test_valuation(admin_client, session, currencies):
+    _tick(session, 100.0, 10)
+    _tick(session, 110.0, 11)
+    _tick(session, 10.0, 11, coin=3)
+    session.add_all([
+        CryptoTransaction(currency_id=2, amount=2.0, price=90.0, effective_date=datetime(2025, 1, 1)),
+        CryptoTransaction(currency_id=2, amount=-0.5, price=95.0, effective_date=datetime(2025, 1, 3)),
+        CryptoTransaction(currency_id=4, amount=3.0, price=20.0, effective_date=datetime(2025, 1, 3)),
+        ExchangeBalance(balance=500.0, update_datetime=datetime(2025, 1, 10, 12), currency_id=1),
+        ExchangeBalance(balance=1000.0, update_datetime=datetime(2025, 1, 11, 12), currency_id=1),
+        ExchangeBalance(balance=4.0, update_datetime=datetime(2025, 1, 11, 18), currency_id=3),
+    ])
+    session.commit()
+
+    data = admin_client.get('/dashboard/api/valuation').json['data']
+
+    assert [(p['currency_code'], p['amount'], p['value']) for p in data['crypto']['positions']] == [
+        ('BTC', 1.5, 165.0), ('SOL', 3.0, None),
+    ]
+    assert data['balances']['date'] == '2025-01-11'
+    assert [(p['currency_code'], p['value']) for p in data['balances']['positions']] == [('USD', 1000.0), ('ETH', 40.0)]
+    assert data['total_value'] == 1205.0
+    assert data['missing_prices'] == ['SOL']
+    assert admin_client.get('/dashboard/api/valuation?quote=EUR').status_code == 400
@@ -0,0 +1,67 @@
+import json
+import os
+from models import db
+from extensions import fragment_cache
+from services.metrics import MetricsRegistry, install_default_collectors, retire_snapshot
+
+
+def _write(directory, pid, snapshot):
+    with open(os.path.join(directory, f'metrics-{pid}.json'), 'w', encoding='utf-8') as output:
+        json.dump(snapshot, output)
+
+
+def _registry(directory):
+    registry = MetricsRegistry()
+    registry.directory = str(directory)
+    registry.gauge('queue_depth', 'Jobs waiting.')
+    return registry
+
+
+def _sample(text, series):
+    return next(line.split(' ')[-1] for line in text.splitlines() if line.startswith(series + ' '))
+
+
+def test_scrape_sums_counters_and_keeps_gauges_of_live_workers(tmp_path):
+    registry = _registry(tmp_path)
+    registry.dashboard_errors.inc(endpoint='dashboard.api_balance')
+    _write(tmp_path, os.getppid(), {'dashboard_api_errors_total': [[['dashboard.api_balance'], 2.0]],
+                                    'queue_depth': [[[], 3.0]]})
+    _write(tmp_path, 2 ** 22 + 1, {'dashboard_api_errors_total': [[['dashboard.api_balance'], 4.0]],
+                                   'queue_depth': [[[], 5.0]]})
+
+    text = registry.render()
+
+    assert _sample(text, 'dashboard_api_errors_total{endpoint="dashboard.api_balance"}') == '7'
+    assert _sample(text, 'queue_depth') == '3'
+
+
+def test_retired_worker_is_not_overwritten_by_a_reused_pid(tmp_path):
+    registry = _registry(tmp_path)
+    pid = os.getppid()
+    latency = [1] + [0] * 12 + [0.004, 1]
+    _write(tmp_path, pid, {'dashboard_api_errors_total': [[['dashboard.api_balance'], 2.0]],
+                           'http_request_duration_seconds': [[['dashboard.index', 'GET'], latency]]})
+    retire_snapshot(str(tmp_path), pid)
+    _write(tmp_path, pid + 1, {'dashboard_api_errors_total': [[['dashboard.api_balance'], 1.0]]})
+    retire_snapshot(str(tmp_path), pid + 1)
+    retire_snapshot(str(tmp_path), pid + 2)
+    # A new worker was given the same pid
+    _write(tmp_path, pid, {'dashboard_api_errors_total': [[['dashboard.api_balance'], 5.0]],
+                           'http_request_duration_seconds': [[['dashboard.index', 'GET'], latency]]})
+
+    text = registry.render()
+
+    assert sorted(os.listdir(tmp_path)) == [f'metrics-{pid}.json', 'metrics-retired.json']
+    assert _sample(text, 'dashboard_api_errors_total{endpoint="dashboard.api_balance"}') == '8'
+    assert _sample(text, 'http_request_duration_seconds_count{endpoint="dashboard.index",method="GET"}') == '2'
+
+
+def test_missing_tables_are_left_out_of_the_row_counts(app, session, tmp_path):
+    registry = _registry(tmp_path)
+    install_default_collectors(registry, app, db, fragment_cache,
+                               tables=('tbl_currencies', 'tbl_coin_prices_archive_missing'))
+
+    text = registry.render()
+
+    assert _sample(text, 'table_rows{table="tbl_currencies"}') == '0'
+    assert 'tbl_coin_prices_archive_missing' not in text
@@ -0,0 +1,99 @@
+import sys
+import types
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import func, select
+from models.change_log import ChangeLog
+from models.currency import CoinPrice, CoinPriceArchive, Currency
+from services.price_compaction import PriceCompactor, day_bucket, hour_bucket, select_victims
+
+NOW = datetime(2025, 6, 1, 12)
+
+
+def _seed(session, days):
+    session.add_all([Currency(id=1, code='USD', name='Dollar'), Currency(id=2, code='BTC', name='Bitcoin')])
+    for day in days:
+        for hour in (1, 2, 13, 23):
+            session.add(CoinPrice(coin_currency_id=2, quote_currency_id=1, price=100 + hour,
+                                  datetime_update=datetime.combine(day, datetime.min.time()) + timedelta(hours=hour)))
+    session.commit()
+
+
+def test_select_victims_keeps_last_tick_per_bucket():
+    rows = [(1, 2, 1, datetime(2025, 1, 1, 9)), (2, 2, 1, datetime(2025, 1, 1, 9, 30)),
+            (3, 2, 1, datetime(2025, 1, 1, 15)), (4, 3, 1, datetime(2025, 1, 1, 9))]
+    assert select_victims(rows, day_bucket) == [1, 2]
+    assert select_victims(rows, hour_bucket) == [1]
+
+
+def test_daily_tier_keeps_daily_close_and_archives_the_rest(session):
+    day = (NOW - timedelta(days=200)).date()
+    _seed(session, [day])
+    stats = PriceCompactor(now=NOW).run()
+
+    assert stats == {'days': 1, 'scanned': stats['scanned'], 'archived': 3}
+    [kept] = session.scalars(select(CoinPrice)).all()
+    assert kept.datetime_update.hour == 23
+    assert session.scalar(select(func.count()).select_from(CoinPriceArchive)) == 3
+
+
+def test_deletes_are_recorded_in_the_change_log(session):
+    day = (NOW - timedelta(days=200)).date()
+    _seed(session, [day])
+    session.query(ChangeLog).delete()
+    session.commit()
+    PriceCompactor(now=NOW).run()
+
+    [entry] = session.scalars(select(ChangeLog)).all()
+    assert (entry.table_name, entry.operation, entry.affected_date) == ('tbl_coin_prices', 'delete', day)
+
+
+def test_max_days_counts_only_days_that_archived_ticks(session):
+    oldest = (NOW - timedelta(days=300)).date()
+    _seed(session, [oldest + timedelta(days=offset) for offset in range(4)])
+    compactor = PriceCompactor(now=NOW)
+
+    first = compactor.run(max_days=2)
+    second = compactor.run(max_days=2)
+    third = compactor.run(max_days=2)
+
+    assert (first['days'], second['days'], third['days']) == (2, 2, 0)
+    assert session.scalar(select(func.count()).select_from(CoinPrice)) == 4
+
+
+def test_recent_days_are_untouched(session):
+    _seed(session, [(NOW - timedelta(days=2)).date()])
+    assert PriceCompactor(now=NOW).run()['archived'] == 0
+
+
+def test_next_run_resumes_after_the_compacted_days(session):
+    oldest = (NOW - timedelta(days=300)).date()
+    _seed(session, [oldest + timedelta(days=offset) for offset in range(3)])
+    PriceCompactor(now=NOW).run()
+
+    assert PriceCompactor(now=NOW).run()['scanned'] == 0
+    # Back-filled ticks are only found by a rescan
+    session.add(CoinPrice(coin_currency_id=2, quote_currency_id=1, price=1.0,
+                          datetime_update=datetime.combine(oldest, datetime.min.time()) + timedelta(hours=5)))
+    session.commit()
+    assert PriceCompactor(now=NOW).run()['archived'] == 0
+    assert PriceCompactor(now=NOW).run(rescan=True)['archived'] == 1
+
+
+def test_hourly_day_is_compacted_again_in_the_daily_tier(session):
+    day = (NOW - timedelta(days=30)).date()
+    _seed(session, [day])
+
+    assert PriceCompactor(now=NOW).run()['archived'] == 0
+    stats = PriceCompactor(now=NOW + timedelta(days=70)).run()
+
+    assert (stats['days'], stats['archived']) == (1, 3)
+    assert PriceCompactor(now=NOW + timedelta(days=70)).run()['scanned'] == 0
+
+
+def test_parquet_output_needs_pyarrow(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, 'pandas', types.ModuleType('pandas'))
+    monkeypatch.setitem(sys.modules, 'pyarrow', None)
+
+    with pytest.raises(ImportError):
+        PriceCompactor(parquet_dir=str(tmp_path / 'archive'))
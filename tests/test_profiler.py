@@ -0,0 +1,59 @@
+import sys
+import threading
+import pytest
+from flask import Flask, session
+from extensions import profiler
+from services.profiler import RequestProfiler, _StackSampler
+
+
+@pytest.mark.parametrize('flag, mode', [('1', 'cprofile'), ('sample', 'sample')])
+def test_admin_request_is_profiled(admin_client, flag, mode):
+    response = admin_client.get('/admin/profiles', headers={'X-Profile': flag})
+
+    profile = profiler.get(int(response.headers['X-Profile-Id']))
+    assert (profile['mode'], profile['endpoint'], profile['status']) == (mode, 'admin.list_profiles', 200)
+
+
+def test_only_admins_are_profiled(app, admin_client):
+    assert 'X-Profile-Id' not in admin_client.get('/admin/profiles').headers
+    assert 'X-Profile-Id' not in admin_client.get('/admin/profiles?_profile=0').headers
+    assert 'X-Profile-Id' not in app.test_client().get('/admin/profiles?_profile=1').headers
+
+
+def test_profile_views(admin_client):
+    profile_id = admin_client.get('/admin/profiles?_profile=1').headers['X-Profile-Id']
+
+    assert f'/admin/profiles/{profile_id}'.encode() in admin_client.get('/admin/profiles').data
+    assert admin_client.get(f'/admin/profiles/{profile_id}').status_code == 200
+    collapsed = admin_client.get(f'/admin/profiles/{profile_id}/collapsed')
+    assert collapsed.mimetype == 'text/plain'
+    assert 'list_profiles' in collapsed.get_data(as_text=True)
+    assert admin_client.get('/admin/profiles/999999').status_code == 404
+    assert admin_client.get('/admin/profiles/999999/collapsed').status_code == 404
+
+
+@pytest.mark.parametrize('flag', ['1', 'sample'])
+def test_failed_request_stops_profiling(flag):
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    # Exceptions propagate, as in debug mode: after_request does not run
+    app.testing = True
+    request_profiler = RequestProfiler(app, sample_interval=0.001)
+
+    @app.route('/login')
+    def login():
+        session['user'] = {'role': 'admin'}
+        return ''
+
+    @app.route('/fail')
+    def fail():
+        raise RuntimeError('boom')
+
+    client = app.test_client()
+    client.get('/login')
+    with pytest.raises(RuntimeError):
+        client.get('/fail?_profile=' + flag)
+
+    assert [(p['endpoint'], p['status']) for p in request_profiler.profiles] == [('fail', 500)]
+    assert sys.getprofile() is None
+    assert not any(isinstance(thread, _StackSampler) for thread in threading.enumerate())
@@ -0,0 +1,58 @@
+import threading
+import pytest
+from limits import parse
+from limits.errors import ConfigurationError
+from limits.strategies import FixedWindowRateLimiter
+from services.rate_limit_storage import SQLiteStorage
+
+
+@pytest.fixture
+def uri(tmp_path):
+    return 'sqlite:///' + str(tmp_path / 'ratelimit.db')
+
+
+def test_instances_share_counters(uri):
+    # Two storages on one file stand for two worker processes
+    first, second = SQLiteStorage(uri), SQLiteStorage(uri)
+    assert first.incr('key', 60) == 1
+    assert second.incr('key', 60) == 2
+    assert first.get('key') == 2
+
+
+def test_limiter_counts_hits_of_every_instance(uri):
+    limit = parse('3/minute')
+    limiters = [FixedWindowRateLimiter(SQLiteStorage(uri)) for _ in range(3)]
+    assert all(limiter.hit(limit, 'client') for limiter in limiters)
+    assert not limiters[0].hit(limit, 'client')
+    assert limiters[1].get_window_stats(limit, 'client').remaining == 0
+
+
+def test_concurrent_increments_are_not_lost(uri):
+    storage = SQLiteStorage(uri)
+
+    def hit():
+        for _ in range(50):
+            storage.incr('key', 60)
+
+    threads = [threading.Thread(target=hit) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert storage.get('key') == 200
+
+
+def test_expired_window_restarts(uri):
+    storage = SQLiteStorage(uri)
+    storage.incr('key', 60, amount=5)
+    storage.incr('other', -1)
+    assert storage.get('other') == 0
+    assert storage.incr('other', 60) == 1
+    storage.clear('key')
+    assert storage.get('key') == 0
+
+
+@pytest.mark.parametrize('memory_uri', ['sqlite://', 'sqlite:///:memory:'])
+def test_memory_database_is_rejected(memory_uri):
+    with pytest.raises(ConfigurationError):
+        SQLiteStorage(memory_uri)
@@ -0,0 +1,34 @@
+import os
+import subprocess
+import sys
+import threading
+from services.shared_files import SQLiteConnections, is_alive
+
+
+def test_one_connection_per_thread(tmp_path):
+    connections = SQLiteConnections(str(tmp_path / 'store.db'))
+    conn = connections.get()
+    other = []
+    thread = threading.Thread(target=lambda: other.append(connections.get()))
+    thread.start()
+    thread.join()
+
+    assert connections.get() is conn
+    assert other[0] is not conn
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+
+
+def test_connections_are_not_reused_after_a_fork(tmp_path, monkeypatch):
+    connections = SQLiteConnections(str(tmp_path / 'store.db'))
+    conn = connections.get()
+    monkeypatch.setattr('os.getpid', lambda: -1)
+
+    assert connections.get() is not conn
+
+
+def test_is_alive():
+    finished = subprocess.Popen([sys.executable, '-c', 'pass'])
+    finished.wait()
+
+    assert is_alive(os.getpid())
+    assert not is_alive(finished.pid)
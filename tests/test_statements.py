@@ -0,0 +1,75 @@
+from datetime import datetime
+import pytest
+import services.statements as statements
+from models.currency import Currency
+from models.exchange import ExchangeBalance
+from models.investor import Investor, InvestorTransaction
+
+
+@pytest.fixture
+def fund(session):
+    session.add_all([Currency(id=1, code='USD', name='Dollar'),
+                     Investor(id=1, alias='Ana', username='ana'), Investor(id=2, alias='Bruno', username='bruno')])
+    session.add_all([
+        InvestorTransaction(investor_id=1, transaction_type='dep_cash', cash_amount=1000, transaction_nav=1.0,
+                            cash_currency_id=1, effective_datetime=datetime(2025, 1, 1)),
+        InvestorTransaction(investor_id=2, transaction_type='dep_cash', cash_amount=500, transaction_nav=1.25,
+                            cash_currency_id=1, effective_datetime=datetime(2025, 1, 10)),
+    ])
+    # No balance on the 5th: the fund value at the start comes from the 1st
+    session.add_all([
+        ExchangeBalance(balance=1000.0, update_datetime=datetime(2025, 1, 1, 12)),
+        ExchangeBalance(balance=1100.0, update_datetime=datetime(2025, 1, 31, 12)),
+        ExchangeBalance(balance=700.0, update_datetime=datetime(2025, 1, 31, 12)),
+    ])
+    session.commit()
+
+
+def test_fund_value_uses_latest_balance_on_or_before_date(fund):
+    data = statements.load_statement_data('2025-01-05', '2025-01-31')
+
+    assert data['fund']['value_start'] == 1000.0
+    assert data['fund']['value_end'] == 1800.0
+    assert data['fund']['units_start'] == 1000.0
+    assert data['fund']['units_end'] == 1400.0
+    assert data['fund']['nav_start'] == 1.0
+    assert data['fund']['nav_end'] == pytest.approx(1800 / 1400)
+
+
+def test_statement_figures(fund):
+    data = statements.load_statement_data('2025-01-05', '2025-01-31')
+    ana = statements.build_statement(data['investors'][0], data['transactions'][1], data)
+    bruno = statements.build_statement(data['investors'][1], data['transactions'][2], data)
+
+    assert ana['value_start'] == 1000.0
+    assert ana['value_end'] == pytest.approx(1000 * 1800 / 1400)
+    assert ana['period_return'] == pytest.approx(1800 / 1400 - 1)
+    assert bruno['units_end'] == 400.0
+    assert bruno['deposits'] == 500.0
+    assert ana['fund_share'] + bruno['fund_share'] == pytest.approx(1)
+
+
+def test_small_batches_are_rendered_in_process(fund, monkeypatch):
+    def no_pool(*args, **kwargs):
+        raise AssertionError('process pool used below the threshold')
+    monkeypatch.setattr(statements, 'ProcessPoolExecutor', no_pool)
+
+    files = statements.generate_statements('2025-01-05', '2025-01-31', fmt='csv', processes=4, min_parallel=3)
+    assert [name for name, _ in files] == ['statement_1_2025-01-05_2025-01-31.csv', 'statement_2_2025-01-05_2025-01-31.csv']
+
+
+@pytest.mark.parametrize('fmt', statements.FORMATS)
+def test_process_pool_matches_serial_rendering(fund, fmt, monkeypatch):
+    load = statements.load_statement_data
+    monkeypatch.setattr(statements, 'load_statement_data', lambda *args: dict(load(*args), generated_at='2025-02-01 08:00'))
+
+    serial = statements.generate_statements('2025-01-05', '2025-01-31', fmt=fmt, processes=1)
+    parallel = statements.generate_statements('2025-01-05', '2025-01-31', fmt=fmt, processes=2, min_parallel=1)
+
+    assert len(parallel) == 2
+    assert parallel == serial
+
+
+def test_unknown_format(fund):
+    with pytest.raises(ValueError):
+        statements.generate_statements('2025-01-05', '2025-01-31', fmt='docx')
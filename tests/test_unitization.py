@@ -0,0 +1,145 @@
+from datetime import datetime
+import pytest
+from sqlalchemy import text
+from models.investor import Investor, InvestorTransaction, InvestorUnitLedger, InvestorUnits
+from services import unitization
+
+
+@pytest.fixture
+def investor(session):
+    session.add(Investor(id=1, alias='Ana', username='ana'))
+    session.commit()
+    return 1
+
+
+def _add(session, day, transaction_type, cash_amount, nav):
+    transaction = InvestorTransaction(investor_id=1, transaction_type=transaction_type, cash_amount=cash_amount,
+                                      transaction_nav=nav, effective_datetime=datetime(2025, 1, day))
+    session.add(transaction)
+    session.flush()
+    unitization.record_transaction(transaction)
+    session.commit()
+    return transaction
+
+
+def _state(session):
+    summary = session.get(InvestorUnits, 1)
+    ledger = [(e.transaction_id, e.units, e.units_after, e.twr_factor_after)
+              for e in session.query(InvestorUnitLedger).order_by(InvestorUnitLedger.effective_datetime, InvestorUnitLedger.transaction_id)]
+    return (summary.units, summary.net_flow, summary.twr_factor, summary.last_nav, summary.last_effective_datetime), ledger
+
+
+def _rebuilt(session):
+    unitization.rebuild_investor(1)
+    session.commit()
+    return _state(session)
+
+
+def test_units_and_time_weighted_return(session, investor):
+    _add(session, 1, 'dep_cash', 1000, 1.0)
+    _add(session, 10, 'dep_cash', 600, 1.2)
+    _add(session, 20, 'red_cash', 300, 1.5)
+    summary = session.get(InvestorUnits, 1)
+
+    assert summary.units == pytest.approx(1000 + 500 - 200)
+    assert summary.net_flow == pytest.approx(1300)
+    assert summary.twr_factor == pytest.approx(1.5)
+    assert summary.last_nav == 1.5
+
+
+def test_back_dated_transaction_matches_a_replay(session, investor):
+    _add(session, 1, 'dep_cash', 1000, 1.0)
+    _add(session, 20, 'dep_cash', 600, 1.5)
+    _add(session, 10, 'dep_cash', 600, 1.2)
+
+    assert _state(session) == _rebuilt(session)
+
+
+def test_removing_the_latest_entry_keeps_the_carried_forward_nav(session, investor):
+    _add(session, 1, 'dep_cash', 1000, 1.0)
+    _add(session, 5, 'dep_cash', 100, 1.1)
+    _add(session, 10, 'dep_kind', 50, None)
+    latest = _add(session, 15, 'dep_cash', 100, 1.25)
+
+    unitization.remove_transaction(latest)
+    session.delete(latest)
+    session.commit()
+
+    assert session.get(InvestorUnits, 1).last_nav == 1.1
+    assert _state(session) == _rebuilt(session)
+
+
+def test_editing_the_latest_entry_matches_a_replay(session, investor):
+    _add(session, 1, 'dep_cash', 1000, 1.0)
+    latest = _add(session, 10, 'dep_cash', 600, 1.2)
+
+    latest.cash_amount = 900
+    latest.transaction_nav = 1.25
+    unitization.update_transaction(latest, previous_investor_id=1)
+    session.commit()
+
+    assert session.get(InvestorUnits, 1).units == pytest.approx(1000 + 720)
+    assert _state(session) == _rebuilt(session)
+
+
+def test_removing_an_older_entry_replays(session, investor):
+    first = _add(session, 1, 'dep_cash', 1000, 1.0)
+    _add(session, 10, 'dep_cash', 600, 1.2)
+
+    unitization.remove_transaction(first)
+    session.delete(first)
+    session.commit()
+
+    assert session.get(InvestorUnits, 1).units == pytest.approx(500)
+    assert _state(session) == _rebuilt(session)
+
+
+@pytest.fixture
+def foreign_keys(session):
+    # SQLite only enforces foreign keys when asked to, per connection
+    session.execute(text('PRAGMA foreign_keys=ON'))
+    yield
+    session.rollback()
+    session.execute(text('PRAGMA foreign_keys=OFF'))
+
+
+def test_removing_the_last_transaction_drops_the_summary(session, investor):
+    first = _add(session, 1, 'dep_cash', 1000, 1.0)
+    second = _add(session, 10, 'dep_cash', 600, 1.2)
+
+    unitization.remove_transaction(second)
+    session.delete(second)
+    session.commit()
+    assert session.get(InvestorUnits, 1) is not None
+
+    unitization.remove_transaction(first)
+    session.delete(first)
+    session.commit()
+    assert session.get(InvestorUnits, 1) is None
+    assert session.query(InvestorUnitLedger).count() == 0
+
+
+def test_moving_the_only_transaction_to_another_investor_drops_the_summary(session, investor):
+    session.add(Investor(id=2, alias='Bia', username='bia'))
+    transaction = _add(session, 1, 'dep_cash', 1000, 1.0)
+
+    transaction.investor_id = 2
+    unitization.update_transaction(transaction, previous_investor_id=1)
+    session.commit()
+
+    assert session.get(InvestorUnits, 1) is None
+    assert session.get(InvestorUnits, 2).units == pytest.approx(1000)
+
+
+def test_deleting_an_investor_after_its_transactions(session, investor, admin_client, foreign_keys):
+    transaction = _add(session, 1, 'dep_cash', 1000, 1.0)
+    unitization.remove_transaction(transaction)
+    session.delete(transaction)
+    session.commit()
+
+    response = admin_client.post('/investor/delete/1')
+
+    assert response.status_code == 302
+    assert session.query(Investor).count() == 0
+    assert session.query(InvestorUnits).count() == 0
+    assert session.query(InvestorUnitLedger).count() == 0